@@ -0,0 +1,205 @@
+"""
+Benchmark suite for map generation: each room generator, building a region's sprites, the whole realm
+pipeline at several realm sizes and rendering tiles. Every case reports the median wall time, the peak
+memory allocated by one run and the number of sprites it created.
+
+Run from the repository root:
+    python -m benchmarks.map_generation --save baseline.json
+    python -m benchmarks.map_generation --compare baseline.json
+
+--compare exits with status 1 if any case is slower or uses more memory than the baseline by more than
+the tolerance.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterable, List
+
+import pygame
+
+from dungeoneer.map_maker import generate_map
+from dungeoneer.realms import Realm
+from dungeoneer.regions import Region
+from benchmarks.region_generation import GENERATORS
+
+TILE_SIZE = (40, 40)
+REGION_SIZE = (40, 22)
+REALM_SIZES = ((1, 1), (3, 3), (5, 5), (10, 10))
+
+
+@dataclass
+class Result:
+    name: str
+    seconds: float  # median wall time of one run
+    peak_bytes: int  # peak traced allocation during one run
+    sprites: int  # distinct sprites in the groups of the regions made by one run
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[int], object]  # seed -> subject. Not timed
+    run: Callable[[object], Iterable[Region]]  # subject -> regions whose sprites are counted
+    repeats: int
+
+
+def sprite_count(regions: Iterable[Region]) -> int:
+    return len({sprite for region in regions for group in vars(region.groups).values() for sprite in group})
+
+
+def measure(case: Case) -> Result:
+    timings = []
+    for seed in range(case.repeats):
+        subject = case.setup(seed)
+        start = time.perf_counter()
+        case.run(subject)
+        timings.append(time.perf_counter() - start)
+
+    subject = case.setup(0)
+    tracemalloc.start()
+    regions = case.run(subject)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(case.name, statistics.median(timings), peak, sprite_count(regions))
+
+
+def empty_region(realm=None) -> Region:
+    region = realm.region((0, 0)) if realm else Region(REGION_SIZE, tile_size=pygame.Vector2(TILE_SIZE))
+    region.exits = {"N": 5, "S": 5, "E": 5, "W": 5}
+    return region
+
+
+def make_cases(repeats) -> List[Case]:
+    cases = []
+    for generator in GENERATORS:
+        cases.append(Case(
+            f"generate/{generator.__name__}",
+            setup=lambda seed: (empty_region(), seed),
+            run=lambda subject, g=generator: generate_region(g, *subject),
+            repeats=repeats))
+        cases.append(Case(
+            f"build_world/{generator.__name__}",
+            setup=lambda seed, g=generator: generated_realm_region(g, seed),
+            run=build_region,
+            repeats=repeats))
+    for width, height in REALM_SIZES:
+        cases.append(Case(
+            f"realm/generate_map/{width}x{height}",
+            setup=lambda seed, size=(width, height): Realm(size, TILE_SIZE, REGION_SIZE, seed=seed),
+            run=generate_realm,
+            repeats=max(1, repeats // (width * height))))
+    cases.append(Case(
+        "render/region",
+        setup=lambda seed: generate_region(GENERATORS[0], empty_region(), seed)[0],
+        run=render,
+        repeats=repeats))
+    cases.append(Case(
+        "render/realm/3x3",
+        setup=lambda seed: generated_realm((3, 3), seed),
+        run=render,
+        repeats=max(1, repeats // 9)))
+    return cases
+
+
+def generate_region(generator, region, seed) -> List[Region]:
+    return [generate_map(region, generator, random.Random(seed))]
+
+
+def generated_realm_region(generator, seed):
+    """A one region realm whose region has been generated but has no sprites yet"""
+    realm = Realm((1, 1), TILE_SIZE, REGION_SIZE)
+    region = empty_region(realm)
+    generate_map(region, generator, random.Random(seed))
+    return realm, region
+
+
+def build_region(subject) -> List[Region]:
+    realm, region = subject
+    return [realm.build_region(region)]
+
+
+def generate_realm(realm: Realm) -> Iterable[Region]:
+    realm.generate_map()
+    return realm.regions.values()
+
+
+def generated_realm(size, seed) -> Realm:
+    realm = Realm(size, TILE_SIZE, REGION_SIZE, seed=seed)
+    realm.generate_map()
+    return realm
+
+
+def render(subject) -> List[Region]:
+    subject.render_tiles()
+    return []
+
+
+def compare(results: List[Result], baseline: dict, tolerance: float) -> bool:
+    """Print each result against the baseline.
+
+    Returns:
+        True if there were no regressions
+    """
+    ok = True
+    print(f"\n{'case':44} {'ms':>9} {'base':>9} {'ratio':>6} {'KiB':>9} {'base':>9} {'ratio':>6}")
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            print(f"{result.name:44} {result.seconds * 1000:9.2f}  (not in baseline)")
+            continue
+        time_ratio = result.seconds / base["seconds"] if base["seconds"] else 1
+        memory_ratio = result.peak_bytes / base["peak_bytes"] if base["peak_bytes"] else 1
+        regressed = time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(f"{result.name:44} {result.seconds * 1000:9.2f} {base['seconds'] * 1000:9.2f} {time_ratio:6.2f} "
+              f"{result.peak_bytes / 1024:9.0f} {base['peak_bytes'] / 1024:9.0f} {memory_ratio:6.2f}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20, help="runs of each single region case")
+    parser.add_argument("--only", default="", help="only run cases whose name contains this")
+    parser.add_argument("--save", metavar="JSON", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare the results with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slow down")
+    args = parser.parse_args()
+
+    pygame.init()
+    results = []
+    for case in make_cases(args.repeats):
+        if args.only not in case.name:
+            continue
+        result = measure(case)
+        results.append(result)
+        print(f"{result.name:44} {result.seconds * 1000:9.2f} ms {result.peak_bytes / 1024:9.0f} KiB peak "
+              f"{result.sprites:7} sprites")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": {r.name: asdict(r) for r in results},
+            }, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
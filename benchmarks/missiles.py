@@ -0,0 +1,88 @@
+"""
+Time handle_missile_collisions with hundreds of missiles in flight at once over a generated realm full of
+monsters. Half of the missiles are the player's and half are the monsters'. The missiles are topped back up
+before each frame, so every frame resolves the same number.
+
+Run from the repository root:
+    python -m benchmarks.missiles
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+import pygame
+
+from dungeoneer import items
+from dungeoneer.actors import make_attack_sprite, make_monster_sprite
+from dungeoneer.characters import MonsterType
+from dungeoneer.realms import Realm, handle_missile_collisions
+
+TILE_SIZE = (40, 40)
+REGION_SIZE = (40, 22)
+DIRECTIONS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+def make_realm(monsters, seed=1) -> Realm:
+    realm = Realm((3, 3), TILE_SIZE, REGION_SIZE, seed=seed)
+    realm.generate_map()
+    rng = random.Random(seed)
+    for _ in range(monsters):
+        make_monster_sprite(MonsterType.ZOMBIE, *random_floor_position(realm, rng), realm)
+    return realm
+
+
+def random_floor_position(realm: Realm, rng: random.Random):
+    region = realm.region((rng.randrange(3), rng.randrange(3)))
+    floor = np.argwhere(region.solid_ids == 0)
+    return region.pixel_position(floor[rng.randrange(len(floor))], align="center")
+
+
+def top_up(realm: Realm, count, rng: random.Random):
+    arrows = items.ammo["arrow"]
+    for group, affects_player in ((realm.groups.player_missile, False), (realm.groups.missile, True)):
+        while len(group) < count // 2:
+            x, y = random_floor_position(realm, rng)
+            missile = make_attack_sprite(x, y, rng.choice(DIRECTIONS), arrows, repeats=True)
+            realm.shoot(missile, affects_player)
+
+
+def time_missile_collisions(missiles, monsters, frames):
+    """Returns:
+        list of seconds taken to resolve each frame's missile collisions
+    """
+    realm = make_realm(monsters)
+    rng = random.Random(2)
+    timings = []
+    for _ in range(frames):
+        top_up(realm, missiles, rng)
+        realm.groups.player_missile.update()
+        realm.groups.missile.update()
+        start = time.perf_counter()
+        handle_missile_collisions(realm)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--monsters", type=int, default=200)
+    parser.add_argument("--missiles", type=int, nargs="+", default=(100, 300, 600))
+    args = parser.parse_args()
+
+    pygame.init()
+    for missiles in args.missiles:
+        timings = time_missile_collisions(missiles, args.monsters, args.frames)
+        print(f"{missiles:5} missiles {args.monsters:5} monsters  median {statistics.median(timings) * 1000:7.2f} ms  "
+              f"max {max(timings) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
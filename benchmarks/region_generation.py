@@ -0,0 +1,55 @@
+"""
+Time how long it takes to generate a single region with each of the room generators.
+
+Run from the repository root:
+    python -m benchmarks.region_generation
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import statistics
+import time
+
+import pygame
+
+from dungeoneer.map_maker import generate_map
+from dungeoneer.regions import Region
+from dungeoneer.room_generation import ConnectedRoomGenerator, BossRegionGenerator, \
+    EnclosedBossChamberGenerator, LargeRoomGenerator
+
+GENERATORS = (ConnectedRoomGenerator, BossRegionGenerator, EnclosedBossChamberGenerator, LargeRoomGenerator)
+
+
+def time_region_generation(generator, region_size, repeats):
+    """Returns:
+        list of seconds taken to generate each region
+    """
+    timings = []
+    for seed in range(repeats):
+        region = Region(region_size, tile_size=pygame.Vector2(40, 40))
+        region.exits = {"N": 5, "S": 5, "E": 5, "W": 5}
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        generate_map(region, generator, rng)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--region-size", type=int, nargs=2, default=(40, 22))
+    args = parser.parse_args()
+
+    for generator in GENERATORS:
+        timings = time_region_generation(generator, tuple(args.region_size), args.repeats)
+        print(f"{generator.__name__:30} median {statistics.median(timings) * 1000:7.2f} ms  "
+              f"max {max(timings) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
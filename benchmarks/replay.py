@@ -0,0 +1,120 @@
+"""
+Play a recorded game back as a fixed benchmark scenario and report its frame time profile. Replays are
+deterministic, so the same replay runs exactly the same game on every build and the profiles can be
+compared.
+
+Record a replay by playing the game:
+    python -m benchmarks.replay record game.replay
+Then, from the repository root:
+    python -m benchmarks.replay run game.replay --save baseline.json
+    python -m benchmarks.replay run game.replay --compare baseline.json
+
+Replays run headless by default, which times the simulation on its own. With --windowed every step is also
+drawn, as fast as it can be. --compare exits with status 1 if the median or p99 frame time is slower than the
+baseline by more than the tolerance.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import List
+
+import pygame
+
+from dungeoneer.main import play, replay_game, GameInterrupt
+from dungeoneer.replay import Replay
+
+
+@dataclass
+class Profile:
+    frames: int
+    median: float  # seconds
+    p95: float
+    p99: float
+    max: float
+
+
+def profile(timings: List[float]) -> Profile:
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return Profile(len(ordered), statistics.median(ordered), percentile(0.95), percentile(0.99), ordered[-1])
+
+
+def record(path):
+    try:
+        play(record=path)
+    except GameInterrupt:
+        pass
+    finally:
+        pygame.quit()
+
+
+def run(path, windowed) -> List[float]:
+    """Returns:
+        list of seconds taken by each frame
+    """
+    replay = Replay.load(path)
+    game = replay_game(replay, headless=not windowed)
+    timings = []
+    while not game.playback.finished:
+        start = time.perf_counter()
+        game.step()
+        if windowed:
+            game.draw(game.active_regions())
+        timings.append(time.perf_counter() - start)
+    print(game.state())
+    return timings
+
+
+def compare(result: Profile, baseline: dict, tolerance: float) -> bool:
+    ok = True
+    for name in ("median", "p99"):
+        ratio = getattr(result, name) / baseline[name] if baseline[name] else 1
+        regressed = ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(f"{name:6} {getattr(result, name) * 1000:8.3f} ms  base {baseline[name] * 1000:8.3f} ms  "
+              f"ratio {ratio:5.2f}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("record", "run"))
+    parser.add_argument("replay", help="replay file")
+    parser.add_argument("--windowed", action="store_true", help="draw every step as well")
+    parser.add_argument("--save", metavar="JSON", help="save the profile as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare the profile with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slow down")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.replay)
+        return
+    result = profile(run(args.replay, args.windowed))
+    print(f"{result.frames} frames  median {result.median * 1000:.3f} ms  p95 {result.p95 * 1000:.3f} ms  "
+          f"p99 {result.p99 * 1000:.3f} ms  max {result.max * 1000:.3f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "replay": args.replay,
+                "windowed": args.windowed,
+                "profile": asdict(result),
+            }, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["profile"]
+        if not compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
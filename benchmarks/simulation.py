@@ -0,0 +1,54 @@
+"""
+Time the game's simulation on its own: a headless game with a generated realm, stepped as fast as it will go
+while the player walks east shooting arrows. Nothing is drawn or played, so this is the CPU cost of a step.
+
+Run from the repository root:
+    python -m benchmarks.simulation
+Profile with:
+    python -m cProfile -s cumtime -m benchmarks.simulation
+"""
+import argparse
+import statistics
+import time
+
+import pygame
+
+from dungeoneer import items
+from dungeoneer.main import DungeoneerGame
+
+
+def make_game(seed=1) -> DungeoneerGame:
+    game = DungeoneerGame((1280, 720), realm_size=(4, 4), seed=seed, headless=True)
+    game.initialise_realm()
+    game.place_player((1, 1))
+    arrows = items.ammo["arrow"]
+    arrows.count = 98
+    game.player.inventory.add_item(arrows, slot=2)
+    return game
+
+
+def time_steps(steps, batch=50):
+    """Returns:
+        list of seconds taken per step, averaged over each batch of steps
+    """
+    game = make_game()
+    timings = []
+    for _ in range(steps // batch):
+        start = time.perf_counter()
+        game.step(batch, keys=[pygame.K_d, pygame.K_RETURN])
+        timings.append((time.perf_counter() - start) / batch)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+
+    timings = time_steps(args.steps)
+    print(f"{args.steps:5} steps  median {statistics.median(timings) * 1000:7.3f} ms  "
+          f"max {max(timings) * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,7 @@ import random
 from collections import namedtuple
 from copy import copy
 
-import pygame
-
+from dungeoneer import animation
 from dungeoneer import items
 from dungeoneer.interfaces import SpriteGrouper
 from dungeoneer.items import Ammo
@@ -18,7 +17,7 @@ class Action(abc.ABC):
         self.rate_of_fire = 1
 
     def ready_action(self, owner, target) -> bool:
-        t = pygame.time.get_ticks()
+        t = animation.clock.time
         if t < self.cool_off:
             return False
         if not self.valid_target(owner, target):
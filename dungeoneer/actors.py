@@ -7,7 +7,7 @@ from typing import Union, Optional
 
 import pygame
 
-from dungeoneer import game_assets, treasure, items
+from dungeoneer import animation, game_assets, treasure, items
 from dungeoneer.characters import Character, MonsterType
 from dungeoneer.game_assets import load_sound_file, sfx_file, make_sprite_sheet
 from dungeoneer.interfaces import Item, Collider, SpriteGrouper, Observer
@@ -86,15 +86,15 @@ class Actor(pygame.sprite.Sprite, Collider):
         velocity = pygame.math.Vector2(self.direction)
         velocity.scale_to_length(self.speed)
 
+        # Walls are swept so that the actor stops against them, however fast it moves. See collision.py
+        velocity.x, _ = self.world.clear_motion(self, (int(velocity.x), 0))
         self.rect.x += int(velocity.x)
-        collide_pixel = self.rect.midleft if velocity.x < 0 else self.rect.midright
-
-        if self.world.any_solid_collisions(self, collide_pixel):
+        if self.world.any_solid_collisions(self):
             self.rect.centerx -= int(velocity.x)
             velocity.x = 0
+        _, velocity.y = self.world.clear_motion(self, (0, int(velocity.y)))
         self.rect.y += int(velocity.y)
-        collide_pixel = self.rect.midtop if velocity.y < 0 else self.rect.midbottom
-        if self.world.any_solid_collisions(self, collide_pixel):
+        if self.world.any_solid_collisions(self):
             self.rect.centery -= int(velocity.y)
             velocity.y = 0
         if not velocity:
@@ -103,6 +103,8 @@ class Actor(pygame.sprite.Sprite, Collider):
         for sprite in self._connected_sprites:
             sprite.rect.x += int(velocity.x)
             sprite.rect.y += int(velocity.y)
+            self.world.moved(sprite)
+        self.world.moved(self)
         self.update_filmstrip()
 
         for observer in self.observers["move"]:
@@ -230,7 +232,7 @@ class Player(Actor):
             observer.on_update("gold", Item("gold", count=value))
 
     def attack(self):
-        t = pygame.time.get_ticks()
+        t = animation.clock.time
         if t < self.action_cooloff:
             return None
         weapon_item: Melee = self.inventory.slot(Inventory.ON_HAND) or items.specials["unarmed strike"]
@@ -242,7 +244,7 @@ class Player(Actor):
         return self._place_in_front(dx, dy, missile)
 
     def shoot(self):
-        t = pygame.time.get_ticks()
+        t = animation.clock.time
         if t < self.action_cooloff:
             return None
         weapon_item: Launcher = self.inventory.slot(Inventory.LAUNCHER) or items.specials["thrown"]
@@ -288,8 +290,12 @@ class Player(Actor):
         self.connect(attack_sprite)
         return attack_sprite
 
-    def handle_item_pickup(self, world):
-        pick_ups = pygame.sprite.spritecollide(self, world.items, dokill=False, collided=pygame.sprite.collide_mask)
+    def handle_item_pickup(self, item_sprites):
+        """
+        Args:
+            item_sprites: the item sprites near the player. See Realm.items_in_rect
+        """
+        pick_ups = pygame.sprite.spritecollide(self, item_sprites, dokill=False, collided=pygame.sprite.collide_mask)
         # refresh drop-lock
         self.recently_dropped_items = {item for item in self.recently_dropped_items if item in pick_ups}
         for item in pick_ups:
@@ -341,9 +347,10 @@ class Monster(Actor):
         self.face_direction(self.direction)
 
     def die(self):
-        sprite_sheet, value, scale = treasure.random_treasure(self.character.template.treasure)
+        gold_type, value = treasure.random_gold(self.character.template.treasure)
         if randint(1, 100) < 20:
-            item = GoldItem(0, 0, sprite_sheet.filmstrip(scale=scale), value)
+            horde = gold_type.value
+            item = GoldItem(0, 0, horde.sprite_sheet.filmstrip(scale=horde.scale), value, gold_type.name)
             self.world.drop_item_sprite(item, self.rect.center)
         super().die()
 
@@ -392,6 +399,7 @@ class MissileSprite(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         self.dx, self.dy = direction
+        self.motion = (0, 0)  # pixels moved by the last update
         self.shot_from_item = ammo_item
         self.speed = ammo_item.speed
         self.damage = ammo_item.damage
@@ -410,10 +418,10 @@ class MissileSprite(pygame.sprite.Sprite):
             return
         self.frame %= len(self.filmstrip)
         self.image = self.filmstrip[self.frame]
+        self.motion = (self.dx * self.speed, self.dy * self.speed)
         if not self.dx and not self.dy:
             return
-        self.rect.x += self.dx * self.speed
-        self.rect.y += self.dy * self.speed
+        self.rect.move_ip(self.motion)
 
     def on_impact(self, target, realm: SpriteGrouper):
         if not self.damage_profile:
@@ -0,0 +1,40 @@
+"""
+Animation runs off one clock that the game ticks once per frame. Which frame of a filmstrip is showing is
+then a pure function of the clock's time, the animation's phase and its frame length (see frame_at), so
+nothing needs to keep per-sprite timers or be updated just to animate. Looping scenery, items and animated
+tiles all work this way.
+
+The game ticks the clock to the time simulated so far (see timestep.py) rather than to the time on the wall, so
+the cooldowns of attacks and other actions, which are timed by it too, keep pace with the simulation however fast
+or slow it runs.
+"""
+import pygame
+
+
+def frame_at(time, frame_length, frame_count, phase=0) -> int:
+    """The frame of a looping animation that is showing at time
+
+    Args:
+        time: milliseconds
+        frame_length: milliseconds that each frame is shown for
+        frame_count: number of frames in the loop
+        phase: milliseconds that the animation runs ahead of the clock, to put animations out of step
+    """
+    return int((time + phase) // frame_length) % frame_count
+
+
+class AnimationClock:
+    """Time in milliseconds, as at the last tick, shared by everything that animates or cools off"""
+    def __init__(self, time=0):
+        self.time = time
+
+    def tick(self, time=None):
+        """Move the clock on to time or, by default, to pygame's time now"""
+        self.time = pygame.time.get_ticks() if time is None else time
+
+    def frame(self, frame_length, frame_count, phase=0) -> int:
+        """The frame of a looping animation that is showing now. See frame_at"""
+        return frame_at(self.time, frame_length, frame_count, phase)
+
+
+clock = AnimationClock()  # the game's clock, ticked by the game loop
@@ -0,0 +1,70 @@
+"""
+A realm is far too big to render as a single background surface, so the background is broken
+into chunks, one per region. Chunks are rendered on demand when the camera first needs them and
+the least recently used chunks are thrown away once the cache grows past its byte budget.
+"""
+from collections import OrderedDict
+from typing import Dict
+
+import pygame
+
+from dungeoneer.regions import Region
+
+DEFAULT_BUDGET = 64 * 1024 * 1024  # bytes: enough for a 3x3 block of full screen regions
+
+
+def surface_size_in_bytes(surface: pygame.Surface) -> int:
+    return surface.get_pitch() * surface.get_height()
+
+
+class BackgroundCache:
+    """Least recently used store of rendered region backgrounds
+
+    Args:
+        budget (int): maximum number of bytes of chunk surfaces to keep
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.chunks: Dict[tuple, pygame.Surface] = OrderedDict()
+        self.size_in_bytes = 0
+        self.stub_keys = set()  # chunks rendered before their region was generated
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __contains__(self, region: Region):
+        return region.id_code in self.chunks
+
+    def chunk(self, region: Region) -> pygame.Surface:
+        """Return the rendered background for the region, rendering it if not already cached"""
+        key = region.id_code
+        if key in self.stub_keys and not region.is_stub:
+            self.invalidate(region)  # it has been generated since it was rendered
+        surface = self.chunks.get(key)
+        if surface:
+            self.chunks.move_to_end(key)
+            return surface
+        surface = region.render_tiles()
+        if pygame.display.get_surface():
+            surface = surface.convert()
+        if region.is_stub:
+            self.stub_keys.add(key)
+        self.chunks[key] = surface
+        self.size_in_bytes += surface_size_in_bytes(surface)
+        self.evict()
+        return surface
+
+    def invalidate(self, region: Region):
+        """Discard the cached chunk for the region so that it is re-rendered next time it is needed"""
+        self.stub_keys.discard(region.id_code)
+        surface = self.chunks.pop(region.id_code, None)
+        if surface:
+            self.size_in_bytes -= surface_size_in_bytes(surface)
+
+    def evict(self):
+        """Discard least recently used chunks until within budget. The most recent chunk is always kept."""
+        while self.size_in_bytes > self.budget and len(self.chunks) > 1:
+            key, surface = self.chunks.popitem(last=False)
+            self.stub_keys.discard(key)
+            self.size_in_bytes -= surface_size_in_bytes(surface)
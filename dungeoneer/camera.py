@@ -1,34 +1,250 @@
+"""
+The camera draws the part of the realm that is in view. Sprites that are wholly outside the view are culled
+rather than blitted, so the cost of drawing depends on what is on screen rather than on how much of the realm
+is active:
+
+- regions that are nowhere near the view are skipped along with all of their sprites, without looking at them
+- the sprites of regions near the view, and of the realm's global groups, are tested against the view
+
+The sprites in view are collected into a RenderList of layers: animated tiles, such as water, at the bottom,
+then floor items, effects, monsters, the player, missiles and the HUD on top. Animated tiles are not sprites:
+their frames are worked out from the animation clock as they are collected. Each layer is drawn with one
+Surface.blits call, so the draw order depends only on the layers and not on which region or group a sprite
+is in.
+
+draw_changes is an alternative to drawing everything every frame. It compares the frame's render list with
+the last one and repaints, from the background up, only the parts of the screen where an image has appeared,
+moved, changed or gone. Sprites must replace their image to change how they look, rather than draw on it.
+While the camera scrolls, or when the background changes, the whole screen is drawn as usual.
+
+Frames are not drawn in step with the simulation (see timestep.py). Before each simulation step the game has
+the camera remember where it and the moving sprites are, and sets how far the frame falls between that step and
+the next. The camera and those sprites are then drawn that far along their last move.
+"""
+from enum import IntEnum
+from typing import Dict, List, Tuple, Optional, Set
+
 import pygame
 from pygame import Surface
 
+from dungeoneer import animation
+from dungeoneer.animation import AnimationClock, frame_at
+from dungeoneer.background import BackgroundCache
+from dungeoneer.interfaces import SpriteGroups
 from dungeoneer.realms import Realm
+from dungeoneer.regions import Region
+
+
+class Layer(IntEnum):
+    """Layers of a frame, drawn lowest first"""
+    ANIMATED_TILES = 0
+    FLOOR_ITEMS = 1
+    EFFECTS = 2
+    MONSTERS = 3
+    PLAYER = 4
+    MISSILES = 5
+    HUD = 6
+
+
+class RenderList:
+    """The images to draw in a frame, collected layer by layer and then drawn with one Surface.blits call
+    per layer. Within a layer, images are drawn in the order that they were added."""
+    def __init__(self):
+        self.layers: Dict[Layer, List[Tuple[Surface, pygame.Rect]]] = {layer: [] for layer in Layer}
+
+    def __len__(self):
+        return sum(len(images) for images in self.layers.values())
+
+    def extend(self, layer: Layer, images):
+        """Add (image, destination rect) pairs to the layer"""
+        self.layers[layer].extend(images)
+
+    def keys(self) -> Set[Tuple[Surface, Tuple[int, int, int, int]]]:
+        """Every (image, destination) pair in a hashable form, for comparing one frame with another"""
+        return {(image, tuple(rect)) for images in self.layers.values() for image, rect in images}
+
+    def y_sort(self, layer: Layer):
+        """Order the layer by the bottom edge of each image, so that things nearer the bottom of the screen
+        are drawn in front"""
+        self.layers[layer].sort(key=lambda pair: pair[1].bottom)
+
+    def draw(self, surface: Surface, area: pygame.Rect = None):
+        """Draw every layer or, if area is given, only the images that overlap it"""
+        for layer in Layer:
+            images = self.layers[layer]
+            if area:
+                images = [pair for pair in images if area.colliderect(pair[1])]
+            surface.blits(images, doreturn=False)
 
 
 class Camera:
-    def __init__(self, display_surface: Surface, realm: Realm, position=(0, 0)):
+    """
+    Args:
+        y_sort (bool): if True then the player and monsters are drawn as one layer ordered by how far down the
+                       screen their feet are, so that whoever is in front overlaps whoever is behind
+        clock (AnimationClock): clock to animate tiles by. Defaults to the game's clock
+    """
+    def __init__(self, display_surface: Surface, realm: Realm, position=(0, 0), y_sort=False,
+                 clock: AnimationClock = None):
         super().__init__()
         self.display_surface = display_surface
         self.offset = -1 * pygame.math.Vector2(position)
         self.realm = realm
-        self.visible_sprite_count = 0
+        self.y_sort = y_sort
+        self.clock = clock or animation.clock
+        self.visible_sprite_count = 0  # sprites drawn by the last draw_all
+        self.culled_sprite_count = 0  # sprites skipped by the last draw_all because they were out of view
+        self.last_frame = None  # what draw_changes drew last. See draw_changes
+        self.interpolation = 1.0  # how far, from 0 to 1, to draw things along their last move
+        self.previous_offset = None
+        self.previous_positions: Dict[pygame.sprite.Sprite, Tuple[int, int]] = {}
+
+    @property
+    def draw_offset(self) -> pygame.math.Vector2:
+        """The offset to draw at, part way along the camera's last move"""
+        if self.previous_offset is None or self.interpolation >= 1:
+            return self.offset
+        return self.previous_offset.lerp(self.offset, self.interpolation)
+
+    @property
+    def screen_offset(self) -> Tuple[int, int]:
+        """draw_offset in whole pixels"""
+        ox, oy = self.draw_offset
+        return round(ox), round(oy)
+
+    @property
+    def view_rect(self) -> pygame.Rect:
+        """The area of the realm, in pixels, that is visible on the display"""
+        ox, oy = self.screen_offset
+        return pygame.Rect((-ox, -oy), self.display_surface.get_size())
+
+    def remember_positions(self, sprites):
+        """Note where the camera and the sprites are before a simulation step, so that frames drawn before the
+        next step can show them part way along the step's move"""
+        self.previous_offset = pygame.math.Vector2(self.offset)
+        self.previous_positions = {sprite: sprite.rect.topleft for sprite in sprites}
+
+    def draw_background(self, background: BackgroundCache):
+        """Compose the background from the chunks of the regions that are in view"""
+        ox, oy = self.screen_offset
+        for region in self.realm.regions_in_pixel_rect(self.view_rect):
+            x, y = region.pixel_base
+            self.display_surface.blit(background.chunk(region), (x + ox, y + oy))
 
     @staticmethod
-    def draw_groups(groups):
-        return (groups.player, groups.monster, groups.missile, groups.player_missile,
-                groups.items, groups.effects)
+    def layer_groups(groups: SpriteGroups):
+        """The groups of sprites drawn in each layer"""
+        return ((Layer.FLOOR_ITEMS, groups.items), (Layer.EFFECTS, groups.effects), (Layer.MONSTERS, groups.monster),
+                (Layer.PLAYER, groups.player), (Layer.MISSILES, groups.missile),
+                (Layer.MISSILES, groups.player_missile), (Layer.HUD, groups.hud))
 
     def draw_all(self, active_regions):
-        """Draw all drawable groups in each nearby region plus in the realm's global group"""
-        position = -1 * self.offset
-        all_groups = [region.groups for region in active_regions]
-        all_groups.append(self.realm.groups)
-        self.visible_sprite_count = 0
-        for groups in all_groups:
-            for group in self.draw_groups(groups):
-                for sprite in group.sprites():
-                    offset_pos = sprite.rect.topleft + self.offset
-                    self.display_surface.blit(sprite.image, offset_pos)
-                    self.visible_sprite_count += 1
+        """Draw the sprites in view from all drawable groups in each nearby region plus in the realm's global
+        group. Counts the sprites drawn and culled."""
+        self.render_list(active_regions).draw(self.display_surface)
+
+    def render_list(self, active_regions) -> RenderList:
+        """Collect the sprites in view into layers, ready to draw"""
+        view = self.view_rect
+        # A sprite can hang over the edge of the region that holds it
+        tile_width, tile_height = self.realm.tile_size
+        near_view = set(self.realm.region_coords_in_pixel_rect(view.inflate(4 * tile_width, 4 * tile_height)))
+        render_list = RenderList()
+        self.visible_sprite_count = self.culled_sprite_count = 0
+        for region in active_regions:
+            if region.id_code in near_view:
+                self.collect_animated_tiles(region, view, render_list)
+                self.collect(region.groups, view, render_list)
+            else:
+                groups = region.groups
+                total = sum(len(group) for _, group in self.layer_groups(groups))
+                self.culled_sprite_count += total - len(groups.items)  # items are counted in effects as well
+        self.collect(self.realm.groups, view, render_list)
+        if self.y_sort:
+            render_list.extend(Layer.MONSTERS, render_list.layers[Layer.PLAYER])
+            render_list.layers[Layer.PLAYER] = []
+            render_list.y_sort(Layer.MONSTERS)
+        return render_list
+
+    def collect_animated_tiles(self, region: Region, view: pygame.Rect, render_list: RenderList):
+        ox, oy = self.screen_offset
+        time = self.clock.time
+        images = []
+        for (x, y), tile, phase in region.animated_tiles:
+            rect = pygame.Rect(x, y, tile.width, tile.height)
+            if rect.colliderect(view):
+                frame = frame_at(time, tile.frame_length, len(tile.filmstrip), phase)
+                images.append((tile.filmstrip[frame], rect.move(ox, oy)))
+        render_list.extend(Layer.ANIMATED_TILES, images)
+
+    def collect(self, groups: SpriteGroups, view: pygame.Rect, render_list: RenderList):
+        ox, oy = self.screen_offset
+        for layer, group in self.layer_groups(groups):
+            sprites = [sprite for sprite in group.sprites() if sprite.rect.colliderect(view)]
+            culled = len(group) - len(sprites)
+            if layer == Layer.EFFECTS:
+                # items are effects as well but are drawn, and counted, in their own layer
+                items = set(groups.items.sprites())
+                in_view = len(sprites)
+                sprites = [sprite for sprite in sprites if sprite not in items]
+                culled -= len(items) - (in_view - len(sprites))
+            pairs = [(sprite.image, sprite.rect.move(ox, oy)) for sprite in sprites]
+            if self.previous_positions and self.interpolation < 1:
+                self.interpolate(sprites, pairs)
+            render_list.extend(layer, pairs)
+            self.visible_sprite_count += len(sprites)
+            self.culled_sprite_count += culled
+
+    def interpolate(self, sprites, pairs):
+        """Move the destinations of sprites that moved in the last step back towards where they were before it"""
+        t = self.interpolation
+        ox, oy = self.draw_offset
+        previous_positions = self.previous_positions
+        for sprite, (_, rect) in zip(sprites, pairs):
+            previous = previous_positions.get(sprite)
+            if previous is None or previous == sprite.rect.topleft:
+                continue
+            (px, py), (x, y) = previous, sprite.rect.topleft
+            # Rounded after adding the offset, so that the player and the camera move together
+            rect.topleft = round(px + (x - px) * t + ox), round(py + (y - py) * t + oy)
+
+    def draw_changes(self, background: BackgroundCache, active_regions,
+                     overlay=()) -> Optional[List[pygame.Rect]]:
+        """Draw the frame, repainting only the parts of the screen that have changed since the last call.
+
+        Args:
+            background: cache of region backgrounds. If any chunk in view is not the one used last time then
+                        the whole screen is drawn
+            active_regions: regions whose sprites to draw, as for draw_all
+            overlay: (image, position) pairs to draw over everything else, such as the HUD
+        Returns:
+            screen rects that were repainted, to pass to pygame.display.update, or None if the whole screen
+            was drawn
+        """
+        render_list = self.render_list(active_regions)
+        render_list.extend(Layer.HUD, [(image, image.get_rect(topleft=tuple(position)[:2]))
+                                       for image, position in overlay])
+        chunks = tuple(background.chunk(region) for region in self.realm.regions_in_pixel_rect(self.view_rect))
+        frame = self.screen_offset, chunks, render_list.keys()
+        last_frame, self.last_frame = self.last_frame, frame
+        screen_rect = self.display_surface.get_rect()
+        if last_frame is None or last_frame[:2] != frame[:2]:
+            return self.draw_everything(background, render_list)
+
+        changed = {tuple(pygame.Rect(rect).clip(screen_rect)) for _, rect in last_frame[2] ^ frame[2]}
+        dirty = [pygame.Rect(rect) for rect in changed if rect[2] and rect[3]]
+        if sum(rect.width * rect.height for rect in dirty) > screen_rect.width * screen_rect.height // 2:
+            return self.draw_everything(background, render_list)
+        for rect in dirty:
+            self.display_surface.set_clip(rect)
+            self.draw_background(background)
+            render_list.draw(self.display_surface, rect)
+        self.display_surface.set_clip(None)
+        return dirty
+
+    def draw_everything(self, background: BackgroundCache, render_list: RenderList) -> None:
+        self.draw_background(background)
+        render_list.draw(self.display_surface)
 
     def move(self, by_vector):
         if by_vector:
@@ -0,0 +1,216 @@
+"""
+Walls and other solid tiles never move, so they are not collided with as sprites. Instead each region's
+solid tile layer is used as a grid: a hitbox is turned into the range of tile coordinates that it covers and
+only those few tiles are looked at. The cost of a check depends on the size of the hitbox, not on how many
+walls there are.
+
+Things that move, like monsters, are still sprites in the solid groups and are found through the realm's
+spatial hashes.
+
+Many small hitboxes, such as a frame's missiles, can be tested together with solid_corner_hits, which looks
+up the tiles under all of their corners with one numpy index per region.
+
+Something that moves a long way in one step could jump clean over a thin wall if only its new position were
+tested. sweep_solid_tiles instead walks the hitbox along its motion through the grid (a DDA, as used to
+trace rays through a voxel grid), looking only at the tiles that its leading edges cross, and stops it
+against the first solid one. The cost depends on the number of tiles crossed, not on the speed.
+"""
+import math
+from typing import Optional, Tuple, Iterable, Mapping, List, Sequence, Callable
+
+import numpy as np
+import pygame
+
+from dungeoneer.regions import Region
+from dungeoneer.scenery import StaticSolid
+
+TilePosition = Tuple[int, int]
+
+EPSILON = 1e-9  # allowance for float error in positions that land exactly on a tile edge
+
+
+def scale_rect(rect: pygame.Rect, ratio=1.0) -> pygame.Rect:
+    """The rect scaled about its centre in the same way as pygame.sprite.collide_rect_ratio"""
+    if ratio == 1:
+        return rect
+    width, height = rect.width, rect.height
+    return rect.inflate(width * ratio - width, height * ratio - height)
+
+
+def rects_collide(a: pygame.Rect, b: pygame.Rect, ratio=1.0) -> bool:
+    """True if the rects overlap once both are scaled by ratio"""
+    return scale_rect(a, ratio).colliderect(scale_rect(b, ratio))
+
+
+def tile_area(region: Region, rect: pygame.Rect, ratio=1.0):
+    """numpy index of the region's tiles that the rect overlaps, when the tiles are scaled by ratio.
+    The rect is in realm pixels and is not scaled."""
+    bx, by = region.pixel_base
+    margin_x = region.tile_width * (1 - ratio) / 2
+    margin_y = region.tile_height * (1 - ratio) / 2
+    left = math.floor((rect.left - bx + margin_x) / region.tile_width)
+    top = math.floor((rect.top - by + margin_y) / region.tile_height)
+    right = math.ceil((rect.right - bx - margin_x) / region.tile_width)
+    bottom = math.ceil((rect.bottom - by - margin_y) / region.tile_height)
+    return region.area((left, top), (right - left, bottom - top))
+
+
+def solid_tile_in_region(region: Region, rect: pygame.Rect, ratio=1.0) -> Optional[TilePosition]:
+    """Position of the first solid tile of the region that the rect collides with, or None.
+
+    Args:
+        rect: hitbox in realm pixels
+        ratio: both the hitbox and the tiles are scaled by this before testing, as for
+               pygame.sprite.collide_rect_ratio
+    """
+    area = tile_area(region, scale_rect(rect, ratio), ratio)
+    window = region.solid_ids[area]
+    if not window.any():
+        return None
+    column, row = np.argwhere(window)[0]
+    return int(column) + area[0].start, int(row) + area[1].start
+
+
+def solid_tile_hit(regions: Iterable[Region], rect: pygame.Rect, ratio=1.0) -> Optional[StaticSolid]:
+    """The first solid tile in any of the regions that the rect collides with, or None.
+    Pass all the regions that the rect overlaps to collide across region boundaries."""
+    for region in regions:
+        position = solid_tile_in_region(region, rect, ratio)
+        if position is not None:
+            return StaticSolid(pygame.Rect(region.pixel_position(position), (region.tile_width, region.tile_height)))
+    return None
+
+
+def solid_tiles_at(regions: Mapping[TilePosition, Region], region_size, columns: np.ndarray,
+                   rows: np.ndarray) -> np.ndarray:
+    """For each realm tile coordinate, True if there is a solid tile there. Coordinates in regions that are
+    not in the mapping are not solid."""
+    region_width, region_height = region_size
+    region_x, local_x = np.divmod(columns, region_width)
+    region_y, local_y = np.divmod(rows, region_height)
+    solid = np.zeros(len(columns), dtype=bool)
+    if not len(columns):
+        return solid
+    # One key per region. Much quicker to find the unique ones of than (x, y) pairs
+    top, height = region_y.min(), region_y.max() - region_y.min() + 1
+    keys = region_x * height + (region_y - top)
+    for key in np.unique(keys):
+        rx, ry = divmod(int(key), int(height))
+        region = regions.get((rx, ry + int(top)))
+        if region is None:
+            continue
+        selected = keys == key
+        solid[selected] = region.solid_ids[local_x[selected], local_y[selected]] != 0
+    return solid
+
+
+def solid_corner_hits(regions: Mapping[TilePosition, Region], tile_size, region_size,
+                      rects: Sequence[pygame.Rect]) -> List[Optional[StaticSolid]]:
+    """The solid tile that each rect collides with, or None, for rects no bigger than a tile.
+    A rect that small only overlaps the tiles under its corners, so only those are looked up."""
+    tile_width, tile_height = tile_size
+    if not rects:
+        return []
+    boxes = np.array([tuple(rect) for rect in rects]).reshape(-1, 4)
+    lefts, tops = boxes[:, 0], boxes[:, 1]
+    rights, bottoms = lefts + np.maximum(boxes[:, 2], 1) - 1, tops + np.maximum(boxes[:, 3], 1) - 1
+    # corners in the order that solid_tile_in_region looks at tiles: column by column
+    columns = np.floor_divide(np.stack([lefts, lefts, rights, rights], axis=1), tile_width).astype(int)
+    rows = np.floor_divide(np.stack([tops, bottoms, tops, bottoms], axis=1), tile_height).astype(int)
+    solid = solid_tiles_at(regions, region_size, columns.ravel(), rows.ravel()).reshape(-1, 4)
+    hits: List[Optional[StaticSolid]] = [None] * len(rects)
+    for index in np.flatnonzero(solid.any(axis=1)):
+        corner = int(np.argmax(solid[index]))
+        x, y = columns[index, corner] * tile_width, rows[index, corner] * tile_height
+        hits[index] = StaticSolid(pygame.Rect(x, y, tile_width, tile_height))
+    return hits
+
+
+def sweep_solid_tiles(solid_at: Callable[[int, int], bool], tile_size, rect: pygame.Rect, motion,
+                      ratio=1.0) -> Tuple[Tuple[int, int], Optional[TilePosition]]:
+    """Move the rect along the motion, tile boundary by tile boundary, until it runs into a solid tile.
+
+    Args:
+        solid_at: True if there is a solid tile at the (column, row) given in realm tile coordinates
+        tile_size: pixel size of the tiles
+        rect: hitbox in realm pixels at the start of the motion
+        motion: (x, y) pixel motion
+        ratio: both the hitbox and the tiles are scaled by this, as for solid_tile_in_region
+    Returns:
+        (x, y) whole pixel motion that can be made without colliding and the solid tile that stopped it,
+        or the full motion and None. Solid tiles that the rect already overlaps at the start are ignored, so
+        that something caught in a wall can still move out of it.
+    """
+    fraction, tile = _sweep_fraction(solid_at, tile_size, rect, motion, ratio)
+    if tile is None:
+        return tuple(motion), None
+    return tuple(_truncate(distance * fraction) for distance in motion), tile
+
+
+def _sweep_fraction(solid_at: Callable[[int, int], bool], tile_size, rect: pygame.Rect, motion,
+                   ratio=1.0) -> Tuple[float, Optional[TilePosition]]:
+    """How far along the motion, from 0 to 1, the rect can go before it overlaps a solid tile, and that tile.
+    See sweep_solid_tiles."""
+    tile_width, tile_height = tile_size
+    rect = scale_rect(rect, ratio)
+    # Shrinking the hitbox by the tile margin is the same as shrinking the tiles. See tile_area
+    margin_x, margin_y = tile_width * (1 - ratio) / 2, tile_height * (1 - ratio) / 2
+    left, right = rect.left + margin_x, rect.right - margin_x
+    top, bottom = rect.top + margin_y, rect.bottom - margin_y
+    if left >= right or top >= bottom:
+        return 1.0, None
+    overlapped = {(column, row) for column in _tile_span(left, right, tile_width)
+                  for row in _tile_span(top, bottom, tile_height) if solid_at(column, row)}
+    if overlapped:
+        solid_at = _ignoring(solid_at, overlapped)
+
+    dx, dy = motion
+    next_x, column, step_x, interval_x = _first_crossing(left, right, dx, tile_width)
+    next_y, row, step_y, interval_y = _first_crossing(top, bottom, dy, tile_height)
+    while min(next_x, next_y) < 1:
+        if next_x <= next_y:
+            # the leading edge enters a new column. Include a row that it enters at the same moment
+            t = next_x
+            rows = _tile_span(top + t * dy, bottom + t * dy, tile_height, row if next_y == t else None)
+            for row_ in rows:
+                if solid_at(column, row_):
+                    return t, (column, row_)
+            column += step_x
+            next_x += interval_x
+        else:
+            t = next_y
+            for column_ in _tile_span(left + t * dx, right + t * dx, tile_width):
+                if solid_at(column_, row):
+                    return t, (column_, row)
+            row += step_y
+            next_y += interval_y
+    return 1.0, None
+
+
+def _ignoring(solid_at: Callable[[int, int], bool], tiles) -> Callable[[int, int], bool]:
+    return lambda column, row: (column, row) not in tiles and solid_at(column, row)
+
+
+def _tile_span(low, high, size, extra=None) -> List[int]:
+    """Indices of the tiles that the pixel span from low to high overlaps, plus extra if given"""
+    indices = list(range(math.floor((low + EPSILON) / size), math.ceil((high - EPSILON) / size)))
+    if extra is not None and extra not in indices:
+        indices.append(extra)
+    return indices
+
+
+def _first_crossing(low, high, delta, size):
+    """For a span moving by delta, when its leading edge first enters a new tile (as a fraction of delta),
+    that tile's index, the direction of travel and the fraction between one tile and the next"""
+    if delta > 0:
+        index = math.ceil((high - EPSILON) / size)
+        return (index * size - high) / delta, index, 1, size / delta
+    if delta < 0:
+        index = math.floor((low + EPSILON) / size) - 1
+        return ((index + 1) * size - low) / delta, index, -1, size / -delta
+    return math.inf, None, 0, math.inf
+
+
+def _truncate(distance) -> int:
+    """Whole pixels towards zero, without losing a pixel to float error"""
+    return int(distance + EPSILON) if distance > 0 else int(distance - EPSILON)
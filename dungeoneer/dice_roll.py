@@ -1,11 +1,11 @@
 import random
 
 
-def pick_from_weighted_table(table):
+def pick_from_weighted_table(table, rng=random):
     """A weighted table is a dict where the values are the relative probability (weight)"""
-    choices = random.choices(list(table.keys()), weights=list(table.values()))
+    choices = rng.choices(list(table.keys()), weights=list(table.values()))
     return choices[0]
 
 
-def dice(n, d):
-    return sum(random.randint(1, d) for _ in range(n))
+def dice(n, d, rng=random):
+    return sum(rng.randint(1, d) for _ in range(n))
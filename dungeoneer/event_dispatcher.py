@@ -4,6 +4,15 @@ from typing import List, DefaultDict
 import pygame
 
 
+class HeldKeys:
+    """Keyboard state with just the given keys held down, in place of pygame.key.get_pressed"""
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
 class KeyEventDispatcher:
     def __init__(self):
         # match an event id to a list of observers
@@ -33,8 +33,21 @@ def _make_sprite_sheet(filename, sheet_dimensions, sub_area=None):
     return SpriteSheet(image, columns=columns, rows=rows, sub_area=sub_area)
 
 
-@lru_cache(maxsize=1000)
+class NullSound:
+    """Stands in for a sound when there is no mixer to play it, as in a headless game"""
+    def play(self, *args, **kwargs):
+        del args
+        del kwargs
+
+
 def load_sound_file(filename):
+    if not pygame.mixer.get_init():
+        return NullSound()
+    return _load_sound_file(filename)
+
+
+@lru_cache(maxsize=1000)
+def _load_sound_file(filename):
     return pygame.mixer.Sound(filename)
 
 
@@ -24,12 +24,21 @@ class SpriteGroups:
 
 
 class Collider(Protocol):
+    rect: pygame.Rect
+    collide_ratio: float
+
     def collided(self, group: pygame.sprite.Group):
         ...
 
 
 class SpriteGrouper(Protocol):
-    def any_solid_collisions(self, other: Collider, position: Tuple[int]) -> bool:
+    def any_solid_collisions(self, other: Collider) -> bool:
+        ...
+
+    def clear_motion(self, other: Collider, motion) -> Tuple[int, int]:
+        ...
+
+    def moved(self, sprite):
         ...
 
     def shoot(self, sprite, affects_player):
@@ -124,9 +124,10 @@ all_items = {**ammo, **weapons, **armour, **launchers, **food, **potions}
 class GoldItem(VisualEffect):
     """Gold is not an item because it does not fill up slots in the inventory.
     Instead, it has a side-effect when picked up (increases gold score)"""
-    def __init__(self, x, y, filmstrip, value):
+    def __init__(self, x, y, filmstrip, value, gold_type="GOLD_COINS"):
         super().__init__(x, y, filmstrip, repeats=VisualEffect.FOREVER)
         self.value = value
+        self.gold_type = gold_type  # name of the treasure.GoldType so that the sprite can be made again
         self.sound_effect = load_sound_file(sfx_file("handleCoins.ogg"))
 
     def on_pick_up(self, player):
@@ -0,0 +1,88 @@
+"""
+A region layout is the outcome of map generation for a single region, without any sprites or surfaces.
+It is small and picklable so it can be passed between processes and rebuilt into a region later.
+"""
+from dataclasses import dataclass, fields
+from typing import Dict, Tuple, List, Optional, Sequence, Union
+
+import numpy as np
+
+from dungeoneer.characters import MonsterType
+from dungeoneer.regions import Region, Tile, TileType
+from dungeoneer.rooms import Room
+from dungeoneer.spawn import make_treasure_tile, make_item_tile
+
+Coordinate = Tuple[int, int]
+RoomSpec = Union[Tuple[int, int, int, int], Tuple[Coordinate, ...]]
+
+TILE_MAKERS = {
+    "tile": lambda name: TileType[name].value,
+    "treasure": make_treasure_tile,
+    "item": make_item_tile,
+}
+
+
+def tile_from_spec(spec: tuple) -> Tile:
+    kind, *args = spec
+    return TILE_MAKERS[kind](*args)
+
+
+def spec_from_tile(tile: Tile) -> tuple:
+    if not tile.spec:
+        raise ValueError(f"Tile {tile} has no spec so can not be included in a layout")
+    return tile.spec
+
+
+def spec_from_room(room: Sequence) -> RoomSpec:
+    """A Room is kept as its rect. Any other room is kept as its cells"""
+    if isinstance(room, Room):
+        return room.rect
+    return tuple((int(x), int(y)) for x, y in room)
+
+
+def room_from_spec(spec: RoomSpec) -> Sequence:
+    if len(spec) == 4 and not isinstance(spec[0], (tuple, list)):
+        return Room(*spec)
+    return [tuple(cell) for cell in spec]
+
+
+@dataclass(eq=False)
+class RegionLayout:
+    name: str
+    palette: List[Optional[tuple]]  # tile specs. Entry 0 is unused
+    tile_ids: np.ndarray
+    solid_ids: np.ndarray
+    overlay_ids: np.ndarray
+    monster_eggs: Dict[Coordinate, str]
+    rooms: List[RoomSpec]  # x, y, width, height of a Room, or the (x, y) cells of any other room
+    room_ids: np.ndarray
+
+    def __eq__(self, other):
+        if not isinstance(other, RegionLayout):
+            return NotImplemented
+        layers = ("tile_ids", "solid_ids", "overlay_ids", "room_ids")
+        return (all(np.array_equal(getattr(self, layer), getattr(other, layer)) for layer in layers) and
+                all(getattr(self, f.name) == getattr(other, f.name) for f in fields(self) if f.name not in layers))
+
+
+def layout_from_region(region: Region) -> RegionLayout:
+    return RegionLayout(
+        name=region.name,
+        palette=[None, *(spec_from_tile(tile) for tile in region.palette[1:])],
+        tile_ids=region.tile_ids.copy(),
+        solid_ids=region.solid_ids.copy(),
+        overlay_ids=region.overlay_ids.copy(),
+        monster_eggs={tuple(p): monster_type.name for p, monster_type in region.monster_eggs.items()},
+        rooms=[spec_from_room(room) for room in region.rooms],
+        room_ids=region.rooms.index_grid.copy()
+    )
+
+
+def apply_layout(layout: RegionLayout, region: Region) -> Region:
+    """Rebuild the region's map from the layout. Sprites are not created: use Region.build_world for that"""
+    palette = [None, *(tile_from_spec(spec) for spec in layout.palette[1:])]
+    region.name = layout.name
+    region.set_layers(palette, layout.tile_ids, layout.solid_ids, layout.overlay_ids)
+    region.monster_eggs = {p: MonsterType[name] for p, name in layout.monster_eggs.items()}
+    region.rooms.set_rooms([room_from_spec(spec) for spec in layout.rooms], layout.room_ids)
+    return region
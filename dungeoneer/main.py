@@ -1,17 +1,20 @@
 import threading
 from contextlib import suppress
+from dataclasses import dataclass
 
 import pygame
 from pygame.rect import Rect
 
+from dungeoneer import animation
 from dungeoneer import intro
 from dungeoneer import items
 from dungeoneer import screen
 from dungeoneer import sprite_effects
 from dungeoneer.actors import Player, Monster
+from dungeoneer.background import BackgroundCache
 from dungeoneer.camera import Camera
 from dungeoneer.characters import Character, PlayerCharacterType
-from dungeoneer.event_dispatcher import KeyEventDispatcher
+from dungeoneer.event_dispatcher import KeyEventDispatcher, HeldKeys
 from dungeoneer.events import WARNING_EVENT
 from dungeoneer.fonts import make_font
 from dungeoneer.game_assets import image_file, make_sprite_sheet
@@ -20,29 +23,65 @@ from dungeoneer.inventory_controller import InventoryController
 from dungeoneer.inventory_view import InventoryView
 from dungeoneer.item_sprites import make_item_sprite
 from dungeoneer.messages import Messages
+from dungeoneer.profiler import FrameProfiler
 from dungeoneer.realms import Realm, handle_missile_collisions
 from dungeoneer.regions import Region, NoFreeSpaceFound
+from dungeoneer.replay import Replay, ReplayRecorder, ReplayPlayback
 from dungeoneer.score_bar import ScoreBar, NumericScoreBar
 from dungeoneer.sound_effects import start_music
 from dungeoneer.spritesheet import SpriteSheet
+from dungeoneer.timestep import FixedTimestep
 
 GENERATOR_EVENT = pygame.USEREVENT + 1
+PLAY_SETTINGS = {"screen_size": (screen.WIDTH, screen.HEIGHT), "lazy_generation": True, "streaming_radius": 2,
+                 "bake_scenery": True}  # DungeoneerGame arguments for play. Recorded in replays
+START_REGION = (5, 5)
 
 
 class GameInterrupt(RuntimeError):
     """Raised to signal game end"""
 
 
+@dataclass
+class GameState:
+    """What a headless game looks like after a step. See DungeoneerGame.state"""
+    step: int
+    time: float  # milliseconds simulated
+    player_position: tuple[int, int]
+    player_vitality: int
+    player_gold: int
+    monsters: int
+    missiles: int
+
+
 class DungeoneerGame:
-    def __init__(self, screen_size: tuple[int, int], tile_size=(40, 40), realm_size=(10, 10)):
-        pygame.mixer.pre_init(frequency=44100)
-        pygame.init()
-        pygame.mixer.init(frequency=44100)
+    """
+    Args:
+        dirty_rects (bool): if True then only the parts of the screen that change are redrawn, except while the
+                            camera scrolls. See Camera.draw_changes
+        fps (int): most frames to draw per second, or 0 to draw as often as possible
+        simulation_rate (int): simulation steps per second, however often frames are drawn. See timestep.py
+        headless (bool): if True then no display, mixer or fonts are set up, and the game is driven by step
+                         rather than game_loop. Sprites are still made and moved, so everything but drawing and
+                         sound is simulated as in the game
+    """
+    def __init__(self, screen_size: tuple[int, int], tile_size=(40, 40), realm_size=(10, 10), seed=None,
+                 generation_workers=0, lazy_generation=False, realm_cache=None, streaming_radius=None,
+                 bake_scenery=False, dirty_rects=False, fps=40, simulation_rate=40, headless=False):
+        self.headless = headless
+        if headless:
+            self.screen = pygame.Surface(screen_size)
+        else:
+            pygame.mixer.pre_init(frequency=44100)
+            pygame.init()
+            pygame.mixer.init(frequency=44100)
+            screen_flags = pygame.DOUBLEBUF  # | pygame.FULLSCREEN
+            self.screen = pygame.display.set_mode(screen_size, screen_flags)
         self.clock = pygame.time.Clock()
-        screen_flags = pygame.DOUBLEBUF  # | pygame.FULLSCREEN
-        self.screen = pygame.display.set_mode(screen_size, screen_flags)
         self.region_size = screen_size[0] // tile_size[0], screen_size[1] // tile_size[1]
-        self.realm = Realm(realm_size, tile_size, self.region_size)
+        self.realm = Realm(realm_size, tile_size, self.region_size, seed=seed, workers=generation_workers,
+                           lazy=lazy_generation, cache_file=realm_cache, streaming_radius=streaming_radius,
+                           bake_scenery=bake_scenery)
         self.region = None
         self.background = None
         self.player = None
@@ -50,16 +89,29 @@ class DungeoneerGame:
         self.key_event_dispatcher = KeyEventDispatcher()
         self.message_store = Messages()
         self.static_sprites = pygame.sprite.Group()
-        self.fps = 40
+        self.fps = fps
+        self.timestep = FixedTimestep(simulation_rate)
+        self.dirty_rects = dirty_rects
+        self.hud_bar = pygame.Surface((screen.WIDTH, 50))
+        self.debug_text = None
+        self.debug_surface = None
+        self.profiler = FrameProfiler()
+        self.profiler_report = None
+        self.profiler_surface = None
+        self.captions = {}  # rendered debug text, by text and colour
+        self.recorder: ReplayRecorder = None  # records the input of each step, if set
+        self.playback: ReplayPlayback = None  # plays back the input of each step in place of the player's
 
     def initialise_realm(self):
         self.realm.generate_map()
-        self.background = self.realm.render_tiles()
+        self.background = BackgroundCache()
 
     def place_player(self, in_region):
         self.region = self.realm.region(in_region)
         x, y = self.region.pixel_base
         region_offset = (self.region.pixel_width // 2, self.region.pixel_height // 2)
+        self.realm.generate_regions_near((x + region_offset[0], y + region_offset[1]))
+        self.stream_regions((x + region_offset[0], y + region_offset[1]))
         self.player = create_player(self.realm, (x + region_offset[0], y + region_offset[1]))
         self.camera = Camera(self.screen, self.realm, position=(x, y))
         self.player.add_observer(self.realm, "move")
@@ -70,32 +122,131 @@ class DungeoneerGame:
         create_health_bar(self.player, self.static_sprites)
         create_gold_score(self.player, self.static_sprites)
         InventoryView(self.player.inventory, screen.WIDTH - 80, 200, sprite_groups=[self.static_sprites])
+
+    def add_controllers(self):
+        """Let key presses drive the player's inventory. Needs no display, so a headless game has them too."""
         self.key_event_dispatcher.register(InventoryController(self.player.inventory, self.player))
 
     def game_loop(self):
         while True:
-            handle_events(self.key_event_dispatcher, self.player, self.message_store)
+            elapsed = self.clock.tick(self.fps)
+            self.step(self.timestep.advance(elapsed))
+            animation.clock.tick(self.timestep.time + self.timestep.accumulator)
+            self.camera.interpolation = self.timestep.alpha
+            self.draw(self.active_regions())
+            self.profiler.end_frame()
+
+    def step(self, n=1, keys=None):
+        """Simulate n steps, as fast as they can be run.
+
+        Args:
+            keys: pygame key constants of the keys to hold down throughout, for a headless game. If None then
+                  events and the keyboard are read from pygame or the replay being played back
+        """
+        for _ in range(n):
+            self.timestep.steps += 1
+            animation.clock.tick(self.timestep.time)
+            self.simulate(None if keys is None else HeldKeys(keys))
+            if self.headless:
+                self.profiler.end_frame()  # nothing is drawn, so a step is a frame
+
+    def simulate(self, keys=None):
+        """Move the game on by one step
+
+        Args:
+            keys: keyboard state to move the player by, such as HeldKeys. If None then events and the keyboard
+                  are read from pygame or the replay being played back
+        """
+        phase = self.profiler.phase
+        active_regions = self.active_regions()
+        self.camera.remember_positions(self.moving_sprites(active_regions))
+        with phase("events"):
+            if keys is None and self.headless:
+                keys = self.playback.play_step(self.key_event_dispatcher) if self.playback else HeldKeys()
+            if keys is None:
+                handle_events(self.key_event_dispatcher, self.player, self.message_store, self.recorder,
+                              self.playback)
+            else:
+                if self.recorder:
+                    self.recorder.record_keys(keys)
+                self.player.handle_keyboard(keys)
+        with phase("player move"):
             move_vector = self.player.move()
             self.camera.move(move_vector)
-            active_regions = self.realm.neighbouring_regions_from_pixel_position(self.player.rect.center)
+        with phase("streaming"):
+            self.realm.generate_regions_near(self.player.rect.center)
+            self.realm.prefetch(self.player.rect.center, self.player.direction)
+            self.stream_regions(self.player.rect.center)
+        with phase("monsters"):
+            active_regions = self.active_regions()
             self.move_monsters(active_regions)
 
+        with phase("missiles"):
             world = self.realm.region_from_pixel_position(self.player.rect.center).groups
             self.realm.check_bounds(world.missile)
             self.realm.groups.player_missile.update()
+        with phase("collisions"):
             handle_missile_collisions(self.realm)
+        with phase("effects"):
             self.realm.groups.effects.update()
-            self.player.handle_item_pickup(world)
-
-            self.screen.blit(self.background, dest=self.camera.offset)
-            self.camera.draw_all(active_regions)
-
-            pygame.draw.rect(self.screen, (0, 0, 0), Rect(0, 0, screen.WIDTH, 50))
+        with phase("pickup"):
+            self.player.handle_item_pickup(self.realm.items_in_rect(self.player.rect))
+
+    def state(self) -> GameState:
+        """A snapshot of the game, for whatever is driving a headless game to check"""
+        monsters = sum(len(region.groups.monster) for region in self.realm.regions.values())
+        missiles = len(self.realm.groups.missile) + len(self.realm.groups.player_missile)
+        return GameState(step=self.timestep.steps, time=self.timestep.time, player_position=self.player.rect.center,
+                         player_vitality=self.player.vitality, player_gold=self.player.gold, monsters=monsters,
+                         missiles=missiles)
+
+    def active_regions(self):
+        """The regions around the player, whose monsters move and whose sprites are drawn"""
+        return self.realm.neighbouring_regions_from_pixel_position(self.player.rect.center)
+
+    def moving_sprites(self, active_regions):
+        """The sprites that the camera draws part way along their moves"""
+        sprites = [self.player]
+        for region in active_regions:
+            sprites.extend(region.groups.monster)
+        sprites.extend(self.realm.groups.missile)
+        sprites.extend(self.realm.groups.player_missile)
+        return sprites
+
+    def draw(self, active_regions):
+        phase = self.profiler.phase
+        with phase("hud"):
             self.static_sprites.update()
-            self.static_sprites.draw(self.screen)
-            self.display_debug(self.screen, (0, 0))
+            hud = self.hud()
+        if self.dirty_rects:
+            with phase("draw changes"):
+                rects = self.camera.draw_changes(self.background, active_regions, overlay=hud)
+            if rects is not None:
+                with phase("flip"):
+                    pygame.display.update(rects)
+                return
+        else:
+            with phase("background"):
+                self.camera.draw_background(self.background)
+            with phase("draw all"):
+                self.camera.draw_all(active_regions)
+            with phase("hud"):
+                self.screen.blits(hud, doreturn=False)
+        with phase("flip"):
             pygame.display.flip()
-            self.clock.tick(self.fps)
+
+    def hud(self):
+        """(image, position) pairs to draw over the realm"""
+        pairs = [(self.hud_bar, (0, 0))]
+        pairs.extend((sprite.image, sprite.rect) for sprite in self.static_sprites)
+        pairs.append((self.debug_panel(), (0, 0)))
+        pairs.append((self.profiler_panel(), (0, 150)))
+        return pairs
+
+    def stream_regions(self, pixel_position):
+        for region in self.realm.stream(pixel_position):
+            if self.background:
+                self.background.invalidate(region)
 
     def move_monsters(self, active_regions):
         # Move monsters in current region and neighbouring regions
@@ -111,73 +262,127 @@ class DungeoneerGame:
                 self.realm.update_monster_group(monster, region)
                 monster.do_actions(self.realm)
 
-    def display_debug(self, surface, position):
-        line_spacing = 15
-        font = make_font("Times New Roman", 15)
-        pygame.draw.rect(surface, (0, 0, 0), Rect(0, 50, 160, 100))
-        x, y = position
-
+    def debug_panel(self) -> pygame.Surface:
+        """The debug text for the top left of the screen. Only rendered again when the text changes."""
         region = self.realm.region_from_pixel_position(self.player.rect.center)
-        caption = font.render(str(region.name), True, (255, 255, 255))
-        surface.blit(caption, (x, y))
-
-        y += line_spacing
         fps = int(self.clock.get_fps())
         fps_colour = (50, 255, 50) if fps > self.fps * 0.9 else (255, 50, 50)
-        caption = font.render(str(fps), True, fps_colour)
-        surface.blit(caption, (x, y))
-
-        caption = font.render(str(self.player.rect.center), True, (255, 255, 255))
-        surface.blit(caption, (x + 32, y))
-
-        y += line_spacing
-        caption = font.render(str(self.realm.region_coord_from_pixel_position(self.player.rect.center)), True,
-                              (255, 255, 255))
-        surface.blit(caption, (x, y))
-
-        # neighbours = self.realm.neighbouring_regions_from_pixel_position(self.player.rect.center)
-        #
-        # for n in neighbours:
-        #     y += line_spacing
-        #     caption = font.render(str(n), True, (100, 100, 255))
-        #     surface.blit(caption, (x, y))
-
-        y += line_spacing
-        caption = font.render(str(self.camera.visible_sprite_count), True, (100, 100, 255))
-        surface.blit(caption, (x, y))
-
-
-def play():
-    game = DungeoneerGame((screen.WIDTH, screen.HEIGHT))
+        line_spacing = 15
+        text = [((0, 0), str(region.name), (255, 255, 255)),
+                ((0, line_spacing), str(fps), fps_colour),
+                ((32, line_spacing), str(self.player.rect.center), (255, 255, 255)),
+                ((0, 2 * line_spacing), str(self.realm.region_coord_from_pixel_position(self.player.rect.center)),
+                 (255, 255, 255)),
+                ((0, 3 * line_spacing),
+                 f"{self.camera.visible_sprite_count} drawn {self.camera.culled_sprite_count} culled",
+                 (100, 100, 255))]
+        if text == self.debug_text:
+            return self.debug_surface
+        surface = pygame.Surface((160, 150), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (0, 0, 0), Rect(0, 50, 160, 100))
+        for position, caption, colour in text:
+            surface.blit(self.caption(caption, colour), position)
+        self.debug_text, self.debug_surface = text, surface
+        return surface
+
+    def profiler_panel(self) -> pygame.Surface:
+        """The average and p99 milliseconds per frame of each phase, under the debug text. Only drawn again
+        when the profiler's report changes."""
+        report = self.profiler.report
+        if report is self.profiler_report:
+            return self.profiler_surface
+        line_spacing = 15
+        surface = pygame.Surface((160, (len(report) + 1) * line_spacing), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        rows = [("phase", "ms", "p99")] + [(name, f"{average:.1f}", f"{p99:.1f}") for name, average, p99 in report]
+        for row, (name, average, p99) in enumerate(rows):
+            colour = (255, 255, 255) if row else (100, 100, 255)
+            for x, caption in ((0, name), (90, average), (125, p99)):
+                surface.blit(self.caption(caption, colour), (x, row * line_spacing))
+        self.profiler_report, self.profiler_surface = report, surface
+        return surface
+
+    def caption(self, text, colour) -> pygame.Surface:
+        """Debug text, rendered once for each text and colour"""
+        key = text, colour
+        if key not in self.captions:
+            if len(self.captions) > 1000:
+                self.captions.clear()
+            self.captions[key] = make_font("Times New Roman", 15).render(text, True, colour)
+        return self.captions[key]
+
+
+def play(realm_cache=None, record=None):
+    """
+    Args:
+        record: path to save a replay of the game to when it ends. See replay.py
+    """
+    game = DungeoneerGame(realm_cache=realm_cache, **PLAY_SETTINGS)
     thread = threading.Thread(target=game.initialise_realm)
     thread.start()
     intro.play(game.screen)
 
     thread.join()
-    game.place_player((5, 5))
-    arrows = items.ammo["arrow"]
-    arrows.count = 20
-    game.player.inventory.add_item(arrows, slot=2)
-    add_demo_items(game.region, (10, 10))
-
+    set_up_play(game)
     game.place_static_items()
 
     start_music("Dragon_and_Toast.mp3")
 
-    game.game_loop()
+    if record:
+        game.recorder = ReplayRecorder(game.realm.seed, PLAY_SETTINGS)
+    try:
+        game.game_loop()
+    finally:
+        game.realm.close()
+        if record:
+            game.recorder.replay.save(record)
+
+
+def replay_game(replay: Replay, headless=False) -> DungeoneerGame:
+    """A game set up as the replay's game was, ready to play the replay back with game_loop or, if headless,
+    step"""
+    game = DungeoneerGame(seed=replay.seed, headless=headless, **replay.game)
+    game.initialise_realm()
+    set_up_play(game)
+    if not headless:
+        game.place_static_items()
+    game.playback = ReplayPlayback(replay)
+    return game
+
+
+def set_up_play(game: DungeoneerGame):
+    game.place_player(START_REGION)
+    arrows = items.ammo["arrow"]
+    arrows.count = 20
+    game.player.inventory.add_item(arrows, slot=2)
+    add_demo_items(game.region, (10, 10))
+    game.add_controllers()
 
 
-def handle_events(key_event_dispatcher, player, message_store):
+def handle_events(key_event_dispatcher, player, message_store, recorder: ReplayRecorder = None,
+                  playback: ReplayPlayback = None):
+    """Pass key presses to the dispatcher and the keyboard state to the player, recording them if there is a
+    recorder. While a replay is played back they come from it instead, although the game can still be quit."""
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             raise GameInterrupt
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 raise GameInterrupt
-            key_event_dispatcher.event(event.type, event.key)
+            if playback is None:
+                key_event_dispatcher.event(event.type, event.key)
+                if recorder:
+                    recorder.record_event(event.type, event.key)
         if event.type == WARNING_EVENT:
             message_store.send("warning", event.message)
-    kb = pygame.key.get_pressed()
+    if playback is None:
+        kb = pygame.key.get_pressed()
+    elif playback.finished:
+        raise GameInterrupt
+    else:
+        kb = playback.play_step(key_event_dispatcher)
+    if recorder:
+        recorder.record_keys(kb)
     player.handle_keyboard(kb)
 
 
@@ -190,6 +395,7 @@ def add_demo_items(region: Region, position):
         x, y = region.pixel_position(p)
         arrow_sprite = make_item_sprite(arrows, x, y)
         region.groups.items.add(arrow_sprite)
+        region.groups.effects.add(arrow_sprite)
 
     # for i, item in enumerate(items.all_items.values()):
     #     col, row = 10 + i % 8, 10 + i // 8
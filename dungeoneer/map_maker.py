@@ -1,11 +1,13 @@
-import heapq
 import random
 from collections import defaultdict
 from contextlib import suppress
 from typing import Iterable, List, Protocol, Type
 
+import numpy as np
+
 from dungeoneer.dice_roll import pick_from_weighted_table
 from dungeoneer.regions import TileType, Position, SubRegion, Region
+from dungeoneer.rooms import Room
 
 
 class RegionGenerator(Protocol):
@@ -13,60 +15,66 @@ class RegionGenerator(Protocol):
         ...
 
 
-def generate_map(region, design_generator: Type[RegionGenerator]):
-    return design_generator(region).generate()
+def generate_map(region, design_generator: Type[RegionGenerator], rng=random):
+    return design_generator(region, rng).generate()
+
+
+def join_exits(nodes, exits, size, rng=random) -> List[Position]:
+    paths = []
+    for exit_pos in exit_positions(exits, size):
+        node = nearest_node(nodes, exit_pos)
+        paths.extend(join_two_nodes(node, exit_pos, rng=rng))
+    return paths
+
 
+def dig_exits(corridors: np.ndarray, nodes, exits, rng=random):
+    """Dig a corridor from each exit to its nearest node"""
+    for exit_pos in exit_positions(exits, corridors.shape):
+        dig_corridor(corridors, nearest_node(nodes, exit_pos), exit_pos, rng=rng)
 
-def join_exits(nodes, exits, size):
-    def find_best_node(exit_position):
-        """Find node with shortest manhatten distance to the exit"""
-        x, y = exit_position
-        diffs = [(abs(n[0] - x) + abs(n[1] - y), n) for n in nodes]
-        heapq.heapify(diffs)
-        _, p = diffs[0]
-        return p
 
+def exit_positions(exits, size) -> List[Position]:
     width, height = size
-    paths = []
     directions = {
         "N": (exits.get("N"), 0),
         "S": (exits.get("S"), height - 1),
         "E": (width - 1, exits.get("E")),
         "W": (0, exits.get("W"))
     }
-    for direction, exit_pos in directions.items():
-        if direction in exits:
-            exit_pos = Position(*exit_pos)
-            node = find_best_node(exit_pos)
-            paths.extend(join_two_nodes(node, exit_pos))
-    return paths
+    return [Position(*exit_pos) for direction, exit_pos in directions.items() if direction in exits]
+
 
+def nearest_node(nodes, position) -> Position:
+    """Find node with shortest manhatten distance to the position. Ties go to the lowest x, then y"""
+    nodes = np.asarray(nodes).reshape(-1, 2)
+    xs, ys = nodes[:, 0], nodes[:, 1]
+    distances = np.abs(xs - position[0]) + np.abs(ys - position[1])
+    return Position(*nodes[np.lexsort((ys, xs, distances))[0]].tolist())
 
-def carve_out_dungeon(region, paths, rooms, wall_type=TileType.STONE_WALL):
+
+def carve_out_dungeon(region, corridors: np.ndarray, rooms: List[Room], wall_type=TileType.STONE_WALL, rng=random):
     def random_floor():
-        return random.choice((TileType.STONE_FLOOR, TileType.LARGE_FLAGSTONE, TileType.EARTH,
-                              TileType.CHECKERED_TILES))
+        return rng.choice((TileType.STONE_FLOOR, TileType.LARGE_FLAGSTONE, TileType.EARTH,
+                           TileType.CHECKERED_TILES))
 
     floor_type = random_floor()  # floor types are themed (mostly)
     region.fill_all(wall_type)
-    region.clear_nodes(paths)
+    region.carve(corridors)
     for room in rooms:
-        region.clear_nodes(room, floor_type if random.randint(0, 100) < 95 else random_floor())
+        region.carve(room.area, floor_type if rng.randint(0, 100) < 95 else random_floor())
 
 
-def random_floor_types(region, sub_regions: List[SubRegion]):
+def random_floor_types(region, sub_regions: List[SubRegion], rng=random):
     for area in sub_regions:
-        floor_type = random.choice((TileType.STONE_FLOOR, TileType.LARGE_FLAGSTONE, TileType.EARTH))
-        x1, y1 = area.top_left
-        width, height = area.size
-        for x in range(x1, x1 + width):
-            for y in range(y1, y1 + height):
-                if (x, y) not in region.tiles:
-                    region.place_by_type((x, y), floor_type)
+        floor_type = rng.choice((TileType.STONE_FLOOR, TileType.LARGE_FLAGSTONE, TileType.EARTH))
+        unset = np.zeros_like(region.tile_ids, dtype=bool)
+        unset[region.area(area.top_left, area.size)] = True
+        unset &= region.tile_ids == 0
+        region.place_in_area(unset, floor_type.value, layer=0)
 
 
-def make_nodes(root_region: Region, *, node_count) -> List[Position]:
-    sub_regions = make_sub_regions(root_region, node_count=node_count)
+def make_nodes(root_region: Region, *, node_count, rng=random) -> List[Position]:
+    sub_regions = make_sub_regions(root_region, node_count=node_count, rng=rng)
     return sub_regions_to_nodes(sub_regions)
 
 
@@ -74,11 +82,11 @@ def sub_regions_to_nodes(sub_regions) -> List[Position]:
     return [r.node for r in sub_regions]
 
 
-def make_sub_regions(root_region: Region, *, node_count) -> List[SubRegion]:
+def make_sub_regions(root_region: Region, *, node_count, rng=random) -> List[SubRegion]:
     sub_regions = [SubRegion(root_region)]
 
     while len(sub_regions) < node_count:
-        split = random.uniform(0.3, 0.7)
+        split = rng.uniform(0.3, 0.7)
         sr = sub_regions.pop(0)
         if sr.size.width < sr.size.height:  # narrow
             sub_regions.extend(sr.split_vertically(split))
@@ -94,26 +102,56 @@ DEFAULT_WIDTH_TABLE = {
 }
 
 
-def join_nodes(nodes: Iterable[Position], width_table=DEFAULT_WIDTH_TABLE) -> List[Position]:
+def join_nodes(nodes: Iterable[Position], width_table=DEFAULT_WIDTH_TABLE, rng=random) -> List[Position]:
     path = []
+    for src, dest, width in _node_pairs(nodes, width_table, rng):
+        path.extend(join_two_nodes(src, dest, width, rng))
+    return path
+
+
+def dig_corridors(corridors: np.ndarray, nodes: Iterable[Position], width_table=DEFAULT_WIDTH_TABLE, rng=random):
+    """Dig corridors joining each node to the next into the corridors mask"""
+    for src, dest, width in _node_pairs(nodes, width_table, rng):
+        dig_corridor(corridors, src, dest, width, rng)
+
+
+def _node_pairs(nodes, width_table, rng):
+    """Each consecutive pair of nodes with the corridor width to join them by. The width is the same for all"""
     i = iter(nodes)
     with suppress(StopIteration):
-        width = pick_from_weighted_table(width_table)
+        width = pick_from_weighted_table(width_table, rng)
         src = next(i)
         while True:
             dest = next(i)
-            path.extend(join_two_nodes(src, dest, width))
+            yield src, dest, width
             src = dest
-    return path
 
 
-def join_two_nodes(src: Position, dest: Position, width=1) -> List[Position]:
+def join_two_nodes(src: Position, dest: Position, width=1, rng=random) -> List[Position]:
+    return [Position(x, y)
+            for (x1, x2), (y1, y2) in _corridor_segments(src, dest, width, rng)
+            for x in range(x1, x2 + 1)
+            for y in range(y1, y2 + 1)]
+
+
+def dig_corridor(corridors: np.ndarray, src: Position, dest: Position, width=1, rng=random):
+    """Dig a random corridor from src to dest into the corridors mask. Cells outside the mask are ignored"""
+    for (x1, x2), (y1, y2) in _corridor_segments(src, dest, width, rng):
+        corridors[max(x1, 0):max(x2 + 1, 0), max(y1, 0):max(y2 + 1, 0)] = True
+
+
+def _corridor_segments(src: Position, dest: Position, width=1, rng=random):
+    """Wander from src to dest in straight runs.
+
+    Yields:
+        ((x1, x2), (y1, y2)): inclusive bounds of each rectangle of corridor, starting with src itself
+    """
     width = max(width, 1)
     x, y = src
-    path = [Position(x, y)]
+    yield (x, x), (y, y)
     while True:
-        x_count = dest.x - x
-        y_count = dest.y - y
+        x_count = dest[0] - x
+        y_count = dest[1] - y
 
         if not x_count and not y_count:
             break
@@ -121,20 +159,17 @@ def join_two_nodes(src: Position, dest: Position, width=1) -> List[Position]:
         dx = x_count // abs(x_count or 1)
         dy = y_count // abs(y_count or 1)
 
-        steps = _random_path_segment(x_count, y_count)
+        x_steps, y_steps = _random_path_segment(x_count, y_count, rng)
 
-        while steps[0]:
-            x += dx
-            steps[0] -= 1
-            path.extend(Position(x, y + w) for w in range(width))
-        while steps[1]:
-            y += dy
-            steps[1] -= 1
-            path.extend(Position(x + w, y) for w in range(width))
-    return path
+        if x_steps:
+            yield tuple(sorted((x + dx, x + dx * x_steps))), (y, y + width - 1)
+            x += dx * x_steps
+        if y_steps:
+            yield (x, x + width - 1), tuple(sorted((y + dy, y + dy * y_steps)))
+            y += dy * y_steps
 
 
-def _random_path_segment(x_count, y_count):
+def _random_path_segment(x_count, y_count, rng=random):
     """Given a distance to travel (x_count, y_count), choose to either go a random distance
     in x direction or in y direction.
 
@@ -142,15 +177,15 @@ def _random_path_segment(x_count, y_count):
         List[int]: number of steps to travel. For example [0, 2] means travel in the y direction 2 steps
     """
     options = [(x_count, 0), (0, y_count)]
-    option = random.choice([opt for opt in options if opt[0] or opt[1]])
-    return [random.randint(0, abs(option[0])), random.randint(0, abs(option[1]))]
+    option = rng.choice([opt for opt in options if opt[0] or opt[1]])
+    return [rng.randint(0, abs(option[0])), rng.randint(0, abs(option[1]))]
 
 
-def make_rooms_in_subregions(sub_regions: List[SubRegion], undersize_pc_probability=75):
+def make_rooms_in_subregions(sub_regions: List[SubRegion], undersize_pc_probability=75, rng=random) -> List[Room]:
     def weighted_scale_down(size):
-        if random.randint(1, 100) > undersize_pc_probability:
+        if rng.randint(1, 100) > undersize_pc_probability:
             return size - 1
-        return random.randint(1, size - 1)
+        return rng.randint(1, size - 1)
     rooms = []
     for r in sub_regions:
 
@@ -173,11 +208,7 @@ def make_rooms_in_subregions(sub_regions: List[SubRegion], undersize_pc_probabil
         if dy > 1:
             y2 = cy + weighted_scale_down(dy)
 
-        room = [Position(x, y)
-                for x in range(x1, x2)
-                for y in range(y1, y2)]
-
-        rooms.append(room)
+        rooms.append(Room(x1, y1, x2 - x1, y2 - y1))
     return rooms
 
 
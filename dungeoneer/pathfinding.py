@@ -7,7 +7,12 @@ from pygame.sprite import Sprite
 from dungeoneer.interfaces import SpriteGroups
 
 
-def move_to_nearest_empty_space(tile: Sprite, solid_groups, max_distance: int):
+def move_to_nearest_empty_space(tile: Sprite, solid_groups, max_distance: int, collision=None):
+    """
+    Args:
+        collision (callable): collision(tile) returns something solid that the tile collides with, or None.
+                       Checked as well as the solid groups.
+    """
     initial_x, initial_y = tile.rect.center
     locations = OrderedDict()
     checked = set()
@@ -33,7 +38,9 @@ def move_to_nearest_empty_space(tile: Sprite, solid_groups, max_distance: int):
             if collided:
                 break
         else:
-            return tile
+            collided = collision(tile) if collision else None
+            if not collided:
+                return tile
         rect = collided.rect
         queue_up(rect.left - midx, rect.centery)
         queue_up(rect.right + midx, rect.centery)
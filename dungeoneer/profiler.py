@@ -0,0 +1,89 @@
+"""
+The frame profiler times each phase of a frame, such as moving monsters or drawing the sprites, so that it can
+be seen where a frame's time goes while the game is played. A phase that runs more than once in a frame, as
+the simulation's phases do when a frame takes several steps, is counted as the total time spent in it. The
+total is the whole frame, from one end_frame to the next, so it includes time spent outside the phases, such
+as waiting for the frame rate.
+
+Averages and 99th percentiles are taken over a rolling window of frames. They only change every few frames, so
+that they can be read, and so that the overlay that shows them only renders new text now and then.
+"""
+import statistics
+import time
+from collections import deque, namedtuple
+from typing import Dict, Deque, List
+
+PhaseTiming = namedtuple("PhaseTiming", "name average p99")  # milliseconds per frame
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Phase:
+    """Context manager that adds the time spent in its with block to its phase's time this frame"""
+    __slots__ = ("current", "name", "start")
+
+    def __init__(self, current: Dict[str, float], name):
+        self.current = current
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.current[self.name] = self.current.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class FrameProfiler:
+    """
+    Args:
+        window (int): number of frames that averages and percentiles are taken over
+        report_every (int): frames between updates of the report
+    """
+    def __init__(self, window=120, report_every=20):
+        self.window = window
+        self.report_every = report_every
+        self.history: Dict[str, Deque[float]] = {}  # seconds per frame for each phase, in the order first timed
+        self.totals: Deque[float] = deque(maxlen=window)  # seconds per frame, from one end_frame to the next
+        self.current: Dict[str, float] = {}  # seconds so far this frame
+        self.frame_start = None  # when the last frame ended
+        self.frames = 0
+        self.report: List[PhaseTiming] = []  # each phase then, last, the total. See summary
+        self.phases: Dict[str, Phase] = {}
+
+    def phase(self, name) -> Phase:
+        """Use in a with statement to time the code in the block as part of the phase"""
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self.current, name)
+        return phase
+
+    def end_frame(self):
+        """Add this frame's timings to the history and start the next frame. A known phase that did not run
+        this frame took no time. The first frame has no start, so its total is only the time in its phases."""
+        now = time.perf_counter()
+        for name in self.current:
+            if name not in self.history:
+                self.history[name] = deque(maxlen=self.window)
+        for name, timings in self.history.items():
+            timings.append(self.current.get(name, 0.0))
+        if self.frame_start is None:
+            self.totals.append(sum(self.current.values()))
+        else:
+            self.totals.append(now - self.frame_start)
+        self.frame_start = now
+        self.current.clear()
+        self.frames += 1
+        if self.frames % self.report_every == 0:
+            self.report = self.summary()
+
+    def summary(self) -> List[PhaseTiming]:
+        """The average and 99th percentile time of each phase and of the whole frame, now"""
+        if not self.totals:
+            return []
+        timings = list(self.history.items()) + [("total", self.totals)]
+        return [PhaseTiming(name, statistics.fmean(history) * 1000, percentile(history, 0.99) * 1000)
+                for name, history in timings]
@@ -0,0 +1,168 @@
+"""
+A generated realm can be kept in a cache file so that it does not have to be generated again next launch.
+
+File layout:
+
+    magic (8 bytes) | version (uint32) | header length (uint32) | JSON header | padding | array data
+
+The header holds the realm seed and sizes and, for each cached region, its exits, name, tile palette,
+monster eggs, room rectangles and where each of its arrays starts in the data block. The arrays are the
+region's tile id layers and its room index grid. Items and treasure are tiles in the overlay layer
+so they come along with the layers.
+
+The data block is memory mapped, so opening a cache only reads the header and a region's arrays are
+only paged in from disk when that region is loaded.
+"""
+import json
+import os
+import struct
+from typing import Dict, Tuple, Optional
+
+import numpy as np
+
+from dungeoneer.layouts import RegionLayout
+
+MAGIC = b"DGNREALM"
+VERSION = 1
+ALIGNMENT = 64  # bytes. Start of the data block and of every array in it
+PREAMBLE = struct.Struct("<8sII")  # magic, version, header length
+LAYERS = {
+    "tile_ids": np.uint16,
+    "solid_ids": np.uint16,
+    "overlay_ids": np.uint16,
+    "room_ids": np.int16,
+}
+
+Coordinate = Tuple[int, int]
+
+
+class StaleRealmCache(ValueError):
+    """Raised when a cache file is not a realm cache or was written by a different version"""
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _room_spec(room: list) -> tuple:
+    """JSON reads the room's rect, or its list of cells, back as lists"""
+    return tuple(tuple(cell) if isinstance(cell, list) else cell for cell in room)
+
+
+class RealmCache:
+    """An open realm cache file. Use RealmCache.open to read one and write_realm_cache to make one."""
+
+    def __init__(self, path, header: dict, data: Optional[np.ndarray]):
+        self.path = path
+        self.header = header
+        self.data = data
+        self.regions = {tuple(entry["coordinates"]): entry for entry in header["regions"]}
+
+    @classmethod
+    def open(cls, path) -> "RealmCache":
+        """
+        Raises:
+            FileNotFoundError: if there is no cache file
+            StaleRealmCache: if the file is not a realm cache this version can read
+        """
+        with open(path, "rb") as f:
+            preamble = f.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise StaleRealmCache(f"{path} is too short to be a realm cache")
+            magic, version, header_length = PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise StaleRealmCache(f"{path} is not a realm cache")
+            if version != VERSION:
+                raise StaleRealmCache(f"{path} is realm cache version {version}, expected {VERSION}")
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        data_offset = _aligned(PREAMBLE.size + header_length)
+        data = None
+        if os.path.getsize(path) > data_offset:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset)
+        return cls(path, header, data)
+
+    @property
+    def seed(self):
+        return self.header["seed"]
+
+    def matches(self, seed, size, region_size) -> bool:
+        """True if the cache holds regions of the realm with this seed and shape"""
+        return (self.seed == seed and self.header["size"] == (list(size) if size else None) and
+                tuple(self.header["region_size"]) == tuple(region_size))
+
+    def __contains__(self, coordinates):
+        return tuple(coordinates) in self.regions
+
+    def __len__(self):
+        return len(self.regions)
+
+    def exits(self, coordinates) -> Dict[str, int]:
+        return dict(self.regions[tuple(coordinates)]["exits"])
+
+    def layout(self, coordinates) -> RegionLayout:
+        """The cached layout of the region. Its arrays are read-only views of the memory mapped file."""
+        entry = self.regions[tuple(coordinates)]
+        shape = tuple(self.header["region_size"])
+        arrays = {}
+        for name, dtype in LAYERS.items():
+            start = entry["arrays"][name]
+            length = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            arrays[name] = self.data[start:start + length].view(dtype).reshape(shape)
+        return RegionLayout(
+            name=entry["name"],
+            palette=[None, *(tuple(spec) for spec in entry["palette"][1:])],
+            monster_eggs={(x, y): name for x, y, name in entry["monster_eggs"]},
+            rooms=[_room_spec(room) for room in entry["rooms"]],
+            **arrays
+        )
+
+    def close(self):
+        """Let go of the memory map. It is unmapped once no layout arrays from it are left."""
+        self.data = None
+
+
+def write_realm_cache(path, seed, size, region_size, regions: Dict[Coordinate, Tuple[dict, RegionLayout]]):
+    """Write a realm cache file holding the given regions. The file is replaced in one step so that
+    a cache that is already open stays readable.
+
+    Args:
+        regions: exits and layout of each region to cache, by region coordinates
+    """
+    entries = []
+    blobs = []
+    offset = 0
+    for (x, y), (exits, layout) in regions.items():
+        arrays = {}
+        for name, dtype in LAYERS.items():
+            array = np.ascontiguousarray(getattr(layout, name), dtype=dtype)
+            if array.shape != tuple(region_size):
+                raise ValueError(f"Region {(x, y)} {name} has shape {array.shape}, expected {tuple(region_size)}")
+            offset = _aligned(offset)
+            arrays[name] = offset
+            blobs.append((offset, array.tobytes()))
+            offset += array.nbytes
+        entries.append({
+            "coordinates": [x, y],
+            "exits": exits,
+            "name": layout.name,
+            "palette": layout.palette,
+            "monster_eggs": [[int(col), int(row), name] for (col, row), name in layout.monster_eggs.items()],
+            "rooms": layout.rooms,
+            "arrays": arrays,
+        })
+    header = json.dumps({
+        "seed": seed,
+        "size": list(size) if size else None,  # None for an unbounded realm
+        "region_size": list(region_size),
+        "regions": entries,
+    }).encode("utf-8")
+
+    data_offset = _aligned(PREAMBLE.size + len(header))
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for array_offset, blob in blobs:
+            f.seek(data_offset + array_offset)
+            f.write(blob)
+    os.replace(temporary_path, path)
@@ -19,19 +19,32 @@ Regions are also arranged in a grid of variable size and this is known as a real
   ================
 """
 import copy
+import math
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
 from contextlib import suppress
 from random import randint
-from typing import Dict, Tuple, cast
+from typing import Dict, Tuple, Optional, Set, List, cast
 
 import pygame
 
 from dungeoneer.actors import Monster, MissileSprite, Player
+from dungeoneer.collision import solid_tile_hit, scale_rect, rects_collide, solid_corner_hits, sweep_solid_tiles
 from dungeoneer.interfaces import SpriteGroups, Item, SpriteGrouper, Collider, Observer
 from dungeoneer.item_sprites import make_item_sprite
+from dungeoneer.layouts import RegionLayout, layout_from_region, apply_layout
 from dungeoneer.map_maker import generate_map
 from dungeoneer.room_generation import random_room_generator
 from dungeoneer.pathfinding import move_to_nearest_empty_space
+from dungeoneer.realm_cache import RealmCache, StaleRealmCache, write_realm_cache
 from dungeoneer.regions import Position, Region
+from dungeoneer.scenery import StaticSolid
+from dungeoneer.spatial_hash import SpatialHash, IndexedGroup
+from dungeoneer.streaming import evict_region, restore_region, RegionSnapshot
+
+
+INDEXED_GROUPS = ("solid", "player", "items", "missile", "player_missile")
 
 
 class PointOutsideRealmBoundary(ValueError):
@@ -42,24 +55,94 @@ class Realm(SpriteGrouper, Observer):
     """A realm is a variable sized grid of Regions
 
     Args:
-        size (tuple[int, int]): Number of regions in the x and y direction
+        size (tuple[int, int]): Number of regions in the x and y direction. If None then the realm is unbounded:
+                       regions are made when something first looks at them, in any direction including
+                       negative coordinates, and generation is always lazy.
         tile_size (tuple[int, int]): pixel dimensions of a tile
         region_size  (tuple[int, int]): tile dimensions of a region
+        seed (int): the same seed always generates the same realm. If None then a random seed is chosen
+        workers (int): number of processes to use to generate regions. If 0 then regions are
+                       generated one after another in this process
+        lazy (bool): if True then regions are left as stubs until something comes near them
+        generation_radius (tuple[int, int]): in lazy mode, regions overlapping this distance (in pixels)
+                       from the player are generated. Defaults to half a region, which is one screen.
+        prefetch_distance (int): in lazy mode, how many regions ahead of a moving player to generate in
+                       the background
+        cache_file (str): path of a realm cache. Regions in the cache are loaded from it instead of being
+                       generated and newly generated regions are saved to it. A cache for a different
+                       seed, size or version is ignored and overwritten. If seed is None then the seed of
+                       an existing cache is used.
+        generator (callable): generator(region, rng) fills a stub region. Must be picklable if workers is set.
+        streaming_radius (int): if set, regions more than this many regions away from the player have their
+                       sprites evicted and are rebuilt when the player comes back. Must be at least 1 so that
+                       the regions on screen are kept. Unbounded realms stream with a radius of 2 by default.
+        max_regions (int): in an unbounded realm, the least recently used regions outside the streaming radius
+                       are forgotten once there are more than this many. Only their snapshots are kept and
+                       they are generated again from the seed if they are needed.
+        max_snapshots (int): in an unbounded realm, the most snapshots of forgotten regions that are kept. Once
+                       there are more, the least recently forgotten region loses its snapshot and comes back as
+                       newly generated.
+        bake_scenery (bool): if True then walls and other static scenery are drawn into the region backgrounds
+                       rather than being sprites. They are still solid.
     """
 
-    def __init__(self, size, tile_size, region_size=(50, 30)):
+    def __init__(self, size, tile_size, region_size=(50, 30), seed=None, workers=0,
+                 lazy=False, generation_radius=None, prefetch_distance=1, cache_file=None, generator=None,
+                 streaming_radius=None, max_regions=64, max_snapshots=1024, bake_scenery=False):
         region_width, region_height = region_size
+        self.region_size = region_size
+        self.unbounded = size is None
+        self.size = None if self.unbounded else tuple(size)
+        self.width, self.height = self.size or (None, None)
+        if self.unbounded:
+            lazy = True
+            streaming_radius = 2 if streaming_radius is None else streaming_radius
+        self.cache_file = cache_file
+        self.cache = self.open_cache(seed)
+        if seed is None and self.cache:
+            seed = self.cache.seed
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.generator = generator or generate_region
+        self._unsaved = set()  # coordinates of regions generated since the cache was last written
+        if streaming_radius is not None and streaming_radius < 1:
+            raise ValueError(f"streaming_radius must be at least 1, not {streaming_radius}")
+        self.streaming_radius = streaming_radius
+        self.resident: Set[Position] = set()  # coordinates of regions that have their sprites
+        self.max_regions = max_regions
+        self.max_snapshots = max_snapshots
+        self.bake_scenery = bake_scenery
+        # of regions that have been forgotten, least recently forgotten first
+        self.snapshots: Dict[Position, RegionSnapshot] = OrderedDict()
+        self.workers = workers
+        self.lazy = lazy
+        self.prefetch_distance = prefetch_distance
+        self._executor = None
+        self._prefetched: Dict[Position, Future] = {}
         self.tile_size = pygame.Vector2(tile_size)
         tile_width, tile_height = tile_size
         self.region_pixel_size = int(region_width * tile_width), int(region_height * tile_height)
-        self.regions: Dict[Position, Region] = {}
-        self.width, self.height = size
-        self.pixel_bounds = pygame.Rect(0, 0, self.width * region_width * tile_width,
-                                        self.height * region_height * tile_height)
-        self.groups = SpriteGroups()  # global across all regions
+        self.regions: Dict[Position, Region] = OrderedDict()  # least recently used first when unbounded
+        self.pixel_bounds = None if self.unbounded else pygame.Rect(0, 0, self.width * region_width * tile_width,
+                                                                    self.height * region_height * tile_height)
+        cell_size = int(2 * tile_width), int(2 * tile_height)
+        self.spatial: Dict[str, SpatialHash] = {name: SpatialHash(cell_size) for name in INDEXED_GROUPS}
+        self.groups = self.make_groups()  # global across all regions
+        self.generation_radius = generation_radius or (self.region_pixel_size[0] // 2,
+                                                       self.region_pixel_size[1] // 2)
 
         self.create_empty_regions(region_size)
 
+    def make_groups(self) -> SpriteGroups:
+        """Sprite groups whose dynamic sprites are kept in the realm's spatial hashes, so that they can be
+        found wherever they are in the realm"""
+        return SpriteGroups(**{name: IndexedGroup(self.spatial[name]) for name in INDEXED_GROUPS})
+
+    def moved(self, sprite):
+        """Let the spatial hashes know that the sprite has moved"""
+        for spatial_hash in self.spatial.values():
+            if sprite in spatial_hash:
+                spatial_hash.update(sprite)
+
     def on_update(self, attribute, value):
         """Implementation of method from Observer class"""
         if attribute == "move":
@@ -70,31 +153,53 @@ class Realm(SpriteGrouper, Observer):
             region.on_player_move(x, y)
 
     def create_empty_regions(self, region_size):
-        region_width, region_height = region_size
+        if self.unbounded:
+            return
         for x in range(self.width):
             for y in range(self.height):
-                pixel_base = x * self.region_pixel_size[0], y * self.region_pixel_size[1]
-                region = Region(region_size, id_code=(x, y), pixel_base=pixel_base,
-                                tile_size=self.tile_size)
-                if y > 0:
-                    region.exits["N"] = self.regions[Position(x, y - 1)].exits["S"]
-                if y < self.height - 1:
-                    region.exits["S"] = randint(1, region_width - 1)
-                if x > 0:
-                    region.exits["W"] = self.regions[Position(x - 1, y)].exits["E"]
-                if x < self.width - 1:
-                    region.exits["E"] = randint(1, region_height - 1)
-                self.regions[Position(x, y)] = region
+                self.create_region(Position(x, y))
+
+    def create_region(self, coordinates: Position) -> Region:
+        """Make a stub region. Its exits only depend on the seed and coordinates so a region can be made
+        without its neighbours"""
+        x, y = coordinates
+        pixel_base = x * self.region_pixel_size[0], y * self.region_pixel_size[1]
+        region = Region(self.region_size, id_code=(x, y), pixel_base=pixel_base, tile_size=self.tile_size)
+        region.is_stub = True
+        region.groups = self.make_groups()
+        region.exits = self.exits(coordinates)
+        self.regions[Position(x, y)] = region
+        return region
+
+    def exits(self, coordinates) -> Dict[str, int]:
+        x, y = coordinates
+        region_width, region_height = self.region_size
+        exits = {}
+        if self.unbounded or y > 0:
+            exits["N"] = exit_position(self.seed, (x, y - 1), "S", region_width)
+        if self.unbounded or y < self.height - 1:
+            exits["S"] = exit_position(self.seed, (x, y), "S", region_width)
+        if self.unbounded or x > 0:
+            exits["W"] = exit_position(self.seed, (x - 1, y), "E", region_height)
+        if self.unbounded or x < self.width - 1:
+            exits["E"] = exit_position(self.seed, (x, y), "E", region_height)
+        return exits
 
     def __len__(self):
         return len(self.regions)
 
     def region(self, position: Position):
+        """The region at the position. In an unbounded realm it is made if it does not exist yet."""
         try:
-            return self.regions[position]
+            region = self.regions[position]
         except KeyError as e:
-            raise PointOutsideRealmBoundary(f"Position {position} was outside the realm with "
-                                            f"size ({self.width}, {self.height})") from e
+            if not self.unbounded:
+                raise PointOutsideRealmBoundary(f"Position {position} was outside the realm with "
+                                                f"size ({self.width}, {self.height})") from e
+            region = self.create_region(Position(*position))
+        if self.unbounded:
+            self.regions.move_to_end(position)
+        return region
 
     def region_coord_from_pixel_position(self, pixel_position):
         x, y = pixel_position
@@ -123,12 +228,220 @@ class Realm(SpriteGrouper, Observer):
                 results.append(self.region(p))
         return results
 
+    def region_coords_in_pixel_rect(self, rect: pygame.Rect):
+        """Return the coordinates of all the regions that overlap the pixel rectangle"""
+        left, top = self.region_coord_from_pixel_position(rect.topleft)
+        right, bottom = self.region_coord_from_pixel_position((rect.right - 1, rect.bottom - 1))
+        return [Position(x, y)
+                for x in range(left, right + 1)
+                for y in range(top, bottom + 1)
+                if self.unbounded or Position(x, y) in self.regions]
+
+    def regions_in_pixel_rect(self, rect: pygame.Rect):
+        """Return all the regions that overlap the pixel rectangle"""
+        return [self.region(p) for p in self.region_coords_in_pixel_rect(rect)]
+
+    def open_cache(self, seed) -> Optional[RealmCache]:
+        """Open the cache file if it holds this realm, otherwise return None"""
+        if not self.cache_file:
+            return None
+        try:
+            cache = RealmCache.open(self.cache_file)
+        except (FileNotFoundError, StaleRealmCache):
+            return None
+        if not cache.matches(cache.seed if seed is None else seed, self.size, self.region_size):
+            cache.close()
+            return None
+        return cache
+
+    def save_cache(self):
+        """Write every generated region to the cache file, if there is one and anything new was generated"""
+        if not self.cache_file or not self._unsaved:
+            return
+        cached = {}
+        if self.cache:
+            cached.update({c: (self.cache.exits(c), self.cache.layout(c)) for c in self.cache.regions})
+        for coordinates, region in self.regions.items():
+            if not region.is_stub:
+                cached[tuple(coordinates)] = region.exits, layout_from_region(region)
+        write_realm_cache(self.cache_file, self.seed, self.size, self.region_size, cached)
+        if self.cache:
+            self.cache.close()
+        self.cache = RealmCache.open(self.cache_file)
+        self._unsaved.clear()
+
     def generate_map(self):
-        for _coordinates, region in self.regions.items():
-            generate_map(region, random_room_generator())
+        """Generate every region in the realm. In lazy mode nothing is generated until it is needed."""
+        if self.lazy:
+            return
+        if self.workers:
+            self.generate_map_in_parallel()
+        else:
+            for coordinates in self.regions:
+                self.generate_region(coordinates)
+        self.save_cache()
+
+    def generate_map_in_parallel(self):
+        """Generate region layouts in worker processes. Only the sprites are built in this process."""
+        coordinates = [c for c in self.regions if not (self.cache and c in self.cache)]
+        tasks = [self.generation_task(c) for c in coordinates]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for c, layout in zip(coordinates, executor.map(generate_region_layout, tasks)):
+                self.build_region(self.regions[c], layout)
+                self._unsaved.add(c)
+        for c in self.regions:
+            self.generate_region(c)  # the cached ones
+
+    def generation_task(self, coordinates):
+        region = self.regions[coordinates]
+        return (self.region_size, tuple(self.tile_size), region.id_code, region.pixel_base,
+                region.exits, region_seed(self.seed, coordinates), self.generator)
+
+    def generate_region(self, coordinates) -> Region:
+        """Make sure the region is generated, loading it from the cache or using the prefetched layout
+        if there is one"""
+        region = self.region(coordinates)
+        if region.is_evicted:
+            return self.restore_region(coordinates)
+        if not region.is_stub:
+            return region
+        future = self._prefetched.pop(coordinates, None)
+        if self.cache and coordinates in self.cache:
+            layout = self.cache.layout(coordinates)
+        elif future:
+            layout = future.result()
+            self._unsaved.add(coordinates)
+        else:
+            layout = None
+            self.generator(region, region_rng(self.seed, coordinates))
+            self._unsaved.add(coordinates)
+        return self.build_region(region, layout)
+
+    def build_region(self, region: Region, layout: RegionLayout = None) -> Region:
+        if layout:
+            apply_layout(layout, region)
+        coordinates = Position(*region.id_code)
+        if self.bake_scenery:
+            region.bake_scenery()
+        snapshot = self.snapshots.pop(coordinates, None)
+        if snapshot:
+            # It was forgotten after being played in, so it comes back as it was left rather than as new
+            region.snapshot = snapshot
+            restore_region(region, self)
+        else:
             region.build_world(self)
+        region.is_stub = False
+        self.resident.add(coordinates)
+        return region
+
+    def stream(self, pixel_position) -> List[Region]:
+        """Evict the regions that are now more than streaming_radius regions from the position and rebuild
+        evicted regions that are back within it.
+
+        Returns:
+            the regions that were evicted
+        """
+        if self.streaming_radius is None:
+            return []
+        cx, cy = (int(c) for c in self.region_coord_from_pixel_position(pixel_position))
+        radius = self.streaming_radius
+        evicted = []
+        for coordinates in list(self.resident):
+            x, y = coordinates
+            if max(abs(x - cx), abs(y - cy)) > radius:
+                evicted.append(self.evict_region(coordinates))
+        for x in range(cx - radius, cx + radius + 1):
+            for y in range(cy - radius, cy + radius + 1):
+                region = self.regions.get(Position(x, y))
+                if region and region.is_evicted:
+                    self.restore_region(Position(x, y))
+        self.forget_regions()
+        return evicted
+
+    def forget_regions(self):
+        """In an unbounded realm, drop the least recently used regions that are outside the streaming radius
+        until there are no more than max_regions, keeping only the snapshots of those that were played in.
+        Then drop the oldest snapshots until there are no more than max_snapshots."""
+        if not self.unbounded:
+            return
+        excess = len(self.regions) - self.max_regions
+        for coordinates in list(self.regions):
+            if excess <= 0:
+                break
+            if coordinates in self.resident:
+                continue
+            region = self.regions.pop(coordinates)
+            if region.is_evicted:
+                self.snapshots[coordinates] = region.snapshot
+            future = self._prefetched.pop(coordinates, None)
+            if future:
+                future.cancel()
+            excess -= 1
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+
+    def evict_region(self, coordinates) -> Region:
+        region = self.regions[coordinates]
+        evict_region(region)
+        self.resident.discard(coordinates)
+        return region
+
+    def restore_region(self, coordinates) -> Region:
+        region = self.regions[coordinates]
+        restore_region(region, self)
+        self.resident.add(coordinates)
+        return region
+
+    def generation_rect(self, pixel_position) -> pygame.Rect:
+        x, y = pixel_position
+        rx, ry = self.generation_radius
+        return pygame.Rect(int(x) - rx, int(y) - ry, 2 * rx, 2 * ry)
+
+    def generate_regions_near(self, pixel_position):
+        """In lazy mode, generate any stub regions within the generation radius of the position"""
+        if not self.lazy:
+            return
+        for coordinates in self.region_coords_in_pixel_rect(self.generation_rect(pixel_position)):
+            self.generate_region(coordinates)
+
+    def prefetch(self, pixel_position, direction):
+        """Start generating, in the background, the regions that something at pixel_position
+        will reach next if it carries on moving in direction"""
+        if not self.lazy or not direction:
+            return
+        x, y = pixel_position
+        dx, dy = (int(math.copysign(1, d)) if d else 0 for d in direction)
+        width, height = self.region_pixel_size
+        for distance in range(1, self.prefetch_distance + 1):
+            ahead = x + dx * width * distance, y + dy * height * distance
+            for coordinates in self.region_coords_in_pixel_rect(self.generation_rect(ahead)):
+                self.schedule_generation(coordinates)
+
+    def schedule_generation(self, coordinates):
+        if coordinates in self._prefetched or not self.region(coordinates).is_stub:
+            return
+        if self.cache and coordinates in self.cache:
+            return  # loading from the cache is quicker than handing it to another thread
+        if not self._executor:
+            # Generation only draws from its own region's random stream so it is safe to run on a thread
+            self._executor = ProcessPoolExecutor(self.workers) if self.workers else ThreadPoolExecutor(1)
+        self._prefetched[coordinates] = self._executor.submit(generate_region_layout,
+                                                              self.generation_task(coordinates))
+
+    def close(self):
+        """Stop any background generation and save newly generated regions to the cache"""
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self._prefetched.clear()
+        self.save_cache()
+        if self.cache:
+            self.cache.close()
+            self.cache = None
 
     def render_tiles(self):
+        if self.unbounded:
+            raise ValueError("An unbounded realm can not be rendered to a single surface")
         pixel_width = self.regions[(0, 0)].pixel_width
         pixel_height = self.regions[(0, 0)].pixel_height
 
@@ -141,6 +454,8 @@ class Realm(SpriteGrouper, Observer):
         return surface
 
     def out_of_bounds(self, sprite):
+        if self.unbounded:
+            return False
         return not sprite.rect.colliderect(self.pixel_bounds)
 
     def check_bounds(self, group):
@@ -148,10 +463,61 @@ class Realm(SpriteGrouper, Observer):
             if self.out_of_bounds(sprite):
                 sprite.kill()
 
-    def any_solid_collisions(self, other: Collider, position: Tuple[int]) -> bool:
-        sub_groups = self.region_from_pixel_position(position).groups
-        return any(other.collided(groups.solid) or other.collided(groups.player)
-                   for groups in (sub_groups, self.groups))
+    def any_solid_collisions(self, other: Collider) -> bool:
+        if self.solid_tile_hit(other.rect, other.collide_ratio):
+            return True
+        return bool(self.sprite_hit(other.rect, ("solid", "player"), other.collide_ratio, ignore=other))
+
+    def clear_motion(self, other: Collider, motion) -> Tuple[int, int]:
+        """The part of the motion that other can make before it runs into a solid tile"""
+        return self.solid_tile_sweep(other.rect, motion, other.collide_ratio)[0]
+
+    def solid_tile_sweep(self, rect: pygame.Rect, motion,
+                         ratio=1.0) -> Tuple[Tuple[int, int], Optional[StaticSolid]]:
+        """The whole pixel motion that the rect can make before it runs into a solid tile, and that tile or None.
+        However far the motion, no wall is skipped over. See collision.sweep_solid_tiles"""
+        motion, tile = sweep_solid_tiles(self.solid_tile_at, self.tile_size, rect, motion, ratio)
+        if tile is None:
+            return motion, None
+        tile_width, tile_height = int(self.tile_size.x), int(self.tile_size.y)
+        column, row = tile
+        return motion, StaticSolid(pygame.Rect(column * tile_width, row * tile_height, tile_width, tile_height))
+
+    def solid_tile_at(self, column, row) -> bool:
+        """True if there is a solid tile at the realm tile coordinates. Regions that don't exist have none."""
+        region_width, region_height = self.region_size
+        region = self.regions.get((column // region_width, row // region_height))
+        return region is not None and bool(region.solid_ids[column % region_width, row % region_height])
+
+    def solid_tile_hits(self, rects: List[pygame.Rect]):
+        """The solid tile that each rect collides with, or None. Rects no bigger than a tile, which is most
+        missiles, are tested all together."""
+        tile_width, tile_height = self.tile_size
+        small = [i for i, rect in enumerate(rects) if rect.width <= tile_width and rect.height <= tile_height]
+        hits = [None] * len(rects)
+        for i, hit in zip(small, solid_corner_hits(self.regions, self.tile_size, self.region_size,
+                                                   [rects[i] for i in small])):
+            hits[i] = hit
+        for i in set(range(len(rects))).difference(small):
+            hits[i] = self.solid_tile_hit(rects[i])
+        return hits
+
+    def sprite_hit(self, rect: pygame.Rect, names=("solid",), ratio=1.0, ignore=None):
+        """The first sprite in the named groups of any region, or of the realm, that the rect collides with.
+        Both rects are scaled by ratio, which must be at most 1, as for pygame.sprite.collide_rect_ratio."""
+        for name in names:
+            for sprite in self.spatial[name].query_rect(rect):
+                if sprite is not ignore and rects_collide(rect, sprite.rect, ratio):
+                    return sprite
+        return None
+
+    def items_in_rect(self, rect: pygame.Rect):
+        """The item sprites lying in the rect, in whichever regions they are"""
+        return self.spatial["items"].query_rect(rect)
+
+    def solid_tile_hit(self, rect: pygame.Rect, ratio=1.0) -> Optional[StaticSolid]:
+        """The solid tile that the rect collides with, in whichever region it is. See collision.py"""
+        return solid_tile_hit(self.regions_in_pixel_rect(scale_rect(rect, ratio)), rect, ratio)
 
     def shoot(self, sprite, affects_player):
         if affects_player:
@@ -177,12 +543,15 @@ class Realm(SpriteGrouper, Observer):
     def spawn(self, monster_sprite):
         region = self.region_from_pixel_position(monster_sprite.rect.center)
         world = region.groups
-        if move_to_nearest_empty_space(monster_sprite, (world.solid, world.player), 500):
+        if move_to_nearest_empty_space(monster_sprite, (), 500, collision=self.spawn_collision):
             world.solid.add(monster_sprite)
             world.sleeping_monster.add(monster_sprite)
             return monster_sprite
         return None
 
+    def spawn_collision(self, sprite):
+        return self.solid_tile_hit(sprite.rect) or self.sprite_hit(sprite.rect, ("solid", "player"), ignore=sprite)
+
     def centre_on_tile(self, pixel_pos, offset=(0, 0)):
         x, y = pixel_pos
         region = self.region_from_pixel_position(pixel_pos)
@@ -203,6 +572,36 @@ class Realm(SpriteGrouper, Observer):
             region.groups.solid.add(monster)
 
 
+def region_seed(realm_seed, coordinates):
+    x, y = coordinates
+    return f"{realm_seed}:{x}:{y}"
+
+
+def region_rng(realm_seed, coordinates) -> random.Random:
+    """Each region has its own random stream so that it generates the same way no matter
+    when, where or in what order it is generated"""
+    return random.Random(region_seed(realm_seed, coordinates))
+
+
+def exit_position(realm_seed, coordinates, direction, length):
+    """The exit between the region at coordinates and its neighbour in direction ("S" or "E").
+    It only depends on the realm seed and the coordinates so either neighbour can work it out alone."""
+    rng = random.Random(f"{region_seed(realm_seed, coordinates)}:{direction}")
+    return rng.randint(1, length - 1)
+
+
+def generate_region(region: Region, rng: random.Random) -> Region:
+    return generate_map(region, random_room_generator(rng), rng)
+
+
+def generate_region_layout(task) -> RegionLayout:
+    """Worker process entry point: generate a region from scratch and return just its layout"""
+    region_size, tile_size, id_code, pixel_base, exits, seed, generator = task
+    region = Region(region_size, id_code=id_code, pixel_base=pixel_base, tile_size=pygame.Vector2(tile_size))
+    region.exits = exits
+    return layout_from_region(generator(region, random.Random(seed)))
+
+
 def drop_item(item_spec: Item, realm: Realm, x: int, y: int, count=1):
     drop_x, drop_y = x + randint(-16, 16), y + randint(-16, 16)
     new_item = copy.copy(item_spec)
@@ -214,21 +613,54 @@ def drop_item(item_spec: Item, realm: Realm, x: int, y: int, count=1):
     return item
 
 
+def missile_wall_hits(realm: Realm, missiles: List[MissileSprite]) -> List[Optional[StaticSolid]]:
+    """The wall that each missile hit in its last step, or None. A moving missile is swept along the step so
+    that it cannot pass through a wall however fast it is, and one that hits a wall is moved back to touch
+    it. Missiles that are not moving are tested where they are, all together."""
+    walls: List[Optional[StaticSolid]] = [None] * len(missiles)
+    still = []
+    for index, missile in enumerate(missiles):
+        dx, dy = missile.motion
+        if not dx and not dy:
+            still.append(index)
+            continue
+        start = missile.rect.move(-dx, -dy)
+        motion, walls[index] = realm.solid_tile_sweep(start, missile.motion)
+        if walls[index]:
+            missile.rect = start.move(motion)
+    for index, wall in zip(still, realm.solid_tile_hits([missiles[index].rect for index in still])):
+        walls[index] = wall
+    return walls
+
+
 def handle_missile_collisions(realm: Realm):
+    """Resolve all of this frame's missile collisions in one batch. Every live missile is tested first: against
+    walls through the tile grid, all together, and against actors through the spatial hashes. Then the impacts
+    are dispatched. A missile whose target was killed by an earlier impact in the batch hits the wall that it
+    reached instead, if there is one."""
     # The player is not in the solid group so enemy missiles
     # will need to do collision detection with the player group instead.
     # It is important that player missiles don't collide with the player.
-    missile: MissileSprite
-    for missile in realm.groups.player_missile:
-        region = realm.region_from_pixel_position(missile.rect.center)
-        hit = pygame.sprite.spritecollideany(missile, region.groups.solid)
-        if hit:
-            missile.on_impact(hit, realm)
-
-    for missile in realm.groups.missile:
-        region = realm.region_from_pixel_position(missile.rect.center)
-
-        hit = pygame.sprite.spritecollideany(missile, region.groups.solid)
-        hit = hit or pygame.sprite.spritecollideany(missile, realm.groups.player)
+    player_missiles: List[MissileSprite] = realm.groups.player_missile.sprites()
+    enemy_missiles: List[MissileSprite] = realm.groups.missile.sprites()
+    missiles = player_missiles + enemy_missiles
+    walls = missile_wall_hits(realm, missiles)
+    for missile in player_missiles:
+        realm.spatial["player_missile"].update(missile)
+    for missile in enemy_missiles:
+        realm.spatial["missile"].update(missile)
+
+    impacts = []
+    for index, (missile, wall) in enumerate(zip(missiles, walls)):
+        hit = realm.sprite_hit(missile.rect) or wall
+        if not hit and index >= len(player_missiles):
+            hit = realm.sprite_hit(missile.rect, ("player",))
         if hit:
-            missile.on_impact(hit, realm)
+            impacts.append((missile, hit, wall))
+
+    for missile, target, wall in impacts:
+        if isinstance(target, pygame.sprite.Sprite) and not target.alive():
+            if not wall:
+                continue
+            target = wall
+        missile.on_impact(target, realm)
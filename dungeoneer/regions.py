@@ -1,9 +1,10 @@
 import itertools
-from collections import namedtuple, deque
-from contextlib import suppress
+from collections import namedtuple
+from collections.abc import MutableMapping
 from enum import Enum
 from typing import Iterable, Dict, Type, List
 
+import numpy as np
 import pygame
 
 from dungeoneer import game_assets
@@ -11,7 +12,7 @@ from dungeoneer.actors import make_monster_sprite
 from dungeoneer.characters import MonsterType
 from dungeoneer.interfaces import SpriteGroups
 from dungeoneer.rooms import Rooms
-from dungeoneer.scenery import ScenerySprite, VisualEffect
+from dungeoneer.scenery import ScenerySprite, VisualEffect, SCENERY_FRAME_LENGTH
 from dungeoneer.spritesheet import SpriteSheet
 
 terrain = game_assets.load_image("terrain.png")
@@ -21,8 +22,15 @@ lava = game_assets.load_image("lava.png")
 
 
 class Tile:
-    def __init__(self, sprite_class: Type[VisualEffect], filmstrip: List, layer=0, is_solid=False, **parameters):
+    """
+    Args:
+        spec (tuple): compact, picklable description of the tile that can be used to recreate it.
+                      For example ("tile", "STONE_WALL") or ("item", "arrow")
+    """
+    def __init__(self, sprite_class: Type[VisualEffect], filmstrip: List, layer=0, is_solid=False, spec=None,
+                 **parameters):
         self.sprite_class = sprite_class
+        self.spec = spec
         self.filmstrip = filmstrip
         self.parameters = parameters
         self.width = filmstrip[0].get_width()
@@ -40,6 +48,15 @@ class Tile:
     def animated(self):
         return len(self.filmstrip) > 1
 
+    @property
+    def is_animated_scenery(self):
+        """True for tiles like water and lava, which only animate and so need no sprite. See AnimatedTile"""
+        return self.animated and not self.is_solid and self.sprite_class is ScenerySprite
+
+    @property
+    def frame_length(self):
+        return self.parameters.get("frame_length", SCENERY_FRAME_LENGTH)
+
 
 class TileType(Enum):
     @staticmethod
@@ -51,36 +68,85 @@ class TileType(Enum):
     LARGE_FLAGSTONE = make_tile(SpriteSheet(terrain, columns=8, rows=16, sub_area=(1, 2, 1, 1)))
     CHECKERED_TILES = make_tile(SpriteSheet(terrain, columns=8, rows=16, sub_area=(7, 1, 1, 1)))
     WATER = make_tile(SpriteSheet(liquids, columns=16, rows=12, sub_area=(0, 0, 6, 1)))
-    LAVA = make_tile(SpriteSheet(lava, columns=10, rows=1)),
+    LAVA = make_tile(SpriteSheet(lava, columns=10, rows=1))
     WOOD = make_tile(SpriteSheet(terrain, columns=8, rows=16, sub_area=(0, 4, 1, 2)))
     GRASS = make_tile(SpriteSheet(terrain, columns=8, rows=16, sub_area=(0, 1, 1, 1)))
     EARTH = make_tile(SpriteSheet(terrain, columns=8, rows=16, sub_area=(1, 1, 1, 1)))
     HEDGE = make_tile(SpriteSheet(vegetation, columns=16, rows=16, sub_area=(1, 3, 1, 1)), is_solid=True)
 
 
+for _tile_type in TileType:
+    _tile_type.value.spec = ("tile", _tile_type.name)
+
 Position = namedtuple("position", "x y")
 Size = namedtuple("size", "width height")
+# An animated scenery tile, drawn by the camera instead of by a sprite. position is the realm pixel position of
+# its top left. phase, in milliseconds, puts neighbouring tiles out of step. See animation.py
+AnimatedTile = namedtuple("AnimatedTile", "position tile phase")
 
 
 class NoFreeSpaceFound(Exception):
     """Raised when trying to find a free space near a specific spot but a space could not be found"""
 
 
+class TileLayer(MutableMapping):
+    """Dict-like view of one of a region's layers, keyed by grid position. Positions holding
+    palette id 0 are empty and are not in the layer."""
+    def __init__(self, region, ids: np.ndarray):
+        self.region = region
+        self.ids = ids
+
+    def __getitem__(self, position):
+        index = 0 if self.region.out_of_bounds(position) else self.ids[tuple(position)]
+        if not index:
+            raise KeyError(position)
+        return self.region.palette[index]
+
+    def __setitem__(self, position, tile: Tile):
+        if not self.region.out_of_bounds(position):
+            self.ids[tuple(position)] = self.region.palette_id(tile)
+
+    def __delitem__(self, position):
+        self[position]  # raises KeyError if there is nothing to delete
+        self.ids[tuple(position)] = 0
+
+    def __iter__(self):
+        return (Position(int(x), int(y)) for x, y in np.argwhere(self.ids))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ids))
+
+
 class Region:
-    """A region is a variable sized sparse grid of tiles"""
+    """A region is a variable sized grid of tiles.
+
+    The tiles are held in three layers of palette ids: the floor (tile_ids), anything solid (solid_ids)
+    and overlays such as animated tiles and dropped items (overlay_ids). An id indexes into the region's
+    palette of Tile objects and id 0 means there is nothing there (or the default tile for the floor).
+
+    Solid tiles are collided with through the solid layer (see collision.py) so their sprites are only
+    for drawing. Static scenery (solid tiles with a single frame) can be baked: it is then drawn as part
+    of the background and does not need sprites at all. Nor does animated scenery such as water and lava,
+    which the camera draws from the region's animated_tiles.
+    """
     region_id = itertools.count()
 
     def __init__(self, size, tile_size=pygame.Vector2(0,0),
                  default_tile: Tile = TileType.STONE_FLOOR.value, id_code=None,
                  pixel_base=(0, 0)):
         id_code = id_code or next(self.region_id)
+        self.id_code = id_code
         self.pixel_base = pixel_base
         self.name = f"Region-{id_code}"
         self.grid_width, self.grid_height = size
 
-        self.tiles = {}
-        self.visual_effects = {}
-        self.solid_objects = {}
+        self.palette: List[Tile] = [None]
+        self._palette_ids: Dict[int, int] = {}
+        self.tile_ids = np.zeros(size, dtype=np.uint16)
+        self.solid_ids = np.zeros(size, dtype=np.uint16)
+        self.overlay_ids = np.zeros(size, dtype=np.uint16)
+        self.baked_scenery = np.zeros(size, dtype=bool)  # solid tiles drawn into the background
+        self.animated_tiles: List[AnimatedTile] = []  # made by build_world
         self.monster_eggs = {}
 
         self.groups = SpriteGroups()
@@ -90,7 +156,9 @@ class Region:
         self.pixel_height = self.grid_height * self.tile_height
         self.default_tile = default_tile
         self.exits = {}
-        self.rooms = Rooms()
+        self.rooms = Rooms(size)
+        self.is_stub = False  # A stub has its place in the realm but has not been generated yet
+        self.snapshot = None  # Set while the region's sprites are evicted. See streaming.py
 
     def __repr__(self):
         return str(self.name)
@@ -98,6 +166,42 @@ class Region:
     def __len__(self):
         return self.grid_width * self.grid_height
 
+    @property
+    def is_evicted(self):
+        return self.snapshot is not None
+
+    @property
+    def tiles(self):
+        return TileLayer(self, self.tile_ids)
+
+    @property
+    def solid_objects(self):
+        return TileLayer(self, self.solid_ids)
+
+    @property
+    def visual_effects(self):
+        return TileLayer(self, self.overlay_ids)
+
+    def palette_id(self, tile: Tile) -> int:
+        """Find the tile in the palette, adding it if not already there"""
+        index = self._palette_ids.get(id(tile))
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(tile)
+            self._palette_ids[id(tile)] = index
+        return index
+
+    def set_layers(self, palette: List[Tile], tile_ids, solid_ids, overlay_ids):
+        """Replace all the region's tiles. Palette entry 0 is ignored."""
+        self.palette = [None]
+        self._palette_ids = {}
+        for tile in palette[1:]:
+            self.palette_id(tile)
+        self.tile_ids = np.array(tile_ids, dtype=np.uint16)
+        self.solid_ids = np.array(solid_ids, dtype=np.uint16)
+        self.overlay_ids = np.array(overlay_ids, dtype=np.uint16)
+        self.baked_scenery = np.zeros(self.solid_ids.shape, dtype=bool)
+
     def pixel_position(self, pos, align="topleft"):
         align_offsets = {
             "topleft": (0, 0),
@@ -110,10 +214,7 @@ class Region:
         return x + dx, y + dy
 
     def on_player_move(self, x, y):
-        pos = self.coordinate_from_absolute_position(x, y)
-        if pos not in self.rooms.index_by_position:
-            return
-        room_index = self.rooms.index_by_position[pos]
+        room_index = self.rooms.index_at(self.coordinate_from_absolute_position(x, y))
         if room_index not in self.rooms.monsters_by_index:
             return
         for monster in self.rooms.monsters_by_index[room_index]:
@@ -131,7 +232,9 @@ class Region:
         return any([x < 0, y < 0, x >= self.grid_width, y >= self.grid_height])
 
     def tile(self, position: Position):
-        return self.tiles.get(position, self.default_tile)
+        if self.out_of_bounds(position):
+            return self.default_tile
+        return self.palette[self.tile_ids[tuple(position)]] or self.default_tile
 
     def solid_object_at_position(self, position: Position):
         """
@@ -141,50 +244,93 @@ class Region:
         Returns:
             Solid object at position (Tile) or None
         """
-        return self.solid_objects.get(position)
+        if self.out_of_bounds(position):
+            return None
+        return self.palette[self.solid_ids[tuple(position)]]
 
     def animated_tile(self, position: Position):
-        return self.visual_effects.get(position)
+        if self.out_of_bounds(position):
+            return None
+        return self.palette[self.overlay_ids[tuple(position)]]
 
-    def place(self, position: Position, tile: Tile):
+    def place(self, position: Position, tile: Tile, layer=None):
+        if self.out_of_bounds(position):
+            return
+        self.place_in_area(tuple(position), tile, layer)
+
+    def place_in_area(self, index, tile: Tile, layer=None):
+        """Place tile at every position selected by the numpy index (a position, slices or a mask)"""
+        layer = tile.layer if layer is None else layer
+        tile_id = self.palette_id(tile)
         if tile.is_solid:
-            self.solid_objects[position] = tile
-        if tile.layer == 0:
-            self.tiles[position] = tile
+            self.solid_ids[index] = tile_id
+        if layer == 0:
+            self.tile_ids[index] = tile_id
             return
-        self.visual_effects[position] = tile
+        self.overlay_ids[index] = tile_id
 
     def place_by_type(self, position: Position, tile_type: TileType, layer=0):
-        tile = tile_type.value
-        tile.layer = layer
-        self.place(position, tile)
+        self.place(position, tile_type.value, layer)
 
     def place_monster_egg(self, position: Position, monster_type: MonsterType):
         self.monster_eggs[position] = monster_type
 
     def render_tiles_to_surface(self, surface, position):
-        for column in range(self.grid_width):
-            for row in range(self.grid_height):
-                tile_to_plot = self.tile((column, row))
-                x = column * self.tile_width
-                y = row * self.tile_height
-                p = position[0] + x, position[1] + y
-                surface.blit(tile_to_plot.filmstrip[0], p)
+        px, py = position
+        images = [tile.filmstrip[0] for tile in self.palette[1:]]
+        images.insert(0, self.default_tile.filmstrip[0])
+        columns, rows = np.indices(self.tile_ids.shape)
+        xs = (columns * self.tile_width + px).ravel().tolist()
+        ys = (rows * self.tile_height + py).ravel().tolist()
+        surface.blits([(images[i], (x, y)) for i, x, y in zip(self.tile_ids.ravel().tolist(), xs, ys)],
+                      doreturn=False)
+        # Solid tiles laid on the floor layer are already drawn. Others are centred on their cell like sprites.
+        blits = []
+        for column, row in np.argwhere(self.baked_scenery & (self.solid_ids != self.tile_ids)):
+            image = images[self.solid_ids[column, row]]
+            cx, cy = column * self.tile_width + self.tile_width // 2, row * self.tile_height + self.tile_height // 2
+            blits.append((image, (px + cx - image.get_width() // 2, py + cy - image.get_height() // 2)))
+        surface.blits(blits, doreturn=False)
         return surface
 
     def render_tiles(self):
         surface = pygame.Surface((self.pixel_width, self.pixel_height))
-        for column in range(self.grid_width):
-            for row in range(self.grid_height):
-                tile_to_plot = self.tile((column, row))
-                x = column * self.tile_width
-                y = row * self.tile_height
-                surface.blit(tile_to_plot.filmstrip[0], (x, y))
-        return surface
+        return self.render_tiles_to_surface(surface, (0, 0))
+
+    def bake_scenery(self):
+        """From now on draw the static scenery into the background instead of making sprites for it.
+        Call before build_world."""
+        static = [False] + [tile.is_solid and not tile.animated and issubclass(tile.sprite_class, ScenerySprite)
+                            for tile in self.palette[1:]]
+        self.baked_scenery = np.array(static)[self.solid_ids]
+
+    def place_solid_objects(self):
+        """Make sprites to draw the solid objects that have not been baked into the background. They are not
+        added to the solid group: collisions with solid tiles use the solid layer instead."""
+        unbaked = np.argwhere((self.solid_ids != 0) & ~self.baked_scenery)
+        self.place_sprites({Position(int(x), int(y)): self.palette[self.solid_ids[x, y]] for x, y in unbaked},
+                           [self.groups.effects])
+
+    def find_animated_tiles(self) -> List[AnimatedTile]:
+        """The animated scenery on the floor and overlay layers. Overlays are centred on their cell like
+        sprites; floor tiles are drawn from the cell's top left like the background."""
+        animated = np.array([False] + [tile.is_animated_scenery for tile in self.palette[1:]])
+        result = []
+        for ids, centred in ((self.tile_ids, False), (self.overlay_ids, True)):
+            for column, row in np.argwhere(animated[ids]):
+                tile = self.palette[ids[column, row]]
+                x, y = self.pixel_position((column, row))
+                if centred:
+                    x, y = x + (self.tile_width - tile.width) // 2, y + (self.tile_height - tile.height) // 2
+                phase = (column + row) % len(tile.filmstrip) * tile.frame_length
+                result.append(AnimatedTile((int(x), int(y)), tile, int(phase)))
+        return result
 
     def build_world(self, realm):
-        self.place_sprites(self.solid_objects, [self.groups.effects, self.groups.solid])
-        self.place_sprites(self.visual_effects, [self.groups.effects, self.groups.items])
+        self.place_solid_objects()
+        self.animated_tiles = self.find_animated_tiles()
+        overlays = {position: tile for position, tile in self.visual_effects.items() if not tile.is_animated_scenery}
+        self.place_sprites(overlays, [self.groups.effects, self.groups.items])
         self.place_monsters(self.monster_eggs, [self.groups.monster, self.groups.solid], realm)
 
     def place_monsters(self, monster_eggs, groups, realm):
@@ -195,8 +341,9 @@ class Region:
             y = base_y + position.y * self.tile_height + self.tile_height // 2
 
             monster_sprite = make_monster_sprite(monster_type, x, y, realm)
-            room_index = self.rooms.index_by_position[(position.x, position.y)]
-            self.rooms.add_monster(monster_sprite, room_index)
+            room_index = self.rooms.index_at(position)
+            if room_index is not None:
+                self.rooms.add_monster(monster_sprite, room_index)
             if monster_sprite:
                 for g in groups:
                     g.add(monster_sprite)
@@ -217,27 +364,42 @@ class Region:
         top_left = (0, 0)
         self.fill(top_left, size, tile)
 
-    def fill(self, top_left, size, tile: TileType):
+    def area(self, top_left, size):
+        """numpy index of the rectangle, clipped to the region"""
         x, y = top_left
         width, height = size
-        for column in range(x, x + width):
-            for row in range(y, y + height):
-                self.place_by_type((column, row), tile)
+        return slice(max(x, 0), max(x + width, 0)), slice(max(y, 0), max(y + height, 0))
+
+    def fill(self, top_left, size, tile: TileType):
+        self.place_in_area(self.area(top_left, size), tile.value, layer=0)
 
     def clear_area(self, top_left, size):
-        x, y = top_left
-        width, height = size
-        for column in range(x, x + width):
-            for row in range(y, y + height):
-                self.solid_objects.pop((column, row), None)
+        self.solid_ids[self.area(top_left, size)] = 0
 
     def clear_nodes(self, nodes: Iterable[Position], replace_tile=None):
-        for p in nodes:
-            self.solid_objects.pop(p, None)
-            if replace_tile:
-                self.place_by_type(p, replace_tile)
-            else:
-                self.tiles.pop(p, None)
+        self.carve(self.nodes_index(nodes), replace_tile)
+
+    def carve(self, index, replace_tile: TileType = None):
+        """Remove solid objects from every position selected by the numpy index (slices, a mask or
+        arrays of positions) and lay replace_tile as the floor or, if None, go back to the default tile"""
+        self.solid_ids[index] = 0
+        if replace_tile:
+            self.place_in_area(index, replace_tile.value, layer=0)
+        else:
+            self.tile_ids[index] = 0
+
+    def nodes_index(self, nodes: Iterable[Position]):
+        """numpy index of all the nodes that are inside the region"""
+        nodes = np.fromiter(itertools.chain.from_iterable(nodes), dtype=int).reshape(-1, 2)
+        xs, ys = nodes[:, 0], nodes[:, 1]
+        inside = (xs >= 0) & (ys >= 0) & (xs < self.grid_width) & (ys < self.grid_height)
+        return xs[inside], ys[inside]
+
+    def mask(self, nodes: Iterable[Position] = ()) -> np.ndarray:
+        """Boolean array the size of the region that is True at each of the nodes"""
+        mask = np.zeros((self.grid_width, self.grid_height), dtype=bool)
+        mask[self.nodes_index(nodes)] = True
+        return mask
 
     def nearest_free_space(self, x0: int, y0: int, max_distance=5):
         """Find nearest empty tile in the region
@@ -249,27 +411,19 @@ class Region:
         Returns:
             col, row in region of free space
         """
-        neighbours = [(-1, -1), (0, -1), (1, -1),
-                      (-1, 0), (1, 0),
-                      (-1, 1), (1, 0), (1, 1)]
-        queue = deque([(x0, y0)])
-        checked = set()
-        while queue:
-            x, y = queue.popleft()
-            checked.add((x, y))
-            if (x, y) not in self.solid_objects:
-                return x, y
-            for dx, dy in neighbours:
-                manhatten_distance = abs(x + dx - x0) + abs(y + dy - y0)
-                pos = (x + dx, y + dy)
-                if self.out_of_bounds(pos):
-                    continue
-                if pos in checked:
-                    continue
-                if manhatten_distance > max_distance:
-                    continue
-                queue.append((x + dx, y + dy))
-        raise NoFreeSpaceFound(f"Couldn't find free space within {max_distance} of {(x, y)}")
+        columns, rows = np.nonzero(self.solid_ids[self.area((x0 - max_distance, y0 - max_distance),
+                                                            (2 * max_distance + 1, 2 * max_distance + 1))] == 0)
+        columns += max(x0 - max_distance, 0)
+        rows += max(y0 - max_distance, 0)
+        dx, dy = np.abs(columns - x0), np.abs(rows - y0)
+        manhatten_distance = dx + dy
+        in_reach = manhatten_distance <= max_distance
+        if not np.any(in_reach):
+            raise NoFreeSpaceFound(f"Couldn't find free space within {max_distance} of {(x0, y0)}")
+        # nearest by number of (diagonal) steps then by manhatten distance
+        steps = np.maximum(dx, dy)
+        nearest = np.lexsort((manhatten_distance[in_reach], steps[in_reach]))[0]
+        return int(columns[in_reach][nearest]), int(rows[in_reach][nearest])
 
 
 class SubRegion:
@@ -0,0 +1,133 @@
+"""
+A replay is what the player did in a game, step by step, so that the same game can be played again exactly.
+Replays make fixed scenarios for comparing how fast one build runs a game with another.
+
+For each simulation step a replay holds which of the keys that the player reads were held down and which
+key presses went to the KeyEventDispatcher. With the realm seed and the game's settings, which are kept
+alongside, that is everything that decides how the game goes: the realm is generated from the seed, the
+simulation runs in fixed steps and the clock it uses is the simulated time, and the random numbers that
+monsters and missiles draw come from the seed too.
+
+Held keys rarely change from one step to the next, so they are kept as runs of steps with the same keys.
+
+File layout:
+
+    magic (8 bytes) | version (uint32) | zlib compressed JSON
+"""
+import json
+import random
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Tuple, Dict
+
+import pygame
+
+from dungeoneer.event_dispatcher import HeldKeys, KeyEventDispatcher
+
+MAGIC = b"DGNREPLY"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sI")  # magic, version
+RECORDED_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_RETURN, pygame.K_SPACE)  # see Player
+
+
+class StaleReplay(ValueError):
+    """Raised when a file is not a replay or was written by a different version"""
+
+
+@dataclass
+class Replay:
+    """
+    Args:
+        seed (int): realm seed, which also seeds the random numbers drawn while the game is played
+        game (dict): keyword arguments to make the DungeoneerGame with
+        key_runs (list): [mask, steps] pairs, one for each run of steps with the same keys held. Bit n of
+                         the mask is set if RECORDED_KEYS[n] was held
+        events (list): [step, event type, key] for each key event dispatched
+    """
+    seed: int
+    game: dict = field(default_factory=dict)
+    key_runs: List[List[int]] = field(default_factory=list)
+    events: List[List[int]] = field(default_factory=list)
+
+    @property
+    def steps(self) -> int:
+        return sum(steps for _, steps in self.key_runs)
+
+    def save(self, path):
+        body = json.dumps({"seed": self.seed, "game": self.game, "keys": list(RECORDED_KEYS),
+                           "key_runs": self.key_runs, "events": self.events}).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION))
+            f.write(zlib.compress(body))
+
+    @classmethod
+    def load(cls, path) -> "Replay":
+        """
+        Raises:
+            FileNotFoundError: if there is no replay file
+            StaleReplay: if the file is not a replay this version can play
+        """
+        with open(path, "rb") as f:
+            preamble = f.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise StaleReplay(f"{path} is too short to be a replay")
+            magic, version = PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise StaleReplay(f"{path} is not a replay")
+            if version != VERSION:
+                raise StaleReplay(f"{path} is replay version {version}, expected {VERSION}")
+            body = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        if body["keys"] != list(RECORDED_KEYS):
+            raise StaleReplay(f"{path} records different keys")
+        return cls(body["seed"], body["game"], body["key_runs"], body["events"])
+
+
+def key_mask(keyboard) -> int:
+    """The recorded keys held down on the keyboard, as a Replay mask"""
+    return sum(1 << bit for bit, key in enumerate(RECORDED_KEYS) if keyboard[key])
+
+
+class ReplayRecorder:
+    """Records a game's input into a Replay. Reseeds the random numbers, as a ReplayPlayback does."""
+    def __init__(self, seed, game: dict = None):
+        self.replay = Replay(seed, dict(game or {}))
+        self.step = 0
+        random.seed(seed)
+
+    def record_event(self, event_type, key):
+        self.replay.events.append([self.step, event_type, key])
+
+    def record_keys(self, keyboard):
+        """Record the keyboard state of this step and move on to the next step"""
+        mask = key_mask(keyboard)
+        runs = self.replay.key_runs
+        if runs and runs[-1][0] == mask:
+            runs[-1][1] += 1
+        else:
+            runs.append([mask, 1])
+        self.step += 1
+
+
+class ReplayPlayback:
+    """Plays a Replay's input back step by step. Once the replay has finished, no keys are held."""
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.step = 0
+        self.masks = [mask for mask, steps in replay.key_runs for _ in range(steps)]
+        self.events: Dict[int, List[Tuple[int, int]]] = {}
+        for step, event_type, key in replay.events:
+            self.events.setdefault(step, []).append((event_type, key))
+        random.seed(replay.seed)
+
+    @property
+    def finished(self) -> bool:
+        return self.step >= len(self.masks)
+
+    def play_step(self, key_event_dispatcher: KeyEventDispatcher) -> HeldKeys:
+        """Dispatch this step's key events and return its keyboard state, then move on to the next step"""
+        for event_type, key in self.events.get(self.step, ()):
+            key_event_dispatcher.event(event_type, key)
+        mask = self.masks[self.step] if not self.finished else 0
+        self.step += 1
+        return HeldKeys(key for bit, key in enumerate(RECORDED_KEYS) if mask & 1 << bit)
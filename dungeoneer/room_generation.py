@@ -3,35 +3,42 @@ import random
 from typing import List
 
 from dungeoneer.dice_roll import pick_from_weighted_table, dice
-from dungeoneer.map_maker import join_exits, carve_out_dungeon, make_sub_regions, \
-    sub_regions_to_nodes, join_nodes, make_rooms_in_subregions, RegionGenerator, join_two_nodes
+from dungeoneer.map_maker import dig_exits, carve_out_dungeon, make_sub_regions, \
+    sub_regions_to_nodes, dig_corridors, make_rooms_in_subregions, RegionGenerator, dig_corridor
 from dungeoneer.spawn import item_drops, monster_drops, place_treasure
 from dungeoneer.regions import Position, SubRegion, Region
+from dungeoneer.rooms import Room
 
 
-def random_room_generator() -> RegionGenerator:
+def random_room_generator(rng=random) -> RegionGenerator:
     design_table = {
         LargeRoomGenerator: 1,
         BossRegionGenerator: 2,
         EnclosedBossChamberGenerator: 2,
         ConnectedRoomGenerator: 10
     }
-    return pick_from_weighted_table(design_table)
+    return pick_from_weighted_table(design_table, rng)
 
 
 class RoomGenerator(ABC):
-    def __init__(self, region: Region):
+    """
+    Args:
+        region (Region): the region to fill with rooms
+        rng (random.Random): random number stream that all the generator's choices are drawn from
+    """
+    def __init__(self, region: Region, rng=random):
         self.region = region
+        self.rng = rng
         self.sub_regions: List[SubRegion] = []
-        self.paths: List[List[Position]] = []
-        self.rooms: List[List[Position]] = []
+        self.corridors = region.mask()
+        self.rooms: List[Room] = []
 
     def generate(self) -> Region:
         nodes = self.make_nodes()
         self.make_corridors(nodes)
         self.make_rooms()
         self.region.rooms.add_rooms_list(self.rooms)
-        carve_out_dungeon(self.region, self.paths, self.rooms)
+        carve_out_dungeon(self.region, self.corridors, self.rooms, rng=self.rng)
         self.populate()
         room_type = str(self.__class__).split(".")[-1].split("Generator")[0]
         self.region.name = f"{room_type}-{self.region.pixel_base}"
@@ -56,30 +63,33 @@ class RoomGenerator(ABC):
 
 class ConnectedRoomGenerator(RoomGenerator):
     def make_nodes(self):
-        self.sub_regions = make_sub_regions(self.region, node_count=16)
+        self.sub_regions = make_sub_regions(self.region, node_count=16, rng=self.rng)
         return sub_regions_to_nodes(self.sub_regions)
 
     def make_corridors(self, nodes):
-        self.paths = join_nodes(nodes)
-        self.paths.extend(join_exits(nodes, self.region.exits, (self.region.grid_width, self.region.grid_height)))
+        dig_corridors(self.corridors, nodes, rng=self.rng)
+        self.dig_exits(nodes)
+
+    def dig_exits(self, nodes):
+        dig_exits(self.corridors, nodes, self.region.exits, self.rng)
 
     def make_rooms(self):
-        self.rooms = make_rooms_in_subregions(self.sub_regions)
+        self.rooms = make_rooms_in_subregions(self.sub_regions, rng=self.rng)
 
     def populate(self):
         for room in self.rooms:
-            item_drops(room, self.region)
-            monster_drops(room, self.region)
+            item_drops(room, self.region, rng=self.rng)
+            monster_drops(room, self.region, rng=self.rng)
 
 
 class BossRegionGenerator(ConnectedRoomGenerator):
     def make_nodes(self):
-        self.sub_regions = make_sub_regions(self.region, node_count=2)
+        self.sub_regions = make_sub_regions(self.region, node_count=2, rng=self.rng)
         return sub_regions_to_nodes(self.sub_regions)
 
     def make_corridors(self, nodes):
-        self.paths = join_nodes(nodes, width_table={1: 2, 2: 10, 3: 2, 4: 1})
-        self.paths.extend(join_exits(nodes, self.region.exits, (self.region.grid_width, self.region.grid_height)))
+        dig_corridors(self.corridors, nodes, width_table={1: 2, 2: 10, 3: 2, 4: 1}, rng=self.rng)
+        self.dig_exits(nodes)
 
 
 class EnclosedBossChamberGenerator(ConnectedRoomGenerator):
@@ -88,7 +98,7 @@ class EnclosedBossChamberGenerator(ConnectedRoomGenerator):
         boss_chamber = SubRegion(self.region, (3, 3), (width - 5, height - 5))
 
         self.sub_regions = [
-            *boss_chamber.split_horizontally(random.uniform(0.7, 0.9))
+            *boss_chamber.split_horizontally(self.rng.uniform(0.7, 0.9))
         ]
         corners = [(1, 1), (width - 2, 1), (width - 2, height - 2), (1, height - 2)]
         corners = [Position(*p) for p in corners]
@@ -96,26 +106,20 @@ class EnclosedBossChamberGenerator(ConnectedRoomGenerator):
 
     def make_corridors(self, nodes):
         width = 2
-        self.paths = [
-            *join_two_nodes(nodes[0], nodes[1], width),
-            *join_two_nodes(nodes[1], nodes[2], width),
-            *join_two_nodes(nodes[2], nodes[3], width),
-            *join_two_nodes(nodes[3], nodes[0], width),
-            *join_two_nodes(nodes[0], nodes[4], width),
-            *join_two_nodes(nodes[4], nodes[5], width),
-        ]
-        self.paths.extend(join_exits(nodes, self.region.exits, (self.region.grid_width, self.region.grid_height)))
+        for src, dest in ((0, 1), (1, 2), (2, 3), (3, 0), (0, 4), (4, 5)):
+            dig_corridor(self.corridors, nodes[src], nodes[dest], width, self.rng)
+        self.dig_exits(nodes)
 
     def make_rooms(self):
-        self.rooms = make_rooms_in_subregions(self.sub_regions, undersize_pc_probability=0)
+        self.rooms = make_rooms_in_subregions(self.sub_regions, undersize_pc_probability=0, rng=self.rng)
 
     def populate(self):
         for _ in range(20):
-            item_drops(self.rooms[1], self.region, drop_table={place_treasure: 100})
-        for _ in range(dice(3, 2)):
-            item_drops(self.rooms[1], self.region)
-        for _ in range(dice(3, 3) + 1):
-            monster_drops(self.rooms[0], self.region)
+            item_drops(self.rooms[1], self.region, drop_table={place_treasure: 100}, rng=self.rng)
+        for _ in range(dice(3, 2, self.rng)):
+            item_drops(self.rooms[1], self.region, rng=self.rng)
+        for _ in range(dice(3, 3, self.rng) + 1):
+            monster_drops(self.rooms[0], self.region, rng=self.rng)
 
 
 class LargeRoomGenerator(ConnectedRoomGenerator):
@@ -127,15 +131,13 @@ class LargeRoomGenerator(ConnectedRoomGenerator):
         return [Position(10, 10)]
 
     def make_corridors(self, nodes):
-        self.paths = join_exits(nodes, self.region.exits, (self.region.grid_width, self.region.grid_height))
+        self.dig_exits(nodes)
 
     def make_rooms(self):
-        self.rooms = [[Position(x, y)
-                       for x in range(1, self.region.grid_width - 1)
-                       for y in range(1, self.region.grid_height - 1)]]
+        self.rooms = [Room(1, 1, self.region.grid_width - 2, self.region.grid_height - 2)]
 
     def populate(self):
         for room in self.rooms:
             for _ in range(4):
-                item_drops(room, self.region)
-                monster_drops(room, self.region)
+                item_drops(room, self.region, rng=self.rng)
+                monster_drops(room, self.region, rng=self.rng)
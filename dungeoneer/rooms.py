@@ -1,26 +1,138 @@
-from typing import  List
+import random
+from collections.abc import Sequence
+from typing import List, Iterable, Optional, Tuple
+
+import numpy as np
 
 from dungeoneer.characters import Character
 
+NO_ROOM = -1
+
+
+class Room(Sequence):
+    """Rectangle of cells in a region. A room behaves as a sequence of its (x, y) cells, column by column,
+    without ever building the list.
+    """
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x: int, y: int, width: int, height: int):
+        self.x, self.y = x, y
+        self.width, self.height = max(width, 0), max(height, 0)
+
+    def __repr__(self):
+        return f"Room({self.x}, {self.y}, {self.width}, {self.height})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Room):
+            return NotImplemented
+        return self.rect == other.rect
+
+    def __hash__(self):
+        return hash(self.rect)
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("room index out of range")
+        column, row = divmod(index, self.height)
+        return self.x + column, self.y + row
+
+    def __iter__(self):
+        for x in range(self.x, self.x + self.width):
+            for y in range(self.y, self.y + self.height):
+                yield x, y
+
+    def __contains__(self, position):
+        x, y = position
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    @property
+    def rect(self) -> Tuple[int, int, int, int]:
+        return self.x, self.y, self.width, self.height
+
+    @property
+    def top_left(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def area(self):
+        """numpy index of the room's cells"""
+        return (slice(max(self.x, 0), max(self.x + self.width, 0)),
+                slice(max(self.y, 0), max(self.y + self.height, 0)))
+
+    def random_cell(self, rng=random) -> Tuple[int, int]:
+        return rng.choice(self)
+
 
 class Rooms:
-    def __init__(self):
+    """The rooms of a region, with a grid the size of the region holding the index of the room at each
+    cell, or NO_ROOM.
+
+    Args:
+        size (width, height): size of the region in cells
+    """
+    def __init__(self, size=(0, 0)):
         self.monsters_by_index = {}
-        self.index_by_position = {}
-        self.next_index = 0
+        self.rooms: List[Sequence] = []
+        self.index_grid = np.full(size, NO_ROOM, dtype=np.int16)
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __iter__(self):
+        return iter(self.rooms)
+
+    def __getitem__(self, index):
+        return self.rooms[index]
 
     @property
     def count(self):
-        return self.next_index
+        return len(self.rooms)
 
-    def add_rooms_list(self, rooms_list: List[List]):
+    def add_rooms_list(self, rooms_list: Iterable[Sequence]):
         for room in rooms_list:
             self.add_room(room)
 
-    def add_room(self, room: List):
-        for p in room:
-            self.index_by_position[p] = self.next_index
-        self.next_index += 1
+    def add_room(self, room: Sequence) -> int:
+        """Add a Room, or any other sequence of positions, and return its index"""
+        index = len(self.rooms)
+        self.rooms.append(room)
+        if isinstance(room, Room):
+            self.index_grid[room.area] = index
+        elif room:
+            positions = np.array(room, dtype=int).reshape(-1, 2)
+            xs, ys = positions[:, 0], positions[:, 1]
+            width, height = self.index_grid.shape
+            inside = (xs >= 0) & (ys >= 0) & (xs < width) & (ys < height)
+            self.index_grid[xs[inside], ys[inside]] = index
+        return index
+
+    def set_rooms(self, rooms: List[Sequence], index_grid):
+        self.rooms = list(rooms)
+        self.index_grid = np.array(index_grid, dtype=np.int16)
+
+    def index_at(self, position) -> Optional[int]:
+        """Index of the room that the position is in, or None if it is not in a room"""
+        x, y = position
+        width, height = self.index_grid.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        index = int(self.index_grid[x, y])
+        return None if index == NO_ROOM else index
+
+    def room_at(self, position) -> Optional[Sequence]:
+        index = self.index_at(position)
+        return None if index is None else self.rooms[index]
 
     def add_monster(self, monster: Character, room_index: int):
         if room_index not in self.monsters_by_index:
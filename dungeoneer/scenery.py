@@ -3,25 +3,57 @@ from random import randint
 
 import pygame
 
+from dungeoneer import animation
+from dungeoneer.animation import AnimationClock, frame_at
+
+SCENERY_FRAME_LENGTH = 1200  # milliseconds
+
 
 class VisualEffect(pygame.sprite.Sprite):
+    """An animation that plays through its filmstrip, then repeats, then kills itself. The frame showing is
+    worked out from the animation clock, so an effect that repeats FOREVER and does not move never needs
+    to be updated. See animation.py
+
+    Args:
+        frame_length (int): milliseconds that each frame is shown for. If not positive then each update
+                            moves on one frame instead, whatever the time
+        repeats (int): number of times to play the filmstrip again after the first, or FOREVER
+        clock (AnimationClock): clock to animate by. Defaults to the game's clock
+    """
     FOREVER = -1
 
-    def __init__(self, x, y, filmstrip, frame_length=200, repeats=0, reverse=False, motion=None):
+    def __init__(self, x, y, filmstrip, frame_length=200, repeats=0, reverse=False, motion=None,
+                 clock: AnimationClock = None):
         super().__init__()
         self.filmstrip = filmstrip
         if reverse:
             self.filmstrip = self.filmstrip[::-1]
         self.repeats = repeats
         self.frame_length = frame_length
-        self.frame = 0
-        self.image = self.filmstrip[self.frame]
-        self.rect = self.image.get_rect()
+        self.clock = clock or animation.clock
+        self.start_time = self.clock.time
+        self.updates = 0
+        self.rect = self.filmstrip[0].get_rect()
         self.rect.center = (x, y)
-        self.next_frame_t = pygame.time.get_ticks() + self.frame_length
         self.motion = motion
 
+    @property
+    def frames_shown(self) -> int:
+        """Number of frames that have been shown since the effect started"""
+        if self.frame_length > 0:
+            return int((self.clock.time - self.start_time) // self.frame_length)
+        return self.updates
+
+    @property
+    def frame(self) -> int:
+        return self.frames_shown % len(self.filmstrip)
+
+    @property
+    def image(self) -> pygame.Surface:
+        return self.filmstrip[self.frame]
+
     def update(self):
+        self.updates += 1
         self.move()
         self.animate()
 
@@ -34,18 +66,9 @@ class VisualEffect(pygame.sprite.Sprite):
             self.rect.center = x + dx, y + dy
 
     def animate(self):
-        t = pygame.time.get_ticks()
-        if t > self.next_frame_t:
-            self.frame += 1
-            self.next_frame_t = pygame.time.get_ticks() + self.frame_length
-        if self.frame == len(self.filmstrip):
-            if self.repeats:
-                self.frame = 0
-                self.repeats -= 1
-            else:
-                self.kill()
-                return
-        self.image = self.filmstrip[self.frame]
+        """Kill the effect once it has played all of its repeats"""
+        if self.repeats != self.FOREVER and self.frames_shown >= len(self.filmstrip) * (self.repeats + 1):
+            self.kill()
 
     def on_impact(self, hit, world):
         del hit  # unused
@@ -54,22 +77,38 @@ class VisualEffect(pygame.sprite.Sprite):
 
 
 class ScenerySprite(VisualEffect):
-    def __init__(self, x, y, filmstrip, frame_length=1200, reverse=False, scale=1, animated=True):
+    def __init__(self, x, y, filmstrip, frame_length=SCENERY_FRAME_LENGTH, reverse=False, scale=1, animated=True):
         super().__init__(x, y, filmstrip, frame_length=frame_length, repeats=self.FOREVER,
                          reverse=reverse)
         self.animated = animated
         self.vitality = 1000
         # Put different items of scenery out of sync with each other...
-        self.frame = (x + y) % len(self.filmstrip)  # in space...
-        if self.animated:
-            self.next_frame_t += randint(0, self.frame_length)  # and, if animated, in time.
+        self.first_frame = int(x + y) % len(self.filmstrip)  # in space...
+        self.phase = randint(0, self.frame_length) if self.animated else 0  # and, if animated, in time.
+
+    @property
+    def frame(self) -> int:
+        if not self.animated:
+            return self.first_frame
+        return (self.first_frame + frame_at(self.clock.time, self.frame_length, len(self.filmstrip),
+                                            self.phase)) % len(self.filmstrip)
 
     def on_hit(self):
         pass
 
     def update(self):
-        if self.animated:
-            self.animate()
+        """Nothing to do: scenery animates by the clock"""
+
+
+class StaticSolid:
+    """Stands in for a solid tile, which has no sprite in the solid group, so that whatever hits it has
+    something to hit. It is not a sprite and is thrown away after the collision."""
+    def __init__(self, rect: pygame.Rect):
+        self.rect = rect
+        self.vitality = 1000
+
+    def on_hit(self):
+        pass
 
 
 def parabolic_motion(arc_width, steps, dy, g=1):
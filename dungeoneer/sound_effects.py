@@ -2,18 +2,12 @@ import pygame
 
 from dungeoneer import game_assets
 from dungeoneer.events import WARNING_EVENT
-from dungeoneer.game_assets import load_sound_file, sfx_file
+from dungeoneer.game_assets import load_sound_file, sfx_file, NullSound
 
 
 def sfx_from_name(name):
-    class NullSfx:
-        def play(self, *args, **kwargs):
-            del args
-            del kwargs
-            del self
-
     if not name:
-        return NullSfx()
+        return NullSound()
     return load_sound_file(sfx_file(name))
 
 
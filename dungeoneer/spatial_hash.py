@@ -0,0 +1,178 @@
+"""
+A spatial hash divides the realm into a uniform grid of cells and remembers which cells each sprite's rect
+overlaps. Looking for the sprites in a rect, around a point or nearest to a point then only visits the few
+cells involved, however many sprites there are and whichever regions they are in.
+
+The realm keeps one hash for each kind of dynamic sprite. IndexedGroup keeps a hash up to date as sprites
+are added to and removed from groups, including by Sprite.kill, and the realm updates a sprite's cells when
+it moves.
+"""
+import math
+from typing import Dict, Tuple, List, Optional, Callable
+
+import pygame
+from pygame.sprite import Sprite
+
+Cell = Tuple[int, int]
+CellRange = Tuple[int, int, int, int]  # left, top, right, bottom. Inclusive
+
+
+class SpatialHash:
+    """
+    Args:
+        cell_size (tuple[int, int]): pixel size of a cell. A cell a little bigger than a typical sprite
+                       keeps most sprites in one to four cells.
+    """
+    def __init__(self, cell_size=(80, 80)):
+        self.cell_width, self.cell_height = cell_size
+        # Dicts rather than sets so that queries return sprites in a repeatable order
+        self.cells: Dict[Cell, Dict[Sprite, None]] = {}
+        self.ranges: Dict[Sprite, CellRange] = {}
+        self.references: Dict[Sprite, int] = {}  # number of groups holding the sprite. See IndexedGroup
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __contains__(self, sprite):
+        return sprite in self.ranges
+
+    def __iter__(self):
+        return iter(list(self.ranges))
+
+    def cell_range(self, rect: pygame.Rect) -> CellRange:
+        left, top = int(rect.left // self.cell_width), int(rect.top // self.cell_height)
+        right = max(left, int((rect.right - 1) // self.cell_width))
+        bottom = max(top, int((rect.bottom - 1) // self.cell_height))
+        return left, top, right, bottom
+
+    @staticmethod
+    def cells_in(cell_range: CellRange):
+        left, top, right, bottom = cell_range
+        return ((x, y) for x in range(left, right + 1) for y in range(top, bottom + 1))
+
+    def insert(self, sprite: Sprite):
+        self.update(sprite)
+
+    def update(self, sprite: Sprite):
+        """Move the sprite to the cells that its rect now overlaps. Does nothing if they are the same cells."""
+        new = self.cell_range(sprite.rect)
+        old = self.ranges.get(sprite)
+        if old == new:
+            return
+        if old:
+            self._remove_from_cells(sprite, old)
+        for cell in self.cells_in(new):
+            self.cells.setdefault(cell, {})[sprite] = None
+        self.ranges[sprite] = new
+
+    def remove(self, sprite: Sprite):
+        old = self.ranges.pop(sprite, None)
+        if old:
+            self._remove_from_cells(sprite, old)
+        self.references.pop(sprite, None)
+
+    def _remove_from_cells(self, sprite, cell_range: CellRange):
+        for cell in self.cells_in(cell_range):
+            sprites = self.cells.get(cell)
+            if sprites is None:
+                continue
+            sprites.pop(sprite, None)
+            if not sprites:
+                del self.cells[cell]
+
+    def _candidates(self, cells) -> List[Sprite]:
+        """The live sprites in the cells, each once. Sprites that are no longer in any group have been
+        killed and are dropped from the hash on the way."""
+        found = {}
+        dead = []
+        for cell in cells:
+            for sprite in self.cells.get(cell, ()):
+                if sprite in found:
+                    continue
+                if sprite.alive():
+                    found[sprite] = None
+                else:
+                    dead.append(sprite)
+        for sprite in dead:
+            self.remove(sprite)
+        return list(found)
+
+    def query_rect(self, rect: pygame.Rect) -> List[Sprite]:
+        """The sprites whose rects overlap the rect"""
+        rect = pygame.Rect(rect)
+        return [sprite for sprite in self._candidates(self.cells_in(self.cell_range(rect)))
+                if sprite.rect.colliderect(rect)]
+
+    def query_radius(self, point, radius) -> List[Sprite]:
+        """The sprites whose rects come within radius of the point"""
+        x, y = point
+        box = pygame.Rect(math.floor(x - radius), math.floor(y - radius), math.ceil(2 * radius) + 1,
+                          math.ceil(2 * radius) + 1)
+        return [sprite for sprite in self._candidates(self.cells_in(self.cell_range(box)))
+                if _distance_squared_to_rect(point, sprite.rect) <= radius * radius]
+
+    def nearest(self, point, max_distance=None, predicate: Callable[[Sprite], bool] = None) -> Optional[Sprite]:
+        """The sprite whose centre is nearest the point, searching outwards ring by ring of cells
+
+        Args:
+            max_distance: ignore sprites further than this. If None then search as far as the furthest sprite
+            predicate: only consider sprites for which this is True
+        """
+        if not self.ranges:
+            return None
+        x, y = point
+        cx, cy = int(x // self.cell_width), int(y // self.cell_height)
+        if max_distance is None:
+            last_ring = max(max(abs(cell_x - cx), abs(cell_y - cy)) for cell_x, cell_y in self.cells)
+        else:
+            last_ring = math.ceil(max_distance / min(self.cell_width, self.cell_height)) + 1
+        limit = math.inf if max_distance is None else max_distance * max_distance
+        best, best_distance = None, limit
+        for ring in range(last_ring + 1):
+            for sprite in self._candidates(self._ring(cx, cy, ring)):
+                if predicate and not predicate(sprite):
+                    continue
+                sx, sy = sprite.rect.center
+                distance = (sx - x) ** 2 + (sy - y) ** 2
+                if distance < best_distance:
+                    best, best_distance = sprite, distance
+            # A centre in any further ring is at least this far away
+            if best and best_distance <= (ring * min(self.cell_width, self.cell_height)) ** 2:
+                break
+        return best
+
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            return [(cx, cy)]
+        cells = [(x, y) for x in range(cx - ring, cx + ring + 1) for y in (cy - ring, cy + ring)]
+        cells += [(x, y) for x in (cx - ring, cx + ring) for y in range(cy - ring + 1, cy + ring)]
+        return cells
+
+
+def _distance_squared_to_rect(point, rect: pygame.Rect):
+    x, y = point
+    dx = max(rect.left - x, 0, x - rect.right)
+    dy = max(rect.top - y, 0, y - rect.bottom)
+    return dx * dx + dy * dy
+
+
+class IndexedGroup(pygame.sprite.Group):
+    """A sprite group that keeps its sprites in a spatial hash. Several groups can share a hash: a sprite
+    stays in the hash for as long as it is in at least one of them."""
+    def __init__(self, spatial_hash: SpatialHash, *sprites):
+        self.spatial_hash = spatial_hash
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        references = self.spatial_hash.references
+        references[sprite] = references.get(sprite, 0) + 1
+        self.spatial_hash.insert(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        references = self.spatial_hash.references
+        references[sprite] = references.get(sprite, 1) - 1
+        if references[sprite] <= 0:
+            self.spatial_hash.remove(sprite)
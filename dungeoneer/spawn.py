@@ -9,7 +9,7 @@ from dungeoneer.items import GoldItem
 from dungeoneer.regions import Tile
 
 
-def monster_drops(room, region, base_p=90):
+def monster_drops(room, region, base_p=90, rng=random):
     drop_table = {
         place_monster: 100
     }
@@ -20,23 +20,34 @@ def monster_drops(room, region, base_p=90):
         MonsterType.TIGERMAN: 20
     }
     p = base_p
-    while random.randint(1, 100) <= p:
+    while rng.randint(1, 100) <= p:
         p //= 2
-        pos = random.choice(room)
-        dropper = pick_from_weighted_table(drop_table)
-        monster_type = pick_from_weighted_table(type_table)
+        pos = rng.choice(room)
+        dropper = pick_from_weighted_table(drop_table, rng)
+        monster_type = pick_from_weighted_table(type_table, rng)
         dropper(pos, region, monster_type)
 
 
-def place_treasure(pos, region):
-    sprite_sheet, value, scale = treasure.random_treasure(1)
-    region.visual_effects[pos] = Tile(GoldItem, sprite_sheet.filmstrip(scale=scale), layer=1, value=value)
+def place_treasure(pos, region, rng=random):
+    gold_type, value = treasure.random_gold(1, rng)
+    region.place(pos, make_treasure_tile(gold_type.name, value))
 
 
-def place_item(pos, region):
-    item = random.choice(list(items.all_items.values()))
+def make_treasure_tile(gold_type_name, value):
+    horde = treasure.GoldType[gold_type_name].value
+    return Tile(GoldItem, horde.sprite_sheet.filmstrip(scale=horde.scale), layer=1,
+                spec=("treasure", gold_type_name, value), value=value, gold_type=gold_type_name)
+
+
+def place_item(pos, region, rng=random):
+    item = rng.choice(list(items.all_items.values()))
+    region.place(pos, make_item_tile(item.name))
+
+
+def make_item_tile(item_name):
+    item = items.all_items[item_name]
     sprite_sheet = make_sprite_sheet(item.name)
-    region.visual_effects[pos] = Tile(ItemSprite, sprite_sheet.filmstrip(), layer=1, item_spec=item)
+    return Tile(ItemSprite, sprite_sheet.filmstrip(), layer=1, spec=("item", item_name), item_spec=item)
 
 
 def place_monster(pos, region, monster_type):
@@ -49,11 +60,11 @@ DEFAULT_DROP_TABLE = {
 }
 
 
-def item_drops(room, region, drop_table=None):
+def item_drops(room, region, drop_table=None, rng=random):
     drop_table = drop_table or DEFAULT_DROP_TABLE
     p = 40
-    while random.randint(0, 100) <= p:
+    while rng.randint(0, 100) <= p:
         p //= 2
-        pos = random.choice(room)
-        dropper = pick_from_weighted_table(drop_table)
-        dropper(pos, region)
+        pos = rng.choice(room)
+        dropper = pick_from_weighted_table(drop_table, rng)
+        dropper(pos, region, rng)
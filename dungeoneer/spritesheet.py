@@ -52,6 +52,8 @@ class SpriteSheet:
             if scale:
                 width, height = int(surface.get_width() * scale), int(surface.get_height() * scale)
                 return pygame.transform.scale(surface, (width, height))
-            return surface.convert_alpha()
+            if pygame.display.get_surface():
+                return surface.convert_alpha()
+            return surface
 
         return [transform(self.surface_by_index(i)) for i in indices]
@@ -0,0 +1,109 @@
+"""
+Regions far from the player are evicted: their sprites are thrown away and only a small snapshot of the
+things that can change during play is kept. The walls are rebuilt from the region's tile layers and
+everything else from the snapshot when the region is needed again.
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import List, Tuple, Optional
+
+from dungeoneer import items
+from dungeoneer.actors import Monster
+from dungeoneer.characters import Character, MonsterType
+from dungeoneer.interfaces import Item, SpriteGrouper
+from dungeoneer.item_sprites import make_item_sprite, ItemSprite
+from dungeoneer.items import GoldItem
+from dungeoneer.regions import Region
+from dungeoneer.spawn import make_treasure_tile
+
+PixelPosition = Tuple[int, int]
+
+ITEMS_BY_NAME = {**items.specials, **items.generated_ammo, **items.all_items}
+
+
+@dataclass
+class MonsterState:
+    type_name: str
+    position: PixelPosition
+    vitality: int
+    sleeping: bool
+    room_index: Optional[int]  # the room that wakes the monster when the player walks into it
+
+
+@dataclass
+class ItemState:
+    name: str
+    count: int
+    position: PixelPosition
+
+
+@dataclass
+class GoldState:
+    gold_type: str
+    value: int
+    position: PixelPosition
+
+
+@dataclass
+class RegionSnapshot:
+    monsters: List[MonsterState] = field(default_factory=list)
+    items: List[ItemState] = field(default_factory=list)
+    gold: List[GoldState] = field(default_factory=list)
+
+
+def snapshot_region(region: Region) -> RegionSnapshot:
+    snapshot = RegionSnapshot()
+    rooms = {id(monster): index for index, monsters in region.rooms.monsters_by_index.items() for monster in monsters}
+    for monster in region.groups.monster:
+        snapshot.monsters.append(MonsterState(monster.character.type_name, tuple(monster.rect.center),
+                                              monster.vitality, monster.character.sleeping,
+                                              rooms.get(id(monster))))
+    for sprite in region.groups.items:
+        if isinstance(sprite, GoldItem):
+            snapshot.gold.append(GoldState(sprite.gold_type, sprite.value, tuple(sprite.rect.center)))
+        elif isinstance(sprite, ItemSprite):
+            spec = sprite.item_spec
+            snapshot.items.append(ItemState(spec.name, spec.count, tuple(sprite.rect.center)))
+    return snapshot
+
+
+def evict_region(region: Region) -> RegionSnapshot:
+    """Snapshot the region and release all of its sprites"""
+    region.snapshot = snapshot_region(region)
+    for group in vars(region.groups).values():
+        group.empty()
+    region.rooms.monsters_by_index.clear()
+    return region.snapshot
+
+
+def restore_region(region: Region, realm: SpriteGrouper):
+    """Rebuild an evicted region's sprites from its tile layers and snapshot"""
+    snapshot: RegionSnapshot = region.snapshot
+    groups = region.groups
+    region.place_solid_objects()
+    for gold in snapshot.gold:
+        sprite = make_treasure_tile(gold.gold_type, gold.value).make_sprite(*gold.position)
+        groups.items.add(sprite)
+        groups.effects.add(sprite)
+    for item in snapshot.items:
+        sprite = make_item_sprite(item_spec(item.name, item.count), *item.position)
+        groups.items.add(sprite)
+        groups.effects.add(sprite)
+    for monster in snapshot.monsters:
+        # Not spawned: the snapshot position was already clear when it was taken
+        character = Character(MonsterType[monster.type_name])
+        character.sleeping = monster.sleeping
+        sprite = Monster(*monster.position, character, realm)
+        sprite.vitality = monster.vitality
+        groups.monster.add(sprite)
+        groups.solid.add(sprite)
+        groups.sleeping_monster.add(sprite)
+        if monster.room_index is not None:
+            region.rooms.add_monster(sprite, monster.room_index)
+    region.snapshot = None
+
+
+def item_spec(name, count) -> Item:
+    spec = copy.copy(ITEMS_BY_NAME[name])
+    spec.count = count
+    return spec
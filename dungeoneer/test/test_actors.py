@@ -3,13 +3,13 @@ import unittest
 import pygame
 from assertpy import assert_that
 
-from dungeoneer import actors
+from dungeoneer import actors, animation
 from dungeoneer.actors import Player, make_monster_sprite
 from dungeoneer.characters import MonsterType, Character, PlayerCharacterType
 from dungeoneer.interfaces import SpriteGroups, Item
 from dungeoneer.inventory import Inventory
 from dungeoneer.realms import Realm
-from dungeoneer.regions import Region
+from dungeoneer.regions import Region, TileType
 
 
 class TestZombie(unittest.TestCase):
@@ -54,6 +54,7 @@ class TestGenerator(unittest.TestCase):
 
     def test_generator_withTime_producesMonstersAtRateOfFire(self):
         pygame.time.Clock()
+        animation.clock.tick()
         generators = [actors.make_monster_sprite(MonsterType.ZOMBIE_GENERATOR, 0, 0, self.realm),
                       actors.make_monster_sprite(MonsterType.ZOMBIE_GENERATOR, 100, 100, self.realm)]
 
@@ -65,6 +66,7 @@ class TestGenerator(unittest.TestCase):
         self.assertEqual(4, len(self.groups.solid))
         t = pygame.time.get_ticks()
         while True:
+            animation.clock.tick()
             for g in generators:
                 g.do_actions(self.realm)
             if t + 150 < pygame.time.get_ticks():
@@ -146,6 +148,22 @@ class TestPlayerMovement(unittest.TestCase):
         self.player.move()
         assert_that(self.player.rect.center).is_equal_to((500, 496))
 
+    def test_moveRight_withWallTileFurtherThanSpeed_stopsAgainstWall(self):
+        for row in range(20):
+            self.region.place_by_type((12, row), TileType.STONE_WALL)
+        self.player.speed = 400
+        self.player.direction.update(1, 0)
+        self.player.move()
+        assert_that(self.player.rect.right).is_equal_to(600)
+
+    def test_moveRight_withPlayerOverlappingWallTileToLeft_movesAway(self):
+        for row in range(20):
+            self.region.place_by_type((9, row), TileType.STONE_WALL)
+        self.player.speed = 100
+        self.player.direction.update(1, 0)
+        self.player.move()
+        assert_that(self.player.rect.centerx).is_equal_to(600)
+
 
 class TestPlayer(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,25 @@
+import unittest
+
+from assertpy import assert_that
+
+from dungeoneer.animation import frame_at, AnimationClock
+
+
+class TestFrameAt(unittest.TestCase):
+    def test_frame_at_movesOnAFrameEachFrameLength(self):
+        frames = [frame_at(time, 100, 4) for time in (0, 99, 100, 250, 399)]
+        assert_that(frames).is_equal_to([0, 0, 1, 2, 3])
+
+    def test_frame_at_afterLastFrame_loops(self):
+        assert_that(frame_at(450, 100, 4)).is_equal_to(0)
+
+    def test_frame_at_withPhase_runsAhead(self):
+        assert_that(frame_at(0, 100, 4, phase=200)).is_equal_to(2)
+
+
+class TestAnimationClock(unittest.TestCase):
+    def test_tick_withTime_setsTime(self):
+        clock = AnimationClock()
+        clock.tick(1250)
+        assert_that(clock.time).is_equal_to(1250)
+        assert_that(clock.frame(500, 4)).is_equal_to(2)
@@ -0,0 +1,69 @@
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer.background import BackgroundCache
+from dungeoneer.camera import Camera
+from dungeoneer.realms import Realm
+from dungeoneer.regions import Region
+from dungeoneer.test.test_regions import RED_TILE, BLUE_TILE
+
+
+class TestBackgroundCache(unittest.TestCase):
+    def test_chunk_withRegion_rendersSurfaceTheSizeOfTheRegion(self):
+        region = Region((3, 2), default_tile=RED_TILE)
+        chunk = BackgroundCache().chunk(region)
+        assert_that(chunk.get_size()).is_equal_to((96, 64))
+
+    def test_chunk_calledTwice_returnsCachedSurface(self):
+        region = Region((3, 3), default_tile=RED_TILE)
+        cache = BackgroundCache()
+        assert_that(cache.chunk(region)).is_same_as(cache.chunk(region))
+
+    def test_chunk_withBudgetForOneChunk_evictsLeastRecentlyUsed(self):
+        region1 = Region((3, 3), default_tile=RED_TILE)
+        region2 = Region((3, 3), default_tile=RED_TILE)
+        cache = BackgroundCache(budget=96 * 96 * 4)
+        cache.chunk(region1)
+        cache.chunk(region2)
+        assert_that(cache).is_length(1)
+        assert_that(region1 in cache).is_false()
+        assert_that(region2 in cache).is_true()
+
+    def test_chunk_withBudgetExceeded_keepsSizeInBytesWithinBudget(self):
+        budget = 96 * 96 * 4 * 3
+        cache = BackgroundCache(budget=budget)
+        for _ in range(10):
+            cache.chunk(Region((3, 3), default_tile=RED_TILE))
+        assert_that(cache).is_length(3)
+        assert_that(cache.size_in_bytes).is_less_than_or_equal_to(budget)
+
+    def test_invalidate_withCachedRegion_rendersAgainNextTime(self):
+        region = Region((3, 3), default_tile=RED_TILE)
+        cache = BackgroundCache()
+        before = cache.chunk(region)
+        cache.invalidate(region)
+        assert_that(cache.size_in_bytes).is_equal_to(0)
+        assert_that(cache.chunk(region)).is_not_same_as(before)
+
+    def test_chunk_withStubRegionThatIsLaterGenerated_rendersAgain(self):
+        region = Region((3, 3), default_tile=RED_TILE)
+        region.is_stub = True
+        cache = BackgroundCache()
+        stub_chunk = cache.chunk(region)
+        assert_that(cache.chunk(region)).is_same_as(stub_chunk)
+        region.is_stub = False
+        assert_that(cache.chunk(region)).is_not_same_as(stub_chunk)
+
+
+class TestCameraDrawBackground(unittest.TestCase):
+    def test_draw_background_withCameraOnRegionBorder_composesBothRegions(self):
+        realm = Realm((2, 1), tile_size=(32, 32), region_size=(3, 3))
+        realm.region((1, 0)).place((0, 0), BLUE_TILE)
+        realm.region((0, 0)).default_tile = RED_TILE
+        screen = pygame.Surface((96, 96))
+        camera = Camera(screen, realm, position=(48, 0))
+        camera.draw_background(BackgroundCache())
+        assert_that(screen.get_at((10, 10))).is_equal_to(RED_TILE.filmstrip[0].get_at((0, 0)))
+        assert_that(screen.get_at((60, 10))).is_equal_to(BLUE_TILE.filmstrip[0].get_at((0, 0)))
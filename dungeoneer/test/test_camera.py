@@ -0,0 +1,169 @@
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer import items
+from dungeoneer.actors import make_monster_sprite
+from dungeoneer.animation import AnimationClock
+from dungeoneer.background import BackgroundCache
+from dungeoneer.camera import Camera, RenderList, Layer
+from dungeoneer.characters import MonsterType
+from dungeoneer.realms import Realm
+from dungeoneer.regions import TileType
+
+
+class TestCameraDrawAll(unittest.TestCase):
+    # Three empty regions of 10x10 tiles of 20 pixels in a row, with a camera looking at the first
+    def setUp(self):
+        self.realm = Realm((3, 1), tile_size=(20, 20), region_size=(10, 10))
+        self.screen = pygame.Surface((200, 200))
+        self.camera = Camera(self.screen, self.realm)
+        self.regions = list(self.realm.regions.values())
+
+    def add_monster(self, x, y):
+        monster = make_monster_sprite(MonsterType.ZOMBIE, x, y, self.realm)
+        self.realm.region_from_pixel_position((x, y)).groups.monster.add(monster)
+        return monster
+
+    def test_draw_all_withSpritesOutOfView_culledAndNotDrawn(self):
+        self.add_monster(100, 100)
+        self.add_monster(300, 100)
+        self.add_monster(500, 100)
+        self.camera.draw_all(self.regions)
+        assert_that(self.camera.visible_sprite_count).is_equal_to(1)
+        assert_that(self.camera.culled_sprite_count).is_equal_to(2)
+
+    def test_draw_all_withMonsterHangingOverViewFromNextRegion_drawsIt(self):
+        monster = self.add_monster(300, 100)
+        monster.rect.left = 190
+        self.realm.moved(monster)
+        self.camera.draw_all(self.regions)
+        assert_that(self.camera.visible_sprite_count).is_equal_to(1)
+
+    def test_draw_all_withItem_drawsItOnce(self):
+        self.realm.drop(items.ammo["arrow"], (100, 100))
+        self.camera.draw_all(self.regions)
+        assert_that(self.camera.visible_sprite_count).is_equal_to(1)
+
+    def test_draw_all_afterCameraMoves_drawsWhatIsNowInView(self):
+        self.add_monster(100, 100)
+        far = self.add_monster(500, 100)
+        self.camera.move((-400, 0))
+        self.screen.fill((0, 0, 0))
+        self.camera.draw_all(self.regions)
+        assert_that(self.camera.visible_sprite_count).is_equal_to(1)
+        x, y = far.rect.centerx - 400, far.rect.centery
+        assert_that(self.screen.get_at((x, y))).is_equal_to(far.image.get_at((far.rect.width // 2,
+                                                                              far.rect.height // 2)))
+
+    def test_render_list_withItemAndMonster_putsEachInItsLayer(self):
+        self.realm.drop(items.ammo["arrow"], (100, 100))
+        self.add_monster(100, 150)
+        render_list = self.camera.render_list(self.regions)
+        assert_that(render_list.layers[Layer.FLOOR_ITEMS]).is_length(1)
+        assert_that(render_list.layers[Layer.EFFECTS]).is_empty()
+        assert_that(render_list.layers[Layer.MONSTERS]).is_length(1)
+
+    def test_render_list_withYSort_ordersActorsByTheirFeet(self):
+        self.camera.y_sort = True
+        lower = self.add_monster(100, 160)
+        upper = self.add_monster(100, 100)
+        render_list = self.camera.render_list(self.regions)
+        bottoms = [rect.bottom for _, rect in render_list.layers[Layer.MONSTERS]]
+        assert_that(bottoms).is_equal_to([upper.rect.bottom, lower.rect.bottom])
+
+    def test_render_list_withInterpolation_drawsSpritePartWayAlongItsMove(self):
+        monster = self.add_monster(100, 100)
+        self.camera.remember_positions([monster])
+        monster.rect.x += 10
+        self.camera.interpolation = 0.3
+        _, rect = self.camera.render_list(self.regions).layers[Layer.MONSTERS][0]
+        assert_that(rect.x).is_equal_to(monster.rect.x - 7)
+
+    def test_render_list_withInterpolation_keepsSpriteFollowedByCameraStill(self):
+        monster = self.add_monster(100, 100)
+        self.camera.remember_positions([monster])
+        monster.rect.x += 7
+        self.camera.move((-7, 0))
+        for interpolation in (0.1, 0.5, 0.9):
+            self.camera.interpolation = interpolation
+            _, rect = self.camera.render_list(self.regions).layers[Layer.MONSTERS][0]
+            with self.subTest(interpolation=interpolation):
+                assert_that(rect.x).is_equal_to(monster.rect.x - 7)
+
+    def test_render_list_withWater_drawsFrameShowingOnClock(self):
+        region = self.regions[0]
+        region.place_by_type((2, 3), TileType.WATER)
+        region.animated_tiles = region.find_animated_tiles()
+        water = TileType.WATER.value
+        self.camera.clock = AnimationClock()
+        self.camera.clock.tick(water.frame_length * 2 - region.animated_tiles[0].phase)
+        render_list = self.camera.render_list(self.regions)
+        expected = (water.filmstrip[2], pygame.Rect((40, 60), (water.width, water.height)))
+        assert_that(render_list.layers[Layer.ANIMATED_TILES]).is_equal_to([expected])
+
+
+class TestRenderList(unittest.TestCase):
+    @staticmethod
+    def solid(colour):
+        image = pygame.Surface((10, 10))
+        image.fill(colour)
+        return image
+
+    def test_draw_withOverlappingLayers_drawsHigherLayerOnTop(self):
+        render_list = RenderList()
+        render_list.extend(Layer.PLAYER, [(self.solid((0, 0, 255)), pygame.Rect(0, 0, 10, 10))])
+        render_list.extend(Layer.FLOOR_ITEMS, [(self.solid((255, 0, 0)), pygame.Rect(5, 0, 10, 10))])
+        screen = pygame.Surface((20, 10))
+        render_list.draw(screen)
+        assert_that(tuple(screen.get_at((7, 5)))).is_equal_to((0, 0, 255, 255))
+        assert_that(tuple(screen.get_at((12, 5)))).is_equal_to((255, 0, 0, 255))
+        assert_that(render_list).is_length(2)
+
+
+class TestCameraDrawChanges(unittest.TestCase):
+    def setUp(self):
+        self.realm = Realm((1, 1), tile_size=(20, 20), region_size=(10, 10))
+        self.screen = pygame.Surface((200, 200))
+        self.camera = Camera(self.screen, self.realm)
+        self.background = BackgroundCache()
+        self.regions = list(self.realm.regions.values())
+        self.arrows = self.realm.drop(items.ammo["arrow"], (100, 100))
+
+    def test_draw_changes_firstFrame_drawsEverything(self):
+        assert_that(self.camera.draw_changes(self.background, self.regions)).is_none()
+
+    def test_draw_changes_withNothingChanged_repaintsNothing(self):
+        self.camera.draw_changes(self.background, self.regions)
+        assert_that(self.camera.draw_changes(self.background, self.regions)).is_empty()
+
+    def test_draw_changes_withSpriteMoved_repaintsWhereItWasAndIs(self):
+        self.camera.draw_changes(self.background, self.regions)
+        old = self.arrows.rect.copy()
+        self.arrows.rect.move_ip(30, 0)
+        dirty = self.camera.draw_changes(self.background, self.regions)
+        assert_that(dirty).contains_only(old, self.arrows.rect)
+        assert_that(self.screen.get_at(old.center)).is_equal_to(self.background.chunk(self.regions[0]).get_at(
+            old.center))
+
+    def test_draw_changes_afterCameraScrolls_drawsEverything(self):
+        self.camera.draw_changes(self.background, self.regions)
+        self.camera.move((-5, 0))
+        assert_that(self.camera.draw_changes(self.background, self.regions)).is_none()
+
+    def test_draw_changes_withChangedOverlay_repaintsIt(self):
+        hud = pygame.Surface((10, 10))
+        self.camera.draw_changes(self.background, self.regions, overlay=[(hud, (0, 0))])
+        dirty = self.camera.draw_changes(self.background, self.regions, overlay=[(hud.copy(), (0, 0))])
+        assert_that(dirty).is_equal_to([pygame.Rect(0, 0, 10, 10)])
+
+    def test_draw_changes_withSpriteMoved_drawsSameAsFullRedraw(self):
+        self.camera.draw_changes(self.background, self.regions)
+        self.arrows.rect.move_ip(7, 3)
+        self.camera.draw_changes(self.background, self.regions)
+        full = Camera(pygame.Surface((200, 200)), self.realm)
+        full.draw_background(self.background)
+        full.draw_all(self.regions)
+        same = pygame.image.tobytes(self.screen, "RGB") == pygame.image.tobytes(full.display_surface, "RGB")
+        assert_that(same).is_true()
@@ -0,0 +1,155 @@
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer.collision import scale_rect, tile_area, solid_tile_in_region, solid_tile_hit, solid_corner_hits, \
+    sweep_solid_tiles
+from dungeoneer.regions import Region, TileType
+
+
+def make_region(pixel_base=(0, 0)):
+    """4x4 region of 10 pixel tiles with walls all round the edge"""
+    region = Region((4, 4), tile_size=pygame.Vector2(10, 10), pixel_base=pixel_base)
+    region.fill_all(TileType.STONE_WALL)
+    region.carve(region.area((1, 1), (2, 2)))
+    return region
+
+
+class TestScaleRect(unittest.TestCase):
+    def test_scale_rect_matchesCollideRectRatio(self):
+        rect = pygame.Rect(10, 20, 40, 30)
+        assert_that(scale_rect(rect, 0.8)).is_equal_to(pygame.Rect(14, 23, 32, 24))
+
+    def test_scale_rect_withRatio1_isUnchanged(self):
+        rect = pygame.Rect(10, 20, 40, 30)
+        assert_that(scale_rect(rect)).is_equal_to(rect)
+
+
+class TestTileArea(unittest.TestCase):
+    def test_tile_area_withRectInsideOneTile_isThatTile(self):
+        area = tile_area(make_region(), pygame.Rect(12, 12, 5, 5))
+        assert_that(area).is_equal_to((slice(1, 2), slice(1, 2)))
+
+    def test_tile_area_withRectEndingOnTileEdge_excludesNextTile(self):
+        area = tile_area(make_region(), pygame.Rect(10, 10, 10, 10))
+        assert_that(area).is_equal_to((slice(1, 2), slice(1, 2)))
+
+    def test_tile_area_withPixelBase_isRelativeToRegion(self):
+        area = tile_area(make_region(pixel_base=(40, 0)), pygame.Rect(52, 12, 15, 5))
+        assert_that(area).is_equal_to((slice(1, 3), slice(1, 2)))
+
+    def test_tile_area_withRectOutsideRegion_isEmpty(self):
+        region = make_region()
+        area = tile_area(region, pygame.Rect(-30, -30, 5, 5))
+        assert_that(region.solid_ids[area].size).is_zero()
+
+
+class TestSolidTileInRegion(unittest.TestCase):
+    def test_withRectOnFloor_isNone(self):
+        assert_that(solid_tile_in_region(make_region(), pygame.Rect(11, 11, 18, 18))).is_none()
+
+    def test_withRectOverlappingWall_isWallPosition(self):
+        assert_that(solid_tile_in_region(make_region(), pygame.Rect(11, 25, 8, 8))).is_equal_to((1, 3))
+
+    def test_withRatio_scalesHitboxAndTiles(self):
+        rect = pygame.Rect(9, 9, 22, 22)
+        assert_that(solid_tile_in_region(make_region(), rect)).is_not_none()
+        assert_that(solid_tile_in_region(make_region(), rect, ratio=0.8)).is_none()
+
+    def test_withRatio_matchesCollideRectRatio(self):
+        region = make_region()
+        collided = pygame.sprite.collide_rect_ratio(0.8)
+        sprite, wall = pygame.sprite.Sprite(), pygame.sprite.Sprite()
+        for x in range(-5, 45, 3):
+            for y in range(-5, 45, 3):
+                sprite.rect = pygame.Rect(x, y, 12, 9)
+                expected = any(collided(sprite, wall) for wall.rect in
+                               (pygame.Rect(column * 10, row * 10, 10, 10) for column, row in region.solid_objects))
+                with self.subTest(x=x, y=y):
+                    hit = solid_tile_in_region(region, sprite.rect, ratio=0.8)
+                    assert_that(hit is not None).is_equal_to(expected)
+
+
+class TestSolidTileHit(unittest.TestCase):
+    def test_withRectAcrossRegionBoundary_findsWallInEitherRegion(self):
+        left = Region((4, 4), tile_size=pygame.Vector2(10, 10))
+        right = make_region(pixel_base=(40, 0))
+        hit = solid_tile_hit([left, right], pygame.Rect(35, 15, 10, 5))
+        assert_that(hit.rect).is_equal_to(pygame.Rect(40, 10, 10, 10))
+
+    def test_withNoWalls_isNone(self):
+        regions = [Region((4, 4), tile_size=pygame.Vector2(10, 10))]
+        assert_that(solid_tile_hit(regions, pygame.Rect(5, 5, 30, 30))).is_none()
+
+
+class TestSolidCornerHits(unittest.TestCase):
+    def setUp(self):
+        self.regions = {(0, 0): make_region(), (1, 0): make_region(pixel_base=(40, 0))}
+
+    def test_withSmallRects_matchesSolidTileHit(self):
+        rects = [pygame.Rect(x, y, 7, 4) for x in range(-10, 90, 3) for y in range(-10, 50, 3)]
+        hits = solid_corner_hits(self.regions, (10, 10), (4, 4), rects)
+        for rect, hit in zip(rects, hits):
+            with self.subTest(rect=rect):
+                expected = solid_tile_hit(self.regions.values(), rect)
+                assert_that(hit and hit.rect).is_equal_to(expected and expected.rect)
+
+    def test_withRectInMissingRegion_isNone(self):
+        assert_that(solid_corner_hits(self.regions, (10, 10), (4, 4), [pygame.Rect(5, 45, 2, 2)])).is_equal_to([None])
+
+    def test_withNoRects_isEmpty(self):
+        assert_that(solid_corner_hits(self.regions, (10, 10), (4, 4), [])).is_empty()
+
+
+class TestSweepSolidTiles(unittest.TestCase):
+    def setUp(self):
+        self.region = make_region()
+        self.solid_at = lambda column, row: 0 <= column < 4 and 0 <= row < 4 and self.region.solid_ids[column, row]
+
+    def sweep(self, rect, motion, ratio=1.0):
+        return sweep_solid_tiles(self.solid_at, (10, 10), rect, motion, ratio)
+
+    def test_withMotionFurtherThanWall_stopsAgainstWall(self):
+        # The wall is one tile thick so only testing the end position would miss it
+        assert_that(self.sweep(pygame.Rect(12, 12, 5, 5), (1000, 0))).is_equal_to(((13, 0), (3, 1)))
+
+    def test_withMotionLeftAndUp_stopsAgainstWall(self):
+        assert_that(self.sweep(pygame.Rect(22, 22, 5, 5), (-50, 0))).is_equal_to(((-12, 0), (0, 2)))
+        assert_that(self.sweep(pygame.Rect(22, 22, 5, 5), (0, -50))).is_equal_to(((0, -12), (2, 0)))
+
+    def test_withNoWallInTheWay_makesAllTheMotion(self):
+        assert_that(self.sweep(pygame.Rect(12, 12, 5, 5), (8, 8))).is_equal_to(((8, 8), None))
+
+    def test_withRectTouchingCornerMovingDiagonally_hitsCornerTile(self):
+        self.region.carve(self.region.area((1, 1), (3, 3)))
+        self.region.place_by_type((3, 3), TileType.STONE_WALL)
+        assert_that(self.sweep(pygame.Rect(20, 20, 10, 10), (20, 20))).is_equal_to(((0, 0), (3, 3)))
+
+    def test_withRectAlreadyInWall_canMoveOutOfIt(self):
+        assert_that(self.sweep(pygame.Rect(5, 15, 10, 10), (10, 0))).is_equal_to(((10, 0), None))
+
+    def test_withRectAlreadyInWall_stopsAgainstTheNextWall(self):
+        assert_that(self.sweep(pygame.Rect(5, 15, 10, 10), (100, 0))).is_equal_to(((15, 0), (3, 1)))
+
+    def test_matchesSteppingOnePixelAtATime(self):
+        for ratio in (1.0, 0.8):
+            for x, y in ((11, 11), (13, 17), (20, 12)):
+                for motion in ((30, 0), (-30, 0), (0, 30), (0, -30), (25, 25), (-25, 25), (7, -19)):
+                    rect = pygame.Rect(x, y, 8, 7)
+                    with self.subTest(ratio=ratio, rect=rect, motion=motion):
+                        clear, _ = self.sweep(rect, motion, ratio)
+                        assert_that(clear).is_equal_to(self.step_pixels(rect, motion, ratio))
+
+    def step_pixels(self, rect, motion, ratio):
+        """The furthest whole pixel position along the motion reached before any collision"""
+        dx, dy = motion
+        steps = max(abs(dx), abs(dy))
+        clear = (0, 0)
+        for step in range(1, steps + 1):
+            # points along a straight line, as the sweep takes, with each axis truncated towards zero
+            position = int(dx * step / steps), int(dy * step / steps)
+            if solid_tile_in_region(self.region, rect.move(position), ratio) is not None:
+                break
+            clear = position
+        return clear
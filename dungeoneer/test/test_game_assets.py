@@ -0,0 +1,15 @@
+import unittest
+from unittest import mock
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer.game_assets import load_sound_file, sfx_file, NullSound
+
+
+class TestLoadSoundFile(unittest.TestCase):
+    def test_load_sound_file_withNoMixer_isNullSound(self):
+        with mock.patch.object(pygame.mixer, "get_init", return_value=None):
+            sound = load_sound_file(sfx_file("splat.wav"))
+        assert_that(sound).is_instance_of(NullSound)
+        sound.play()
@@ -1,17 +1,26 @@
 import unittest
 
+import pygame
 from assertpy import assert_that
 
-from dungeoneer.main import DungeoneerGame
+from dungeoneer.main import DungeoneerGame, add_demo_items, set_up_play, replay_game
+from dungeoneer.replay import ReplayRecorder
 
 
 class TestDungeoneerGame(unittest.TestCase):
     def setUp(self):
         self.game = DungeoneerGame((1000, 1000), realm_size=(2, 2))
 
-    def test_initialise_realm_generatesABackground_asBigAsAllRegionsInRealm(self):
+    def test_initialise_realm_createsAnEmptyBackgroundCache(self):
         self.game.initialise_realm()
-        assert_that(self.game.background.get_size()).is_equal_to((2000, 2000))
+        assert_that(self.game.background).is_length(0)
+
+    def test_draw_background_afterPlacingPlayer_rendersOnlyVisibleRegions(self):
+        self.game.initialise_realm()
+        self.game.place_player((1, 1))
+        self.game.camera.draw_background(self.game.background)
+        assert_that(self.game.background).is_length(1)
+        assert_that(self.game.realm.region((1, 1)) in self.game.background).is_true()
 
     def test_place_player_inEmptyRegion_placesPlayerInCentreOfRegion(self):
         self.game.place_player((1, 1))
@@ -20,3 +29,109 @@ class TestDungeoneerGame(unittest.TestCase):
     def test_place_player_movesCameraCenteredOnPlayer(self):
         self.game.place_player((1, 1))
         assert_that(self.game.camera.offset).is_equal_to((-1000, -1000))
+
+    def test_add_demo_items_addsArrowsToTheDrawnEffects(self):
+        region = self.game.realm.region((0, 0))
+        add_demo_items(region, (10, 10))
+        assert_that(region.groups.items).is_length(1)
+        assert_that(region.groups.items.sprites()[0] in region.groups.effects).is_true()
+
+    def test_draw_withDirtyRects_drawsSameFrameAsFullRedraw(self):
+        self.game.initialise_realm()
+        self.game.place_player((1, 1))
+        active_regions = [self.game.realm.region((1, 1))]
+        self.game.draw(active_regions)
+        self.game.draw(active_regions)  # so that the debug text shows the first frame's sprite counts
+        full = self.game.screen.copy()
+        self.game.dirty_rects = True
+        self.game.draw(active_regions)
+        self.game.draw(active_regions)
+        same = pygame.image.tobytes(self.game.screen, "RGB") == pygame.image.tobytes(full, "RGB")
+        assert_that(same).is_true()
+
+    def test_profiler_panel_onlyDrawnAgainWhenReportChanges(self):
+        self.game.place_player((1, 1))
+        panel = self.game.profiler_panel()
+        self.game.profiler.end_frame()
+        assert_that(self.game.profiler_panel()).is_same_as(panel)
+        for _ in range(self.game.profiler.report_every):
+            self.game.profiler.end_frame()
+        assert_that(self.game.profiler_panel()).is_not_same_as(panel)
+
+    def test_simulate_movesPlayerByItsSpeedEachStep(self):
+        self.game.place_player((1, 1))
+        x, _ = self.game.player.rect.center
+        self.game.player.direction.update(1, 0)
+        self.game.player.handle_keyboard = lambda keys: None
+        for _ in range(3):
+            self.game.simulate()
+        assert_that(self.game.player.rect.centerx).is_equal_to(x + 3 * self.game.player.speed)
+
+
+class TestDungeoneerGameLazyGeneration(unittest.TestCase):
+    def test_place_player_withLazyGeneration_generatesOnlyThePlayersRegion(self):
+        game = DungeoneerGame((1000, 1000), realm_size=(2, 2), lazy_generation=True)
+        game.initialise_realm()
+        game.place_player((1, 1))
+        generated = [c for c, region in game.realm.regions.items() if not region.is_stub]
+        assert_that(generated).is_equal_to([(1, 1)])
+
+
+class TestDungeoneerGameHeadless(unittest.TestCase):
+    def setUp(self):
+        self.game = DungeoneerGame((1000, 1000), realm_size=(2, 2), headless=True)
+        self.game.place_player((1, 1))
+
+    def test_headless_drawsToAnOffscreenSurface(self):
+        assert_that(self.game.screen).is_not_same_as(pygame.display.get_surface())
+
+    def test_step_withKeyHeld_movesPlayerEachStep(self):
+        x, y = self.game.player.rect.center
+        self.game.step(5, keys=[pygame.K_d])
+        assert_that(self.game.state().player_position).is_equal_to((x + 5 * self.game.player.speed, y))
+
+    def test_step_profilesEachPhaseOfTheSimulation(self):
+        self.game.step(self.game.profiler.report_every, keys=())
+        phases = [timing.name for timing in self.game.profiler.report]
+        assert_that(phases).contains("events", "player move", "monsters", "missiles", "collisions", "effects",
+                                     "pickup", "total")
+
+    def test_state_countsStepsAndSimulatedTime(self):
+        self.game.step(4, keys=())
+        state = self.game.state()
+        assert_that(state.step).is_equal_to(4)
+        assert_that(state.time).is_equal_to(100)
+
+
+class TestReplay(unittest.TestCase):
+    SETTINGS = {"screen_size": (400, 400), "realm_size": (6, 6), "lazy_generation": True}
+
+    def test_replay_game_afterRecording_playsSameGame(self):
+        game = DungeoneerGame(seed=3, headless=True, **self.SETTINGS)
+        game.initialise_realm()
+        set_up_play(game)
+        game.recorder = ReplayRecorder(game.realm.seed, self.SETTINGS)
+        for keys in [[pygame.K_d, pygame.K_RETURN]] * 20 + [[pygame.K_s, pygame.K_SPACE]] * 20 + [[]] * 20:
+            game.step(keys=keys)
+        replay = game.recorder.replay
+
+        replayed = replay_game(replay, headless=True)
+        replayed.step(replay.steps)
+        assert_that(replayed.state()).is_equal_to(game.state())
+        assert_that(replayed.playback.finished).is_true()
+
+    def test_replay_game_withRecordedSlotKey_selectsSameSlot(self):
+        game = DungeoneerGame(seed=3, headless=True, **self.SETTINGS)
+        game.initialise_realm()
+        set_up_play(game)
+        game.recorder = ReplayRecorder(game.realm.seed, self.SETTINGS)
+        game.step(5, keys=[])
+        game.key_event_dispatcher.event(pygame.KEYDOWN, pygame.K_2)
+        game.recorder.record_event(pygame.KEYDOWN, pygame.K_2)
+        game.step(5, keys=[])
+        assert_that(game.player.inventory.current_selection).is_equal_to(2)
+        replay = game.recorder.replay
+
+        replayed = replay_game(replay, headless=True)
+        replayed.step(replay.steps)
+        assert_that(replayed.player.inventory.current_selection).is_equal_to(2)
@@ -1,10 +1,14 @@
 import itertools
+import random
 import unittest
 
 from assertpy import assert_that
 
-from dungeoneer.map_maker import generate_map, make_nodes, join_nodes, make_rooms_in_subregions, join_exits
-from dungeoneer.room_generation import LargeRoomGenerator, ConnectedRoomGenerator
+from dungeoneer.layouts import layout_from_region
+from dungeoneer.map_maker import generate_map, make_nodes, join_nodes, make_rooms_in_subregions, join_exits, \
+    dig_corridors, dig_exits, nearest_node, dig_corridor
+from dungeoneer.room_generation import LargeRoomGenerator, ConnectedRoomGenerator, BossRegionGenerator, \
+    EnclosedBossChamberGenerator
 from dungeoneer.spawn import monster_drops, place_treasure
 from dungeoneer.regions import Region, Position, SubRegion, Size
 
@@ -32,8 +36,22 @@ class TestGenerateMap(unittest.TestCase):
         region = Region((50, 50))
         generate_map(region, LargeRoomGenerator)
         assert_that(region.rooms.count).is_equal_to(1)
-        assert_that(region.rooms.index_by_position[(1, 1)]).is_equal_to(0)
-        assert_that(region.rooms.index_by_position[(48, 48)]).is_equal_to(0)
+        assert_that(region.rooms.index_at((1, 1))).is_equal_to(0)
+        assert_that(region.rooms.index_at((48, 48))).is_equal_to(0)
+
+    def test_generate_map_withSameRandomStream_generatesSameRegion(self):
+        for generator in (ConnectedRoomGenerator, BossRegionGenerator, EnclosedBossChamberGenerator,
+                          LargeRoomGenerator):
+            with self.subTest(generator=generator):
+                region1 = generate_map(Region((40, 22)), generator, random.Random(3))
+                region2 = generate_map(Region((40, 22)), generator, random.Random(3))
+                region1.name = region2.name = ""
+                assert_that(layout_from_region(region1)).is_equal_to(layout_from_region(region2))
+
+    def test_generate_map_withRandomStream_doesNotUseGlobalRandomState(self):
+        state = random.getstate()
+        generate_map(Region((40, 22)), ConnectedRoomGenerator, random.Random(3))
+        assert_that(random.getstate()).is_equal_to(state)
 
     def test_make_nodes_withNodeCountN_CreatesNNodes(self):
         for n in [16]:
@@ -149,6 +167,31 @@ class TestJoinNodes(unittest.TestCase):
         self.assertEqual(expected_y_vals, {p[1] for p in paths})
 
 
+class TestDigCorridors(unittest.TestCase):
+    def test_dig_corridors_withSameRandomStream_matchesJoinNodes(self):
+        nodes = [Position(2, 3), Position(15, 12), Position(4, 17), Position(18, 1)]
+        corridors = Region((20, 20)).mask()
+        dig_corridors(corridors, nodes, {1: 1, 2: 1, 3: 1}, random.Random(5))
+        path = join_nodes(nodes, {1: 1, 2: 1, 3: 1}, random.Random(5))
+        assert_that(corridors.sum()).is_equal_to(len(set(path)))
+        assert_that(corridors[tuple(zip(*path))].all()).is_true()
+
+    def test_dig_corridor_withWideCorridorAtEdge_clipsToMask(self):
+        corridors = Region((10, 10)).mask()
+        dig_corridor(corridors, Position(0, 8), Position(9, 8), width=4)
+        assert_that(corridors.sum()).is_equal_to(1 + 9 * 2)
+
+    def test_dig_exits_withOneInLineWestExit_digsDirectPath(self):
+        corridors = Region((10, 10)).mask()
+        dig_exits(corridors, [(3, 2), (5, 5), (7, 1)], {"W": 5})
+        assert_that(corridors.sum()).is_equal_to(6)
+        assert_that(corridors[:6, 5].all()).is_true()
+
+    def test_nearest_node_withTie_picksLowestXThenY(self):
+        nodes = [(6, 5), (4, 5), (5, 6), (5, 4)]
+        assert_that(nearest_node(nodes, (5, 5))).is_equal_to((4, 5))
+
+
 class TestItemDrops(unittest.TestCase):
     def test_drop_treasure_withOneDrop_putsAddsOneItemInVisualEffectsTable(self):
         region = Region((10, 10))
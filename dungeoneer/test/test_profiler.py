@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+from assertpy import assert_that
+
+from dungeoneer import profiler
+from dungeoneer.profiler import FrameProfiler, percentile
+
+
+class TestPercentile(unittest.TestCase):
+    def test_percentile_of100Timings_isHighest(self):
+        assert_that(percentile(range(100), 0.99)).is_equal_to(99)
+
+    def test_percentile_of200Timings_isSecondHighest(self):
+        assert_that(percentile(range(200), 0.99)).is_equal_to(198)
+
+
+class TestFrameProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = FrameProfiler(window=4, report_every=2)
+        self.now = 0.0
+        patcher = mock.patch.object(profiler.time, "perf_counter", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spend(self, name, seconds):
+        with self.profiler.phase(name):
+            self.now += seconds
+
+    def test_phase_runTwiceInAFrame_countsTotalTime(self):
+        self.spend("monsters", 0.002)
+        self.spend("monsters", 0.003)
+        self.profiler.end_frame()
+        assert_that(self.profiler.summary()[0].average).is_close_to(5, 1e-6)
+
+    def test_summary_withPhaseMissingFromAFrame_countsItAsNoTime(self):
+        self.spend("draw", 0.004)
+        self.profiler.end_frame()
+        self.profiler.end_frame()
+        draw, total = self.profiler.summary()
+        assert_that(draw.average).is_close_to(2, 1e-6)
+        assert_that(draw.p99).is_close_to(4, 1e-6)
+        assert_that(total.name).is_equal_to("total")
+
+    def test_summary_total_includesTimeOutsidePhases(self):
+        self.spend("draw", 0.001)
+        self.profiler.end_frame()
+        self.now += 0.010  # waiting for the frame rate
+        self.spend("draw", 0.001)
+        self.profiler.end_frame()
+        total = self.profiler.summary()[-1]
+        assert_that(total.p99).is_close_to(11, 1e-6)
+        assert_that(total.average).is_close_to(6, 1e-6)
+
+    def test_summary_onlyCoversWindow(self):
+        for seconds in (1, 0.001, 0.001, 0.001, 0.001):
+            self.spend("draw", seconds)
+            self.profiler.end_frame()
+        assert_that(self.profiler.summary()[0].p99).is_close_to(1, 1e-6)
+
+    def test_report_onlyChangesEveryFewFrames(self):
+        self.spend("draw", 0.001)
+        self.profiler.end_frame()
+        assert_that(self.profiler.report).is_empty()
+        self.profiler.end_frame()
+        assert_that([timing.name for timing in self.profiler.report]).is_equal_to(["draw", "total"])
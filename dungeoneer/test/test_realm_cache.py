@@ -0,0 +1,70 @@
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from assertpy import assert_that
+
+from dungeoneer.layouts import layout_from_region
+from dungeoneer.map_maker import generate_map
+from dungeoneer.realm_cache import RealmCache, StaleRealmCache, write_realm_cache, MAGIC, VERSION
+from dungeoneer.regions import Region
+from dungeoneer.room_generation import ConnectedRoomGenerator
+
+REGION_SIZE = (40, 22)
+
+
+def make_layout(seed):
+    region = Region(REGION_SIZE)
+    region.exits = {"E": 5}
+    return layout_from_region(generate_map(region, ConnectedRoomGenerator, random.Random(seed)))
+
+
+class TestRealmCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "realm.cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_open_withWrittenCache_readsBackSameLayouts(self):
+        layouts = {(0, 0): ({"E": 5}, make_layout(1)), (1, 0): ({"W": 5}, make_layout(2))}
+        write_realm_cache(self.path, 7, (2, 1), REGION_SIZE, layouts)
+        cache = RealmCache.open(self.path)
+        assert_that(cache).is_length(2)
+        assert_that(cache.seed).is_equal_to(7)
+        assert_that(cache.exits((1, 0))).is_equal_to({"W": 5})
+        for coordinates, (_, layout) in layouts.items():
+            with self.subTest(coordinates=coordinates):
+                assert_that(cache.layout(coordinates)).is_equal_to(layout)
+
+    def test_layout_arrays_areReadOnlyViewsOfMappedFile(self):
+        write_realm_cache(self.path, 7, (1, 1), REGION_SIZE, {(0, 0): ({}, make_layout(1))})
+        layout = RealmCache.open(self.path).layout((0, 0))
+        assert_that(layout.tile_ids.flags.writeable).is_false()
+
+    def test_open_withNoRegions_opensEmptyCache(self):
+        write_realm_cache(self.path, 7, (1, 1), REGION_SIZE, {})
+        cache = RealmCache.open(self.path)
+        assert_that(cache).is_length(0)
+        assert_that((0, 0) in cache).is_false()
+
+    def test_matches_withDifferentSeedOrSize_isFalse(self):
+        write_realm_cache(self.path, 7, (2, 1), REGION_SIZE, {})
+        cache = RealmCache.open(self.path)
+        assert_that(cache.matches(7, (2, 1), REGION_SIZE)).is_true()
+        assert_that(cache.matches(8, (2, 1), REGION_SIZE)).is_false()
+        assert_that(cache.matches(7, (2, 2), REGION_SIZE)).is_false()
+        assert_that(cache.matches(7, (2, 1), (40, 20))).is_false()
+
+    def test_open_withOtherVersion_raisesStaleRealmCache(self):
+        with open(self.path, "wb") as f:
+            f.write(struct.pack("<8sII", MAGIC, VERSION + 1, 2) + b"{}")
+        assert_that(RealmCache.open).raises(StaleRealmCache).when_called_with(self.path)
+
+    def test_open_withOtherFile_raisesStaleRealmCache(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a realm cache at all")
+        assert_that(RealmCache.open).raises(StaleRealmCache).when_called_with(self.path)
@@ -1,12 +1,21 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
 import pygame
 from assertpy import assert_that
 
-from dungeoneer.actors import make_monster_sprite
-from dungeoneer.characters import MonsterType
-from dungeoneer.realms import Realm, PointOutsideRealmBoundary
-from dungeoneer.regions import Region
+from dungeoneer import items
+from dungeoneer.actors import make_monster_sprite, Monster, Player, make_attack_sprite
+from dungeoneer.characters import MonsterType, Character, PlayerCharacterType
+from dungeoneer.layouts import layout_from_region
+from dungeoneer.realms import Realm, PointOutsideRealmBoundary, handle_missile_collisions
+from dungeoneer.regions import Region, TileType
+
+
+def setUpModule():
+    pygame.init()  # building regions makes gold sprites, which load their sound effect
 
 
 class TestRealm(unittest.TestCase):
@@ -119,3 +128,340 @@ class TestRealm(unittest.TestCase):
         realm = Realm((5, 5), tile_size=(20, 20), region_size=(10, 10))
         pos = realm.centre_on_tile((201, 201), offset=(1, 1))
         assert_that(pos).is_equal_to((230, 230))
+
+
+class TestSpatialQueries(unittest.TestCase):
+    # Two empty regions of 10x10 tiles of 20 pixels, so the border between them is at x = 200
+    def setUp(self):
+        self.realm = Realm((2, 1), tile_size=(20, 20), region_size=(10, 10))
+        self.monster = make_monster_sprite(MonsterType.ZOMBIE, 215, 100, self.realm)
+
+    def test_any_solid_collisions_withMonsterOverRegionBorder_isTrue(self):
+        player = Player(self.monster.rect.left - 5, 100, Character(PlayerCharacterType.TOBY), self.realm)
+        assert_that(self.realm.region_from_pixel_position(player.rect.center).id_code).is_equal_to((0, 0))
+        assert_that(self.realm.any_solid_collisions(player)).is_true()
+
+    def test_any_solid_collisions_doesNotCollideWithItself(self):
+        assert_that(self.realm.any_solid_collisions(self.monster)).is_false()
+
+    def test_move_withMonster_updatesSpatialHash(self):
+        self.monster.direction.update(1, 0)
+        self.monster.move()
+        found = self.realm.spatial["solid"].query_rect(pygame.Rect(self.monster.rect.right - 1, 100, 1, 1))
+        assert_that(found).contains(self.monster)
+
+    def test_handle_missile_collisions_withMonsterOverRegionBorder_hitsIt(self):
+        missile = make_attack_sprite(0, 0, (1, 0), items.ammo["arrow"])
+        missile.rect.right = self.monster.rect.left + 5
+        missile.rect.centery = 100
+        self.realm.shoot(missile, affects_player=False)
+        vitality = self.monster.vitality
+        handle_missile_collisions(self.realm)
+        assert_that(self.monster.vitality).is_less_than(vitality)
+
+    def test_handle_missile_collisions_withTargetKilledEarlierInBatch_skipsIt(self):
+        missiles = [make_attack_sprite(0, 0, (1, 0), items.ammo["arrow"]) for _ in range(2)]
+        for missile in missiles:
+            missile.rect.center = self.monster.rect.center
+            self.realm.shoot(missile, affects_player=False)
+        self.monster.vitality = 1
+        damage = missiles[1].damage
+        handle_missile_collisions(self.realm)
+        assert_that(self.monster.alive()).is_false()
+        assert_that(missiles[1].damage).is_equal_to(damage)
+
+    def test_items_in_rect_withItemOverRegionBorder_findsIt(self):
+        arrows = self.realm.drop(items.ammo["arrow"], (204, 50))
+        assert_that(self.realm.items_in_rect(pygame.Rect(190, 40, 15, 20))).contains(arrows)
+
+    def test_evict_region_removesItsSpritesFromSpatialHashes(self):
+        self.realm.evict_region((1, 0))
+        assert_that(self.realm.spatial["solid"]).is_length(0)
+
+
+class TestSweptCollisions(unittest.TestCase):
+    # One empty region of 10x10 tiles of 20 pixels with a wall one tile thick from x = 100 to 120
+    def setUp(self):
+        self.realm = Realm((1, 1), tile_size=(20, 20), region_size=(10, 10))
+        for row in range(10):
+            self.realm.region((0, 0)).place_by_type((5, row), TileType.STONE_WALL)
+
+    def test_handle_missile_collisions_withMissileFasterThanWallIsThick_hitsWall(self):
+        missile = make_attack_sprite(60, 100, (1, 0), items.ammo["arrow"], repeats=True)
+        missile.speed = 80
+        self.realm.shoot(missile, affects_player=False)
+        missile.update()
+        assert_that(missile.rect.left).is_greater_than(120)
+        damage = missile.damage
+        handle_missile_collisions(self.realm)
+        assert_that(missile.rect.right).is_equal_to(100)
+        assert_that(missile.damage).is_less_than(damage)
+
+    def test_handle_missile_collisions_withTargetKilledEarlierInBatch_hitsWallInstead(self):
+        monster = make_monster_sprite(MonsterType.ZOMBIE, 80, 100, self.realm)
+        monster.vitality = 1
+        missiles = [make_attack_sprite(60, 100, (1, 0), items.ammo["arrow"], repeats=True) for _ in range(2)]
+        for missile in missiles:
+            missile.speed = 80
+            self.realm.shoot(missile, affects_player=False)
+            missile.update()
+        damage = missiles[1].damage
+        handle_missile_collisions(self.realm)
+        assert_that(monster.alive()).is_false()
+        assert_that(missiles[1].rect.right).is_equal_to(100)
+        assert_that(missiles[1].damage).is_less_than(damage)
+
+    def test_solid_tile_sweep_returnsWallThatStoppedRect(self):
+        motion, wall = self.realm.solid_tile_sweep(pygame.Rect(70, 50, 10, 10), (500, 0))
+        assert_that(motion).is_equal_to((20, 0))
+        assert_that(wall.rect).is_equal_to(pygame.Rect(100, 40, 20, 20))
+
+    def test_solid_tile_at_outsideRealm_isFalse(self):
+        assert_that(self.realm.solid_tile_at(5, 3)).is_true()
+        assert_that(self.realm.solid_tile_at(5, 13)).is_false()
+
+
+class TestGenerateMap(unittest.TestCase):
+    @staticmethod
+    def generated_layouts(**kwargs):
+        realm = Realm((2, 2), tile_size=(40, 40), region_size=(40, 22), **kwargs)
+        realm.generate_map()
+        return {c: layout_from_region(region) for c, region in realm.regions.items()}
+
+    def test_generate_map_withSameSeed_generatesSameRealm(self):
+        assert_that(self.generated_layouts(seed=7)).is_equal_to(self.generated_layouts(seed=7))
+
+    def test_generate_map_withDifferentSeed_generatesDifferentRealm(self):
+        assert_that(self.generated_layouts(seed=7)).is_not_equal_to(self.generated_layouts(seed=8))
+
+    def test_create_empty_regions_withNeighbouringRegions_hasMatchingExits(self):
+        realm = Realm((3, 3), tile_size=(40, 40), region_size=(40, 22), seed=7)
+        for (x, y), region in realm.regions.items():
+            with self.subTest(region=(x, y)):
+                if x > 0:
+                    assert_that(region.exits["W"]).is_equal_to(realm.region((x - 1, y)).exits["E"])
+                if y > 0:
+                    assert_that(region.exits["N"]).is_equal_to(realm.region((x, y - 1)).exits["S"])
+
+    def test_generate_map_withWorkers_generatesSameRealmAsSerial(self):
+        serial = self.generated_layouts(seed=7)
+        parallel = self.generated_layouts(seed=7, workers=2)
+        assert_that(parallel).is_equal_to(serial)
+
+    def test_generate_map_withWorkers_buildsSpritesInThisProcess(self):
+        realm = Realm((2, 1), tile_size=(40, 40), region_size=(40, 22), seed=7, workers=2)
+        realm.generate_map()
+        for region in realm.regions.values():
+            assert_that(len(region.groups.effects)).is_greater_than(0)
+
+
+class TestBakeScenery(unittest.TestCase):
+    def setUp(self):
+        self.realm = Realm((1, 1), tile_size=(40, 40), region_size=(40, 22), seed=7, bake_scenery=True)
+        self.realm.generate_map()
+        self.region = self.realm.region((0, 0))
+
+    def wall_centre(self):
+        column, row = np.argwhere(self.region.baked_scenery)[0]
+        return self.region.pixel_position((column, row), align="center")
+
+    def test_generate_map_withBakedScenery_onlyMonstersAreSolidSprites(self):
+        assert_that(self.region.baked_scenery.any()).is_true()
+        assert_that([s for s in self.region.groups.solid if not isinstance(s, Monster)]).is_empty()
+
+    def test_any_solid_collisions_withMonsterInWall_isTrue(self):
+        monster = make_monster_sprite(MonsterType.ZOMBIE, 0, 0, self.realm)
+        monster.rect.center = self.wall_centre()
+        assert_that(self.realm.any_solid_collisions(monster)).is_true()
+
+    def test_solid_tile_hit_withRectInWall_returnsTheWall(self):
+        rect = pygame.Rect(0, 0, 10, 10)
+        rect.center = self.wall_centre()
+        assert_that(self.realm.solid_tile_hit(rect).rect.center).is_equal_to(self.wall_centre())
+
+    def test_solid_tile_hit_withRectOnFloor_returnsNone(self):
+        column, row = np.argwhere(self.region.solid_ids == 0)[0]
+        rect = pygame.Rect(0, 0, 10, 10)
+        rect.center = self.region.pixel_position((column, row), align="center")
+        assert_that(self.realm.solid_tile_hit(rect)).is_none()
+
+    def test_spawn_withMonsterInWall_movesItOutOfTheWall(self):
+        monster = make_monster_sprite(MonsterType.ZOMBIE, *self.wall_centre(), self.realm)
+        assert_that(self.realm.solid_tile_hit(monster.rect)).is_none()
+
+    def test_restore_region_withBakedScenery_makesNoWallSprites(self):
+        self.realm.streaming_radius = 1
+        self.realm.evict_region((0, 0))
+        self.realm.restore_region((0, 0))
+        assert_that([s for s in self.region.groups.solid if not isinstance(s, Monster)]).is_empty()
+
+
+class TestLazyGeneration(unittest.TestCase):
+    def setUp(self):
+        self.realm = Realm((3, 3), tile_size=(40, 40), region_size=(40, 22), seed=7, lazy=True)
+        self.realm.generate_map()
+
+    def tearDown(self):
+        self.realm.close()
+
+    def stubs(self):
+        return {c for c, region in self.realm.regions.items() if region.is_stub}
+
+    def test_generate_map_inLazyMode_leavesAllRegionsAsStubs(self):
+        assert_that(self.stubs()).is_length(9)
+
+    def test_generate_regions_near_withPositionInCentreOfRegion_generatesOnlyThatRegion(self):
+        centre = self.realm.region((1, 1)).pixel_base[0] + 800, self.realm.region((1, 1)).pixel_base[1] + 440
+        self.realm.generate_regions_near(centre)
+        assert_that(self.stubs()).is_length(8)
+        assert_that(self.realm.region((1, 1)).is_stub).is_false()
+
+    def test_generate_regions_near_withPositionNearCorner_generatesNeighbours(self):
+        self.realm.generate_regions_near((1600 + 10, 880 + 10))
+        assert_that(self.stubs()).is_length(5)
+
+    def test_prefetch_headingEast_generatesRegionToTheEast(self):
+        centre = 1600 + 800, 880 + 440
+        self.realm.prefetch(centre, pygame.Vector2(1, 0))
+        assert_that(self.realm.region((2, 1)).is_stub).is_true()
+        self.realm.generate_regions_near((3200 + 800, 880 + 440))
+        assert_that(self.stubs()).is_length(8)
+        assert_that(self.realm.region((2, 1)).is_stub).is_false()
+
+    def test_generate_region_withPrefetchedLayout_generatesSameRegionAsEagerRealm(self):
+        eager = Realm((3, 3), tile_size=(40, 40), region_size=(40, 22), seed=7)
+        eager.generate_map()
+        self.realm.prefetch((1600 + 800, 880 + 440), pygame.Vector2(1, 0))
+        region = self.realm.generate_region((2, 1))
+        assert_that(layout_from_region(region)).is_equal_to(layout_from_region(eager.region((2, 1))))
+
+
+def failing_generator(region, rng):
+    raise AssertionError(f"{region} should have been loaded from the cache")
+
+
+def cell_room_generator(region, rng):
+    region.rooms.add_room([(1, 1), (1, 2), (2, 2)])
+    return region
+
+
+class TestRealmCacheFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "realm.cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_realm(self, **kwargs):
+        return Realm((2, 2), tile_size=(40, 40), region_size=(40, 22), cache_file=self.path, **kwargs)
+
+    def test_generate_map_withNoCache_writesCache(self):
+        self.make_realm(seed=7).generate_map()
+        assert_that(self.path).exists()
+
+    def test_generate_map_withCache_loadsSameRealmWithoutGenerating(self):
+        first = self.make_realm(seed=7)
+        first.generate_map()
+        second = self.make_realm(seed=7, generator=failing_generator)
+        second.generate_map()
+        for c, region in first.regions.items():
+            with self.subTest(region=c):
+                assert_that(layout_from_region(second.region(c))).is_equal_to(layout_from_region(region))
+                assert_that(len(second.region(c).groups.effects)).is_greater_than(0)
+
+    def test_generate_map_withCellListRooms_cachesThem(self):
+        self.make_realm(seed=7, generator=cell_room_generator).generate_map()
+        realm = self.make_realm(seed=7, generator=failing_generator)
+        realm.generate_map()
+        rooms = realm.region((1, 1)).rooms
+        assert_that(rooms.room_at((2, 2))).is_equal_to([(1, 1), (1, 2), (2, 2)])
+        assert_that(rooms.index_at((2, 1))).is_none()
+
+    def test_generate_map_withCacheForOtherSeed_regenerates(self):
+        self.make_realm(seed=7).generate_map()
+        realm = self.make_realm(seed=8)
+        assert_that(realm.cache).is_none()
+        realm.generate_map()
+        assert_that(self.make_realm(seed=8).cache).is_not_none()
+
+    def test_Realm_withNoSeedAndCache_usesCachedSeed(self):
+        self.make_realm(seed=7).generate_map()
+        assert_that(self.make_realm().seed).is_equal_to(7)
+
+    def test_close_inLazyMode_savesGeneratedRegionsOnly(self):
+        realm = self.make_realm(seed=7, lazy=True)
+        realm.generate_region((1, 0))
+        realm.close()
+        cache = self.make_realm(seed=7).cache
+        assert_that(cache).is_length(1)
+        assert_that((1, 0) in cache).is_true()
+
+
+class TestUnboundedRealm(unittest.TestCase):
+    REGION_PIXELS = 40 * 40, 22 * 40
+
+    def make_realm(self, **kwargs):
+        return Realm(None, tile_size=(40, 40), region_size=(40, 22), seed=7, **kwargs)
+
+    def centre_of(self, coordinates):
+        (x, y), (width, height) = coordinates, self.REGION_PIXELS
+        return x * width + width // 2, y * height + height // 2
+
+    def walk(self, realm, coordinates):
+        realm.generate_regions_near(self.centre_of(coordinates))
+        realm.stream(self.centre_of(coordinates))
+
+    def test_region_withAnyCoordinates_makesStubOnDemand(self):
+        realm = self.make_realm()
+        assert_that(realm).is_length(0)
+        region = realm.region_from_pixel_position((-100000, 5000000))
+        assert_that(region.is_stub).is_true()
+        assert_that(region.exits).contains_key("N", "S", "E", "W")
+        assert_that(realm).is_length(1)
+
+    def test_exits_withRegionsMadeSeparately_matchNeighbours(self):
+        realm = self.make_realm()
+        region = realm.region((-3, 5))
+        assert_that(region.exits["N"]).is_equal_to(self.make_realm().region((-3, 4)).exits["S"])
+        assert_that(region.exits["W"]).is_equal_to(self.make_realm().region((-4, 5)).exits["E"])
+
+    def test_generate_region_inAnyOrder_generatesSameRegion(self):
+        realm = self.make_realm()
+        realm.generate_region((0, 0))
+        region = realm.generate_region((-2, 3))
+        expected = self.make_realm().generate_region((-2, 3))
+        assert_that(layout_from_region(region)).is_equal_to(layout_from_region(expected))
+
+    def test_out_of_bounds_isAlwaysFalse(self):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect(-10 ** 6, 10 ** 6, 5, 5)
+        assert_that(self.make_realm().out_of_bounds(sprite)).is_false()
+
+    def test_stream_withLongWalk_keepsRegionCountBounded(self):
+        realm = self.make_realm(streaming_radius=1, max_regions=12)
+        for x in range(30):
+            self.walk(realm, (x, -x // 2))
+            assert_that(len(realm)).is_less_than_or_equal_to(12)
+        assert_that(len(realm.resident)).is_less_than_or_equal_to(9)
+
+    def test_stream_withReturnToForgottenRegion_restoresItsState(self):
+        realm = self.make_realm(streaming_radius=1, max_regions=4)
+        self.walk(realm, (0, 0))
+        arrows = realm.drop(items.ammo["arrow"], self.centre_of((0, 0)))
+        arrows.item_spec.count = 3
+        for x in range(1, 10):
+            self.walk(realm, (x, 0))
+        assert_that((0, 0) in realm.regions).is_false()
+        self.walk(realm, (0, 0))
+        dropped = [s for s in realm.region((0, 0)).groups.items if s.rect.center == self.centre_of((0, 0))]
+        assert_that(dropped).is_length(1)
+        assert_that(dropped[0].item_spec.count).is_equal_to(3)
+
+    def test_stream_withLongWalk_keepsSnapshotCountBounded(self):
+        realm = self.make_realm(streaming_radius=1, max_regions=4, max_snapshots=3)
+        for x in range(12):
+            self.walk(realm, (x, 0))
+            assert_that(len(realm.snapshots)).is_less_than_or_equal_to(3)
+        assert_that(realm.snapshots).is_not_empty()
+        assert_that((0, 0) in realm.snapshots).is_false()
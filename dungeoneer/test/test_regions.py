@@ -98,6 +98,17 @@ class TestRegion(unittest.TestCase):
         self.assertEqual(TileType.STONE_FLOOR.value, tile)
         self.assertEqual(TileType.WATER.value, animated)
 
+    def test_build_world_withWater_makesAnimatedTileNotSprite(self):
+        region = Region((2, 2), tile_size=pygame.Vector2(40, 40), default_tile=TileType.STONE_FLOOR.value)
+        region.place_by_type((1, 0), TileType.WATER, layer=1)
+        region.place_by_type((0, 1), TileType.LAVA)
+        region.build_world(None)
+        assert_that(region.groups.effects).is_empty()
+        tiles = {tile: position for position, tile, _ in region.animated_tiles}
+        water = TileType.WATER.value
+        assert_that(tiles).is_equal_to({water: (40 + (40 - water.width) // 2, (40 - water.height) // 2),
+                                        TileType.LAVA.value: (0, 40)})
+
     def test_place_withStoneWall_addsStoneWallToSolidObjects(self):
         region = Region((1, 1), default_tile=TileType.STONE_FLOOR.value)
         region.place_by_type((0, 0), TileType.STONE_WALL)
@@ -125,12 +136,13 @@ class TestRegion(unittest.TestCase):
         region.fill((1, 1), (2, 2), TileType.STONE_WALL)
         self.assertEqual(4, len(region.solid_objects))
 
-    def test_build_world_withSolidObjects_addsSpritesToRegionsSolidLayer(self):
+    def test_build_world_withSolidObjects_addsSpritesForDrawingOnly(self):
         realm = Realm((10, 10), (10, 10))
         region = Region((4, 4))
         region.fill((1, 1), (2, 2), TileType.STONE_WALL)
         region.build_world(realm)
-        self.assertEqual(4, len(region.groups.solid))
+        self.assertEqual(4, len(region.groups.effects))
+        self.assertEqual(0, len(region.groups.solid))
 
     def test_clear_area_with2x2Area_removes4SolidObjects(self):
         region = Region((4, 4))
@@ -138,6 +150,87 @@ class TestRegion(unittest.TestCase):
         region.clear_area((1, 1), (2, 2))
         self.assertEqual(16 - 4, len(region.solid_objects))
 
+    def test_place_withSameTileManyTimes_addsTileToPaletteOnce(self):
+        region = Region((4, 4))
+        region.fill_all(TileType.STONE_WALL)
+        region.place((1, 1), TileType.STONE_WALL.value)
+        assert_that(region.palette.count(TileType.STONE_WALL.value)).is_equal_to(1)
+
+    def test_place_outsideRegion_isIgnored(self):
+        region = Region((4, 4))
+        region.place((4, 0), TileType.STONE_WALL.value)
+        region.place((-1, 0), TileType.STONE_WALL.value)
+        assert_that(region.solid_objects).is_length(0)
+        assert_that(region.solid_object_at_position((-1, 0))).is_none()
+
+    def test_fill_withAreaOverlappingEdge_isClippedToRegion(self):
+        region = Region((4, 4))
+        region.fill((2, 2), (5, 5), TileType.STONE_WALL)
+        assert_that(region.solid_objects).is_length(4)
+
+    def test_clear_nodes_withNoReplacement_restoresDefaultTile(self):
+        region = Region((4, 4))
+        region.fill_all(TileType.STONE_WALL)
+        region.clear_nodes([(1, 1), (2, 1), (9, 9)])
+        assert_that(region.tile((1, 1))).is_equal_to(region.default_tile)
+        assert_that(region.solid_object_at_position((2, 1))).is_none()
+        assert_that(region.tiles).is_length(14)
+
+    def test_carve_withMask_clearsSolidsAndLaysFloor(self):
+        region = Region((4, 4))
+        region.fill_all(TileType.STONE_WALL)
+        region.carve(region.mask([(1, 1), (1, 2), (7, 7)]), TileType.GRASS)
+        assert_that(region.solid_objects).is_length(14)
+        assert_that(region.tile((1, 2))).is_equal_to(TileType.GRASS.value)
+
+    def test_carve_withSlices_clearsRectangle(self):
+        region = Region((4, 4))
+        region.fill_all(TileType.STONE_WALL)
+        region.carve(region.area((1, 1), (2, 3)))
+        assert_that(region.solid_objects).is_length(10)
+        assert_that(region.tile((2, 3))).is_equal_to(region.default_tile)
+
+    def test_solid_objects_asMapping_supportsDeletion(self):
+        region = Region((2, 2))
+        region.fill_all(TileType.STONE_WALL)
+        del region.solid_objects[(0, 1)]
+        assert_that(set(region.solid_objects)).is_equal_to({(0, 0), (1, 0), (1, 1)})
+
+
+RED_WALL = Tile(ScenerySprite, RED_TILE.filmstrip, is_solid=True)
+
+
+class TestBakeScenery(unittest.TestCase):
+    def make_region(self):
+        region = Region((4, 4), tile_size=pygame.Vector2(32, 32), pixel_base=(320, 0))
+        region.place_in_area(region.area((0, 0), (4, 4)), RED_WALL)
+        region.carve(region.area((1, 1), (2, 2)))
+        return region
+
+    def test_build_world_withBakedScenery_makesNoWallSprites(self):
+        region = self.make_region()
+        region.bake_scenery()
+        region.build_world(Realm((1, 1), (32, 32), (4, 4)))
+        assert_that(region.groups.solid).is_empty()
+        assert_that(region.groups.effects).is_empty()
+
+    def test_build_world_withAnimatedSolid_keepsItsSprite(self):
+        region = self.make_region()
+        animated = Tile(ScenerySprite, [RED_TILE.filmstrip[0], BLUE_TILE.filmstrip[0]], is_solid=True)
+        region.place((1, 1), animated)
+        region.bake_scenery()
+        region.build_world(Realm((1, 1), (32, 32), (4, 4)))
+        assert_that(region.groups.effects).is_length(1)
+        assert_that(region.groups.effects.sprites()[0].rect.center).is_equal_to((320 + 48, 48))
+
+    def test_render_tiles_withBakedSolidOffFloorLayer_drawsIt(self):
+        region = Region((2, 1), default_tile=BLUE_TILE)
+        region.place((1, 0), RED_WALL, layer=1)
+        region.bake_scenery()
+        surface = region.render_tiles()
+        assert_that(tuple(surface.get_at((48, 16)))).is_equal_to((255, 0, 0, 255))
+        assert_that(tuple(surface.get_at((16, 16)))).is_equal_to((0, 0, 255, 255))
+
 
 ROOM_2x2 = [(x, y) for x in range(1, 3) for y in range(1, 3)]
 ROOM_1x3 = [(5, y) for y in range(1, 4)]
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer.event_dispatcher import KeyEventDispatcher, HeldKeys
+from dungeoneer.replay import Replay, ReplayRecorder, ReplayPlayback, StaleReplay, key_mask
+
+
+class KeyObserver:
+    def __init__(self):
+        self.pressed = []
+
+    def on_key_down(self, key):
+        self.pressed.append(key)
+
+
+class TestReplayRecorder(unittest.TestCase):
+    def test_record_keys_withSameKeysHeld_extendsRun(self):
+        recorder = ReplayRecorder(seed=1)
+        for keys in ([pygame.K_d], [pygame.K_d], [pygame.K_d, pygame.K_SPACE], []):
+            recorder.record_keys(HeldKeys(keys))
+        d, space = key_mask(HeldKeys([pygame.K_d])), key_mask(HeldKeys([pygame.K_SPACE]))
+        assert_that(recorder.replay.key_runs).is_equal_to([[d, 2], [d | space, 1], [0, 1]])
+        assert_that(recorder.replay.steps).is_equal_to(4)
+
+    def test_record_event_recordsStepOfEvent(self):
+        recorder = ReplayRecorder(seed=1)
+        recorder.record_keys(HeldKeys())
+        recorder.record_event(pygame.KEYDOWN, pygame.K_1)
+        assert_that(recorder.replay.events).is_equal_to([[1, pygame.KEYDOWN, pygame.K_1]])
+
+
+class TestReplayPlayback(unittest.TestCase):
+    def setUp(self):
+        recorder = ReplayRecorder(seed=1)
+        recorder.record_keys(HeldKeys([pygame.K_w]))
+        recorder.record_event(pygame.KEYDOWN, pygame.K_2)
+        recorder.record_keys(HeldKeys([pygame.K_a, pygame.K_RETURN]))
+        self.replay = recorder.replay
+        self.dispatcher = KeyEventDispatcher()
+        self.observer = KeyObserver()
+        self.dispatcher.register(self.observer, {pygame.K_2})
+
+    def test_play_step_returnsRecordedKeysAndDispatchesEvents(self):
+        playback = ReplayPlayback(self.replay)
+        first = playback.play_step(self.dispatcher)
+        assert_that(first.keys).is_equal_to({pygame.K_w})
+        assert_that(self.observer.pressed).is_empty()
+        second = playback.play_step(self.dispatcher)
+        assert_that(second.keys).is_equal_to({pygame.K_a, pygame.K_RETURN})
+        assert_that(self.observer.pressed).is_equal_to([pygame.K_2])
+        assert_that(playback.finished).is_true()
+
+    def test_play_step_afterFinishing_holdsNoKeys(self):
+        playback = ReplayPlayback(self.replay)
+        for _ in range(3):
+            keys = playback.play_step(self.dispatcher)
+        assert_that(keys.keys).is_empty()
+
+
+class TestReplayFile(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "game.replay")
+
+    def test_load_afterSave_isSameReplay(self):
+        replay = Replay(seed=42, game={"realm_size": [6, 6]}, key_runs=[[8, 30], [0, 5]],
+                        events=[[3, pygame.KEYDOWN, pygame.K_1]])
+        replay.save(self.path)
+        assert_that(Replay.load(self.path)).is_equal_to(replay)
+
+    def test_load_withOtherFile_raisesStaleReplay(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a replay at all")
+        assert_that(Replay.load).raises(StaleReplay).when_called_with(self.path)
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from assertpy import assert_that
+
+from dungeoneer.rooms import Room, Rooms
+from dungeoneer.regions import Region
+from dungeoneer.spawn import monster_drops
+
+
+class TestRoom(unittest.TestCase):
+    def test_room_asSequence_listsCellsColumnByColumn(self):
+        room = Room(2, 3, 2, 3)
+        expected = [(2, 3), (2, 4), (2, 5), (3, 3), (3, 4), (3, 5)]
+        assert_that(list(room)).is_equal_to(expected)
+        assert_that([room[i] for i in range(len(room))]).is_equal_to(expected)
+
+    def test_room_withNegativeIndex_countsFromEnd(self):
+        assert_that(Room(2, 3, 2, 3)[-1]).is_equal_to((3, 5))
+
+    def test_room_withIndexPastEnd_raisesIndexError(self):
+        assert_that(Room(2, 3, 2, 3).__getitem__).raises(IndexError).when_called_with(6)
+
+    def test_contains_withCellOnEdge_isOnlyInsideToTheTopLeft(self):
+        room = Room(2, 3, 2, 3)
+        assert_that((2, 3) in room).is_true()
+        assert_that((4, 3) in room).is_false()
+
+    def test_random_cell_withSameRandomStream_matchesChoiceFromCellList(self):
+        room = Room(1, 1, 7, 5)
+        cells = list(room)
+        assert_that(room.random_cell(random.Random(4))).is_equal_to(random.Random(4).choice(cells))
+
+
+class TestRooms(unittest.TestCase):
+    def test_index_at_withRectangleRooms_findsRoomIndex(self):
+        rooms = Rooms((10, 10))
+        rooms.add_rooms_list([Room(1, 1, 2, 2), Room(5, 1, 1, 3)])
+        assert_that(rooms.index_at((2, 2))).is_equal_to(0)
+        assert_that(rooms.index_at((5, 3))).is_equal_to(1)
+        assert_that(rooms.index_at((4, 1))).is_none()
+
+    def test_index_at_withPositionsList_findsRoomIndex(self):
+        rooms = Rooms((10, 10))
+        rooms.add_room([(5, y) for y in range(1, 4)])
+        assert_that(rooms.index_at((5, 2))).is_equal_to(0)
+
+    def test_index_at_outsideRegion_returnsNone(self):
+        rooms = Rooms((10, 10))
+        rooms.add_room(Room(0, 0, 10, 10))
+        assert_that(rooms.index_at((10, 2))).is_none()
+        assert_that(rooms.index_at((-1, 2))).is_none()
+
+    def test_room_at_returnsRoom(self):
+        rooms = Rooms((10, 10))
+        room = Room(1, 1, 2, 2)
+        rooms.add_room(room)
+        assert_that(rooms.room_at((1, 2))).is_same_as(room)
+        assert_that(list(rooms)).is_equal_to([room])
+
+
+class TestMonsterDropsInRoom(unittest.TestCase):
+    def test_monster_drops_withRoom_dropsInsideRoom(self):
+        region = Region((10, 10))
+        room = Room(3, 4, 2, 2)
+        for _ in range(10):
+            monster_drops(room, region, base_p=100)
+        assert_that(region.monster_eggs).is_not_empty()
+        assert_that(all(p in room for p in region.monster_eggs)).is_true()
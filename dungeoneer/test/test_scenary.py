@@ -1,7 +1,10 @@
 import unittest
 
+from assertpy import assert_that
+
+from dungeoneer.animation import AnimationClock
 from dungeoneer.interfaces import SpriteGroups
-from dungeoneer.scenery import VisualEffect
+from dungeoneer.scenery import VisualEffect, ScenerySprite
 from dungeoneer.scenery import parabolic_motion
 from dungeoneer.spritesheet import SpriteSheet
 from dungeoneer.test.pixel_grid import make_pixel_grid
@@ -47,6 +50,32 @@ class TestScenery(unittest.TestCase):
         effect.update()
         self.assertEqual((3, 3), effect.rect.center)
 
+    def test_VisualEffect_repeatingForever_animatesByClockWithoutUpdate(self):
+        clock = AnimationClock(1000)
+        effect = VisualEffect(0, 0, FILM_STRIP, repeats=VisualEffect.FOREVER, frame_length=100, clock=clock)
+        clock.tick(1350)
+        assert_that(effect.frame).is_equal_to(3)
+        assert_that(effect.image).is_same_as(FILM_STRIP[3])
+
+    def test_VisualEffect_withNoRepeat_diesOnUpdateAfterClockPassesLastFrame(self):
+        clock = AnimationClock()
+        effect = VisualEffect(0, 0, FILM_STRIP, frame_length=100, clock=clock)
+        world = SpriteGroups()
+        world.effects.add(effect)
+        clock.tick(100 * len(FILM_STRIP) - 1)
+        effect.update()
+        assert_that(effect.alive()).is_true()
+        clock.tick(100 * len(FILM_STRIP))
+        effect.update()
+        assert_that(effect.alive()).is_false()
+
+    def test_ScenerySprite_withAnimatedFalse_keepsItsFirstFrame(self):
+        clock = AnimationClock()
+        scenery = ScenerySprite(3, 4, FILM_STRIP, animated=False)
+        scenery.clock = clock
+        clock.tick(100000)
+        assert_that(scenery.frame).is_equal_to(7)
+
 
 class TestMotionPathGeneration(unittest.TestCase):
     def test_parabolic_motion_withExactDivisibleWidth(self):
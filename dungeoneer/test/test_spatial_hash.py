@@ -0,0 +1,97 @@
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer.spatial_hash import SpatialHash, IndexedGroup
+
+
+def make_sprite(x, y, width=10, height=10):
+    sprite = pygame.sprite.Sprite()
+    sprite.rect = pygame.Rect(x, y, width, height)
+    return sprite
+
+
+class TestSpatialHash(unittest.TestCase):
+    def setUp(self):
+        self.spatial_hash = SpatialHash((20, 20))
+        self.group = IndexedGroup(self.spatial_hash)
+
+    def add(self, *args):
+        sprite = make_sprite(*args)
+        self.group.add(sprite)
+        return sprite
+
+    def test_cell_range_withRectEndingOnCellEdge_excludesNextCell(self):
+        assert_that(self.spatial_hash.cell_range(pygame.Rect(0, 0, 20, 20))).is_equal_to((0, 0, 0, 0))
+        assert_that(self.spatial_hash.cell_range(pygame.Rect(-5, 15, 10, 10))).is_equal_to((-1, 0, 0, 1))
+
+    def test_insert_withSpriteAcrossCells_isInEachCell(self):
+        sprite = self.add(15, 15, 10, 10)
+        assert_that([cell for cell, sprites in self.spatial_hash.cells.items() if sprite in sprites]) \
+            .contains_only((0, 0), (0, 1), (1, 0), (1, 1))
+
+    def test_query_rect_returnsOnlyOverlappingSprites(self):
+        near = self.add(0, 0)
+        self.add(12, 12)
+        self.add(100, 100)
+        assert_that(self.spatial_hash.query_rect(pygame.Rect(5, 5, 6, 6))).is_equal_to([near])
+
+    def test_query_rect_withSpriteInSeveralCells_returnsItOnce(self):
+        sprite = self.add(15, 15, 30, 30)
+        assert_that(self.spatial_hash.query_rect(pygame.Rect(0, 0, 60, 60))).is_equal_to([sprite])
+
+    def test_update_afterMove_findsSpriteAtNewPosition(self):
+        sprite = self.add(0, 0)
+        sprite.rect.topleft = (200, 200)
+        self.spatial_hash.update(sprite)
+        assert_that(self.spatial_hash.query_rect(pygame.Rect(0, 0, 20, 20))).is_empty()
+        assert_that(self.spatial_hash.query_rect(pygame.Rect(200, 200, 5, 5))).is_equal_to([sprite])
+        assert_that(self.spatial_hash.cells).is_length(1)
+
+    def test_kill_removesSpriteFromHash(self):
+        sprite = self.add(0, 0)
+        sprite.kill()
+        assert_that(sprite in self.spatial_hash).is_false()
+        assert_that(self.spatial_hash.cells).is_empty()
+
+    def test_query_withSpriteNoLongerInAnyGroup_dropsIt(self):
+        sprite = make_sprite(0, 0)
+        self.spatial_hash.insert(sprite)
+        assert_that(self.spatial_hash.query_rect(sprite.rect)).is_empty()
+        assert_that(self.spatial_hash).is_length(0)
+
+    def test_sharedHash_keepsSpriteWhileInAnyGroup(self):
+        other_group = IndexedGroup(self.spatial_hash)
+        sprite = self.add(0, 0)
+        other_group.add(sprite)
+        self.group.remove(sprite)
+        assert_that(sprite in self.spatial_hash).is_true()
+        other_group.remove(sprite)
+        assert_that(sprite in self.spatial_hash).is_false()
+
+    def test_query_radius_measuresToNearestEdge(self):
+        beside = self.add(20, 0)
+        self.add(40, 40)
+        assert_that(self.spatial_hash.query_radius((5, 5), 15)).is_equal_to([beside])
+
+    def test_nearest_returnsSpriteWithNearestCentre(self):
+        self.add(100, 0)
+        nearest = self.add(-40, 30)
+        self.add(0, 300)
+        assert_that(self.spatial_hash.nearest((0, 0))).is_same_as(nearest)
+
+    def test_nearest_withMaxDistance_ignoresFurtherSprites(self):
+        self.add(100, 0)
+        assert_that(self.spatial_hash.nearest((0, 0), max_distance=50)).is_none()
+
+    def test_nearest_withPredicate_skipsRejectedSprites(self):
+        rejected = self.add(0, 0)
+        accepted = self.add(60, 0)
+        assert_that(self.spatial_hash.nearest((0, 0), predicate=lambda s: s is not rejected)).is_same_as(accepted)
+
+    def test_nearest_withSpriteInFarRing_findsCloserSpriteInNextRing(self):
+        # the corner of ring 1 is further away than the side of ring 2
+        self.add(35, 35, 2, 2)
+        side = self.add(45, 5, 2, 2)
+        assert_that(self.spatial_hash.nearest((5, 5))).is_same_as(side)
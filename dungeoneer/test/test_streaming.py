@@ -0,0 +1,83 @@
+import unittest
+
+import pygame
+from assertpy import assert_that
+
+from dungeoneer import items
+from dungeoneer.items import GoldItem
+from dungeoneer.realms import Realm
+from dungeoneer.streaming import snapshot_region
+
+REGION_PIXELS = 40 * 40, 22 * 40
+
+
+def setUpModule():
+    pygame.init()  # building regions makes gold sprites, which load their sound effect
+
+
+def centre_of(coordinates):
+    x, y = coordinates
+    return x * REGION_PIXELS[0] + REGION_PIXELS[0] // 2, y * REGION_PIXELS[1] + REGION_PIXELS[1] // 2
+
+
+def sprite_count(region):
+    return sum(len(group) for group in vars(region.groups).values())
+
+
+class TestRegionStreaming(unittest.TestCase):
+    def setUp(self):
+        self.realm = Realm((4, 1), tile_size=(40, 40), region_size=(40, 22), seed=7, streaming_radius=1)
+        self.realm.generate_map()
+
+    def test_stream_withPlayerInFirstRegion_evictsRegionsOutsideRadius(self):
+        evicted = self.realm.stream(centre_of((0, 0)))
+        assert_that(evicted).is_length(2)
+        assert_that(self.realm.resident).is_equal_to({(0, 0), (1, 0)})
+        for coordinates in ((2, 0), (3, 0)):
+            region = self.realm.region(coordinates)
+            assert_that(region.is_evicted).is_true()
+            assert_that(sprite_count(region)).is_zero()
+
+    def test_stream_withPlayerReturning_rebuildsSameRegion(self):
+        region = self.realm.region((3, 0))
+        walls = len(region.groups.effects) - len(region.groups.items)
+        before = snapshot_region(region)
+        self.realm.stream(centre_of((0, 0)))
+        self.realm.stream(centre_of((3, 0)))
+        assert_that(region.is_evicted).is_false()
+        assert_that(len(region.groups.effects) - len(region.groups.items)).is_equal_to(walls)
+        assert_that(snapshot_region(region)).is_equal_to(before)
+        assert_that(self.realm.region((0, 0)).is_evicted).is_true()
+
+    def test_restore_withDamagedAwakeMonster_keepsVitalityAndSleepState(self):
+        region = self.realm.region((3, 0))
+        monster = next(iter(region.groups.monster))
+        monster.vitality = 1
+        monster.character.sleeping = False
+        self.realm.evict_region((3, 0))
+        self.realm.restore_region((3, 0))
+        states = {(m.vitality, m.character.sleeping) for m in region.groups.monster}
+        assert_that(states).contains((1, False))
+
+    def test_restore_withPickedUpAndDroppedItems_restoresWhatIsLeft(self):
+        region = self.realm.region((3, 0))
+        next(iter(region.groups.items)).kill()
+        arrows = self.realm.drop(items.ammo["arrow"], centre_of((3, 0)))
+        arrows.item_spec.count = 7
+        count = len(region.groups.items)
+        self.realm.evict_region((3, 0))
+        self.realm.restore_region((3, 0))
+        assert_that(region.groups.items).is_length(count)
+        restored = [s for s in region.groups.items if s.rect.center == centre_of((3, 0))]
+        assert_that(restored[0].item_spec.count).is_equal_to(7)
+
+    def test_restore_withGold_keepsTypeAndValue(self):
+        region = self.realm.region((3, 0))
+        gold = {(s.gold_type, s.value) for s in region.groups.items if isinstance(s, GoldItem)}
+        self.realm.evict_region((3, 0))
+        self.realm.restore_region((3, 0))
+        assert_that({(s.gold_type, s.value) for s in region.groups.items if isinstance(s, GoldItem)}) \
+            .is_equal_to(gold)
+
+    def test_Realm_withStreamingRadiusZero_raisesValueError(self):
+        assert_that(Realm).raises(ValueError).when_called_with((4, 1), (40, 40), streaming_radius=0)
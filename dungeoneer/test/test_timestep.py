@@ -0,0 +1,28 @@
+import unittest
+
+from assertpy import assert_that
+
+from dungeoneer.timestep import FixedTimestep
+
+
+class TestFixedTimestep(unittest.TestCase):
+    def test_advance_withLessThanAStep_runsNoSteps(self):
+        timestep = FixedTimestep(rate=40)
+        assert_that(timestep.advance(20)).is_equal_to(0)
+        assert_that(timestep.alpha).is_equal_to(0.8)
+
+    def test_advance_carriesLeftOverTimeToNextFrame(self):
+        timestep = FixedTimestep(rate=40)
+        steps = [timestep.advance(elapsed) for elapsed in (30, 30, 30, 30)]
+        assert_that(steps).is_equal_to([1, 1, 1, 1])
+        assert_that(timestep.advance(30)).is_equal_to(2)
+
+    def test_advance_withSlowFrame_runsSeveralSteps(self):
+        timestep = FixedTimestep(rate=40)
+        assert_that(timestep.advance(110)).is_equal_to(4)
+        assert_that(timestep.alpha).is_close_to(0.4, 1e-9)
+
+    def test_advance_withVerySlowFrame_dropsTimeBeyondMaxSteps(self):
+        timestep = FixedTimestep(rate=40, max_steps=5)
+        assert_that(timestep.advance(1010)).is_equal_to(5)
+        assert_that(timestep.alpha).is_close_to(0.4, 1e-9)
@@ -0,0 +1,43 @@
+"""
+The game simulates in fixed steps, whatever rate it is drawn at. Speeds are in pixels per step and
+monsters retarget every so many steps, so tying a step to a rendered frame would make the game run slow
+whenever frames are dropped, and fast on a machine that draws quickly.
+
+Each frame the time since the last frame is added to an accumulator, and as many whole steps as fit are taken
+out of it and simulated. What is left over, as a fraction of a step, is how far the frame falls between the last
+step and the next one: the camera uses it to draw moving sprites part way between where they were before the
+last step and where they are now, so that motion looks smooth when frames and steps do not line up.
+"""
+
+
+class FixedTimestep:
+    """
+    Args:
+        rate (int): simulation steps per second
+        max_steps (int): most steps to simulate for one frame. Time beyond that is dropped, so that a machine
+                         that cannot keep up slows the game down rather than falling further and further behind
+    """
+    def __init__(self, rate=40, max_steps=5):
+        self.step_length = 1000 / rate  # milliseconds
+        self.max_steps = max_steps
+        self.accumulator = 0.0  # milliseconds not yet simulated
+        self.steps = 0  # steps simulated so far. Counted by whoever simulates them
+
+    @property
+    def time(self) -> float:
+        """Milliseconds simulated so far"""
+        return self.steps * self.step_length
+
+    @property
+    def alpha(self) -> float:
+        """How far, from 0 to 1, the time now is between the last step and the next one"""
+        return self.accumulator / self.step_length
+
+    def advance(self, elapsed) -> int:
+        """Add elapsed milliseconds and return the number of steps that are now due"""
+        self.accumulator += elapsed
+        steps = min(int(self.accumulator // self.step_length), self.max_steps)
+        self.accumulator -= steps * self.step_length
+        if self.accumulator >= self.step_length:
+            self.accumulator %= self.step_length
+        return steps
@@ -1,6 +1,6 @@
 import enum
 from collections import namedtuple
-from random import randint
+import random
 
 from dungeoneer.game_assets import make_sprite_sheet
 
@@ -16,7 +16,16 @@ class GoldType(enum.Enum):
                            )
 
 
-def random_treasure(multiplier):
-    item_type = GoldType.GOLD_COINS.value
-    value = randint(item_type.lower, item_type.upper)
+def random_gold(multiplier, rng=random):
+    """Returns:
+        GoldType, value
+    """
+    gold_type = GoldType.GOLD_COINS
+    item_type = gold_type.value
+    return gold_type, rng.randint(item_type.lower, item_type.upper)
+
+
+def random_treasure(multiplier, rng=random):
+    gold_type, value = random_gold(multiplier, rng)
+    item_type = gold_type.value
     return item_type.sprite_sheet, value, item_type.scale